@@ -14,7 +14,10 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 from app.database import Base
 # Import all models so Alembic can detect them for autogenerate
 from app.models.campaign import CampaignModel  # noqa: F401
+from app.models.detection_job import DetectionJobModel  # noqa: F401
+from app.models.idempotency_key import IdempotencyKeyModel  # noqa: F401
 from app.models.result import ResultModel  # noqa: F401
+from app.models.result_stats import ResultStatsModel  # noqa: F401
 from app.models.user import UserModel  # noqa: F401
 from app.models.userPortal import UserPortalModel  # noqa: F401
 
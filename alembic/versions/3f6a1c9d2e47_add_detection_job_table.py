@@ -0,0 +1,56 @@
+"""Add detection_job table
+
+Revision ID: 3f6a1c9d2e47
+Revises: 06b31b1e9add
+Create Date: 2026-10-17 09:12:31.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a1c9d2e47'
+down_revision: Union[str, Sequence[str], None] = '06b31b1e9add'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'detection_job',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('result_id', sa.Integer(), nullable=False),
+        sa.Column('image_url', sa.String(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('pending', 'running', 'done', 'failed', name='detection_job_status'),
+            nullable=False,
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['result_id'], ['result.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('result_id'),
+    )
+    op.create_index(
+        'ix_detection_job_status_next_run_at',
+        'detection_job',
+        ['status', 'next_run_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_detection_job_status_next_run_at', table_name='detection_job')
+    op.drop_table('detection_job')
+    sa.Enum(name='detection_job_status').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,201 @@
+"""Store coordinates as numbers and add geohash to result
+
+Revision ID: 5a9c3e1d7f24
+Revises: e7c4a2f19b36
+Create Date: 2026-10-17 13:52:19.604481
+
+"""
+import math
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9c3e1d7f24'
+down_revision: Union[str, Sequence[str], None] = 'e7c4a2f19b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+NUMERIC_REGEX = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+NUMERIC_PATTERN = f"'{NUMERIC_REGEX}'"
+COORDINATE_LIMITS = {"lat": 90.0, "lng": 180.0}
+
+
+def _valid_coordinate(name: str, value) -> bool:
+    if value is None or not re.match(NUMERIC_REGEX, value):
+        return False
+    number = float(value)
+    return math.isfinite(number) and abs(number) <= COORDINATE_LIMITS[name]
+
+
+def _null_invalid_result_coordinates(connection) -> None:
+    """
+    Set both coordinates to NULL where either does not parse as an in-range number.
+
+    Runs before the type change: SQLite's CAST would turn such strings into 0.0
+    and put bogus points at (0, 0) on the map.
+    """
+    select_batch = sa.text(
+        "SELECT id, lat, lng FROM result "
+        "WHERE id > :last_id AND (lat IS NOT NULL OR lng IS NOT NULL) "
+        "ORDER BY id LIMIT :batch_size"
+    )
+    clear = sa.text("UPDATE result SET lat = NULL, lng = NULL WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select_batch, {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        invalid = [
+            {"id": row.id}
+            for row in rows
+            if not (_valid_coordinate("lat", row.lat) and _valid_coordinate("lng", row.lng))
+        ]
+        if invalid:
+            connection.execute(clear, invalid)
+        last_id = rows[-1].id
+
+
+def _check_address_coordinates(connection) -> None:
+    """
+    Fail the migration if any address coordinate does not parse as an in-range number.
+
+    Address coordinates are NOT NULL, so they cannot be cleared like result
+    ones, and SQLite's CAST would silently turn them into 0.0.
+    """
+    select_batch = sa.text(
+        "SELECT id, lat, lng FROM address WHERE id > :last_id ORDER BY id LIMIT :batch_size"
+    )
+    invalid_ids = []
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select_batch, {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        invalid_ids.extend(
+            row.id
+            for row in rows
+            if not (_valid_coordinate("lat", row.lat) and _valid_coordinate("lng", row.lng))
+        )
+        last_id = rows[-1].id
+    if invalid_ids:
+        raise RuntimeError(
+            f"Addresses with invalid lat/lng must be fixed before this migration: ids {invalid_ids[:20]}"
+            + (f" and {len(invalid_ids) - 20} more" if len(invalid_ids) > 20 else "")
+        )
+
+
+def _encode_geohash(lat: float, lng: float) -> str:
+    # Frozen copy of GeoService.encode_geohash so the migration does not depend on app code
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars, bits, value, use_lng = [], 0, 0, True
+    while len(chars) < GEOHASH_PRECISION:
+        interval, coordinate = (lng_range, lng) if use_lng else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        use_lng = not use_lng
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Result coordinates were validated as numeric on upload; anything else becomes NULL.
+    _null_invalid_result_coordinates(op.get_bind())
+    with op.batch_alter_table('result') as batch_op:
+        for column in ('lat', 'lng'):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.String(length=50),
+                type_=sa.Float(),
+                existing_nullable=True,
+                postgresql_using=(
+                    f"CASE WHEN {column} ~ {NUMERIC_PATTERN} "
+                    f"THEN trim({column})::double precision END"
+                ),
+            )
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    # Address coordinates are required, so invalid values fail the migration loudly.
+    _check_address_coordinates(op.get_bind())
+    with op.batch_alter_table('address') as batch_op:
+        for column in ('lat', 'lng'):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.String(length=50),
+                type_=sa.Float(),
+                existing_nullable=False,
+                postgresql_using=f"trim({column})::double precision",
+            )
+
+    select_batch = sa.text(
+        "SELECT id, lat, lng FROM result "
+        "WHERE id > :last_id AND lat IS NOT NULL AND lng IS NOT NULL "
+        "ORDER BY id LIMIT :batch_size"
+    )
+    update_geohash = sa.text("UPDATE result SET geohash = :geohash WHERE id = :id")
+
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select_batch, {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+            ).fetchall()
+            if not rows:
+                break
+            connection.execute(
+                update_geohash,
+                [
+                    {"id": row.id, "geohash": _encode_geohash(float(row.lat), float(row.lng))}
+                    for row in rows
+                ],
+            )
+            last_id = rows[-1].id
+
+    op.create_index('ix_result_geohash', 'result', ['geohash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_result_geohash', table_name='result')
+
+    with op.batch_alter_table('address') as batch_op:
+        for column in ('lat', 'lng'):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Float(),
+                type_=sa.String(length=50),
+                existing_nullable=False,
+                postgresql_using=f"{column}::varchar",
+            )
+
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.drop_column('geohash')
+        for column in ('lat', 'lng'):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Float(),
+                type_=sa.String(length=50),
+                existing_nullable=True,
+                postgresql_using=f"{column}::varchar",
+            )
@@ -0,0 +1,27 @@
+"""Add (created_at, id) index to result table
+
+Revision ID: 8d2e5b7a4c10
+Revises: 3f6a1c9d2e47
+Create Date: 2026-10-17 10:03:57.116284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e5b7a4c10'
+down_revision: Union[str, Sequence[str], None] = '3f6a1c9d2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_result_created_at_id', 'result', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_result_created_at_id', table_name='result')
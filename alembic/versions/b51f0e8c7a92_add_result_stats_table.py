@@ -0,0 +1,52 @@
+"""Add result_stats table
+
+Revision ID: b51f0e8c7a92
+Revises: 8d2e5b7a4c10
+Create Date: 2026-10-17 11:26:40.772013
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b51f0e8c7a92'
+down_revision: Union[str, Sequence[str], None] = '8d2e5b7a4c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTER_COLUMNS = (
+    'total',
+    'status_visualized',
+    'status_processing',
+    'status_finished',
+    'status_failed',
+    'type_terreno',
+    'type_propriedade',
+    'object_count_sum',
+    'feedback_likes',
+    'feedback_dislikes',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'result_stats',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('scope', sa.Enum('campaign', 'city', name='result_stats_scope'), nullable=False),
+        sa.Column('scope_key', sa.String(length=255), nullable=False),
+        *[sa.Column(column, sa.Integer(), nullable=False) for column in COUNTER_COLUMNS],
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'scope_key', name='uq_result_stats_scope_key'),
+    )
+    # Populate with `python -m app.commands.rebuild_result_stats` after upgrading
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('result_stats')
+    sa.Enum(name='result_stats_scope').drop(op.get_bind(), checkfirst=True)
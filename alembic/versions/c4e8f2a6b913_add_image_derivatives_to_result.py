@@ -0,0 +1,34 @@
+"""Add thumbnail and preview URLs to result table
+
+Revision ID: c4e8f2a6b913
+Revises: 5a9c3e1d7f24
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8f2a6b913'
+down_revision: Union[str, Sequence[str], None] = '5a9c3e1d7f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('result', sa.Column('original_thumbnail', sa.String(), nullable=True))
+    op.add_column('result', sa.Column('original_preview', sa.String(), nullable=True))
+    op.add_column('result', sa.Column('result_thumbnail', sa.String(), nullable=True))
+    op.add_column('result', sa.Column('result_preview', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('result', 'result_preview')
+    op.drop_column('result', 'result_thumbnail')
+    op.drop_column('result', 'original_preview')
+    op.drop_column('result', 'original_thumbnail')
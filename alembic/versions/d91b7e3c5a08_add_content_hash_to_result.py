@@ -0,0 +1,31 @@
+"""Add content_hash to result table
+
+Revision ID: d91b7e3c5a08
+Revises: c4e8f2a6b913
+Create Date: 2026-10-17 14:37:05.218846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91b7e3c5a08'
+down_revision: Union[str, Sequence[str], None] = 'c4e8f2a6b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing results keep a NULL hash; only new uploads are deduplicated
+    op.add_column('result', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_result_content_hash', 'result', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_result_content_hash', table_name='result')
+    op.drop_column('result', 'content_hash')
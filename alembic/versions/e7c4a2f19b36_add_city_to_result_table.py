@@ -0,0 +1,65 @@
+"""Add denormalized city to result table
+
+Revision ID: e7c4a2f19b36
+Revises: b51f0e8c7a92
+Create Date: 2026-10-17 12:40:08.350917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c4a2f19b36'
+down_revision: Union[str, Sequence[str], None] = 'b51f0e8c7a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('result', sa.Column('city', sa.String(length=100), nullable=True))
+
+    # Backfill from the user's address, falling back to the campaign's city.
+    # Each batch commits on its own so large tables are not locked for the whole run.
+    select_batch = sa.text(
+        "SELECT r.id, COALESCE(a.city, c.city) AS city "
+        "FROM result r "
+        "LEFT JOIN address a ON a.user_id = r.user_id "
+        "LEFT JOIN campaign c ON c.id = r.campaign_id "
+        "WHERE r.id > :last_id "
+        "ORDER BY r.id "
+        "LIMIT :batch_size"
+    )
+    update_city = sa.text("UPDATE result SET city = :city WHERE id = :id")
+
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select_batch, {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+            ).fetchall()
+            if not rows:
+                break
+            updates = [{"id": row.id, "city": row.city} for row in rows if row.city is not None]
+            if updates:
+                connection.execute(update_city, updates)
+            last_id = rows[-1].id
+
+    op.create_index(
+        'ix_result_city_created_at_id',
+        'result',
+        ['city', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_result_city_created_at_id', table_name='result')
+    op.drop_column('result', 'city')
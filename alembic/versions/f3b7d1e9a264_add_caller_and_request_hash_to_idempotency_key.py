@@ -0,0 +1,44 @@
+"""Add caller and request_hash to idempotency_key table
+
+Revision ID: f3b7d1e9a264
+Revises: e2a4c6f8b150
+Create Date: 2026-10-17 19:12:40.318224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b7d1e9a264'
+down_revision: Union[str, Sequence[str], None] = 'e2a4c6f8b150'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored responses were not scoped to a caller, so none of them can be safely
+    # replayed; they only live for IDEMPOTENCY_TTL_SECONDS, so drop them
+    op.execute('DELETE FROM idempotency_key')
+    with op.batch_alter_table('idempotency_key') as batch_op:
+        batch_op.drop_constraint('uq_idempotency_key_key_method_path', type_='unique')
+        batch_op.add_column(sa.Column('caller', sa.String(length=100), nullable=False))
+        batch_op.add_column(sa.Column('request_hash', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint(
+            'uq_idempotency_key_key_caller_method_path', ['key', 'caller', 'method', 'path']
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DELETE FROM idempotency_key')
+    with op.batch_alter_table('idempotency_key') as batch_op:
+        batch_op.drop_constraint('uq_idempotency_key_key_caller_method_path', type_='unique')
+        batch_op.drop_column('request_hash')
+        batch_op.drop_column('caller')
+        batch_op.create_unique_constraint(
+            'uq_idempotency_key_key_method_path', ['key', 'method', 'path']
+        )
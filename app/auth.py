@@ -0,0 +1,44 @@
+"""
+FastAPI dependencies that resolve the caller from a bearer access token.
+
+They only check the token signature and claims, so they cost no database query
+and no password check. Add ``Depends(require_user)`` (mobile users) or
+``Depends(require_user_portal)`` (portal users) to a route to protect it.
+"""
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.services.token_service import TokenService, TokenIdentity, InvalidTokenError
+
+USER_AUDIENCE = "user"
+USER_PORTAL_AUDIENCE = "userPortal"
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _identity(credentials: HTTPAuthorizationCredentials | None, audience: str) -> TokenIdentity:
+    if credentials is None:
+        raise _unauthorized()
+    try:
+        return TokenService.decode(credentials.credentials, audience)
+    except InvalidTokenError:
+        raise _unauthorized() from None
+
+
+def require_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> TokenIdentity:
+    return _identity(credentials, USER_AUDIENCE)
+
+
+def require_user_portal(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> TokenIdentity:
+    return _identity(credentials, USER_PORTAL_AUDIENCE)
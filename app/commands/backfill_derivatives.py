@@ -0,0 +1,73 @@
+"""
+Make the missing thumbnails and previews of existing results.
+
+    python -m app.commands.backfill_derivatives
+    python -m app.commands.backfill_derivatives --limit 1000
+
+Covers results uploaded before derivatives existed and images the API dropped
+when its derivative queue was full. Safe to re-run: only results without a
+thumbnail are processed.
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from app.database import SessionLocal
+from app.models.enums.result import ResultStatus
+from app.services.image_derivative_service import image_derivatives, ORIGINAL, RESULT
+from app.services.result_service import ResultService
+
+BATCH_SIZE = 100
+
+
+def _pending_images(result) -> list[tuple[int, str, str]]:
+    images = []
+    if result.original_thumbnail is None:
+        images.append((result.id, ORIGINAL, result.original_image))
+    if (
+        result.status == ResultStatus.finished
+        and result.result_image is not None
+        and result.result_thumbnail is None
+    ):
+        images.append((result.id, RESULT, result.result_image))
+    return images
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="stop after this many results (default: all)",
+    )
+    args = parser.parse_args(argv)
+
+    image_derivatives.start()
+    done = failed = seen = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        with ThreadPoolExecutor(max_workers=image_derivatives.workers * 2) as threads:
+            while args.limit is None or seen < args.limit:
+                batch_size = BATCH_SIZE if args.limit is None else min(BATCH_SIZE, args.limit - seen)
+                results = ResultService.get_results_missing_derivatives(db, last_id, batch_size)
+                if not results:
+                    break
+                last_id = results[-1].id
+                seen += len(results)
+                images = [image for result in results for image in _pending_images(result)]
+                db.rollback()
+                outcomes = threads.map(lambda image: image_derivatives.generate(*image), images)
+                for saved in outcomes:
+                    done += saved
+                    failed += not saved
+    finally:
+        db.close()
+        image_derivatives.shutdown()
+
+    print(f"Made derivatives of {done} images ({failed} failed) across {seen} results")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
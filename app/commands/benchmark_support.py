@@ -0,0 +1,283 @@
+"""
+Helpers shared by the load benchmarks in ``app.commands``.
+
+``api_server`` runs the API under uvicorn in a child process, by default on a
+throwaway SQLite database and local storage so a benchmark needs no setup.
+``run_load`` sends requests from a pool of threads, each on its own keep-alive
+connection, and collects latencies. Only the standard library is used, so the
+benchmarks can point ``--app-dir`` at an older checkout to compare before/after.
+"""
+import http.client
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_environment(work_dir: str, database_url: str | None = None) -> dict[str, str]:
+    """
+    Environment for a benchmark server: everything the benchmark does not measure is off.
+
+    Detection dispatch and derivatives are disabled, uploads go to local storage
+    under ``work_dir``, and tokens are signed with a random key unless
+    AUTH_SECRET_KEY is already set.
+    """
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=database_url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}",
+        DETECTION_API_URL=env.get("DETECTION_API_URL", "http://127.0.0.1:9/unused"),
+        DETECTION_DISPATCH_IN_PROCESS="false",
+        IMAGE_DERIVATIVES_ENABLED="false",
+        STORAGE_BACKEND="local",
+        LOCAL_STORAGE_PATH=os.path.join(work_dir, "storage"),
+        FAST_STARTUP="false",
+        # Logging every statement of each slow request would dominate a load test
+        SLOW_REQUEST_THRESHOLD_MS=env.get("SLOW_REQUEST_THRESHOLD_MS", "60000"),
+    )
+    if not env.get("AUTH_SECRET_KEY"):
+        env["AUTH_ALLOW_EPHEMERAL_SECRET"] = "true"
+    return env
+
+
+@dataclass
+class ApiServer:
+    url: str
+    process: subprocess.Popen
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+
+@contextmanager
+def api_server(
+    env: dict[str, str],
+    app_dir: str | None = None,
+    ready_path: str = "/swagger",
+    timeout: float = 60.0,
+) -> Iterator[ApiServer]:
+    """Start ``uvicorn app.main:app`` and stop it on exit; waits until ``ready_path`` answers."""
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    if app_dir:
+        command += ["--app-dir", app_dir]
+    server = ApiServer(f"http://127.0.0.1:{port}", subprocess.Popen(command, env=env, cwd=app_dir))
+    try:
+        started = time.perf_counter()
+        while True:
+            if server.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.process.returncode}")
+            try:
+                status, _ = request(server.url, "GET", ready_path)
+                if status < 500:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"the API did not answer {ready_path} within {timeout}s")
+            time.sleep(0.05)
+        yield server
+    finally:
+        server.process.terminate()
+        server.process.wait()
+
+
+_connections = threading.local()
+
+
+def request(
+    base_url: str,
+    method: str,
+    path: str,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+    timeout: float = 60.0,
+) -> tuple[int, bytes]:
+    """Send one request on this thread's keep-alive connection; returns status and body."""
+    netloc = urlsplit(base_url).netloc
+    connection = getattr(_connections, netloc, None)
+    if connection is None:
+        connection = http.client.HTTPConnection(netloc, timeout=timeout)
+        setattr(_connections, netloc, connection)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    except (OSError, http.client.HTTPException):
+        connection.close()
+        delattr(_connections, netloc)
+        raise
+
+
+def request_json(base_url: str, method: str, path: str, payload) -> tuple[int, dict]:
+    status, body = request(
+        base_url, method, path, json.dumps(payload).encode("utf-8"), {"Content-Type": "application/json"}
+    )
+    return status, json.loads(body) if body else {}
+
+
+def create_user(base_url: str, email: str, password: str = "benchmark-password") -> int:
+    """Register a mobile user through the API and return its id."""
+    status, body = request_json(
+        base_url,
+        "POST",
+        "/user/createUser",
+        {
+            "name": "Benchmark",
+            "email": email,
+            "password": password,
+            "phone": "31999999999",
+            "address": {
+                "cep": "30000000",
+                "street": "Rua da Bahia",
+                "number": 1,
+                "neighborhood": "Centro",
+                "city": "Belo Horizonte",
+                "lat": "-19.92",
+                "lng": "-43.94",
+            },
+        },
+    )
+    if status >= 400:
+        raise RuntimeError(f"/user/createUser answered {status}: {body}")
+    return body["id"]
+
+
+def encode_multipart(
+    fields: dict[str, str], files: list[tuple[str, str, bytes, str]]
+) -> tuple[bytes, str]:
+    """
+    Build a multipart/form-data body.
+
+    Args:
+        fields: Plain form fields
+        files: ``(field, filename, data, content_type)`` per file
+
+    Returns:
+        The body and its Content-Type header value
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    for name, filename, data, content_type in files:
+        parts.append(
+            (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode("utf-8")
+            + data
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def memory_mb(pid: int) -> dict[str, float]:
+    """Current (VmRSS) and peak (VmHWM) resident memory of a process, in MiB (Linux only)."""
+    values = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "VmHWM"):
+                values["rss" if name == "VmRSS" else "peak"] = int(value.split()[0]) / 1024
+    return values
+
+
+@dataclass
+class LoadResult:
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=dict)
+    errors: int = 0
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> str:
+        if not self.latencies:
+            return f"no successful requests ({self.errors} errors, statuses {self.statuses})"
+        return (
+            f"{len(self.latencies)} requests in {self.elapsed:.2f}s = {self.throughput:.1f}/s, "
+            f"latency p50={self.percentile(0.5) * 1000:.0f}ms p95={self.percentile(0.95) * 1000:.0f}ms "
+            f"max={max(self.latencies) * 1000:.0f}ms, mean={statistics.mean(self.latencies) * 1000:.0f}ms, "
+            f"statuses {dict(sorted(self.statuses.items()))}, errors {self.errors}"
+        )
+
+
+def run_load(
+    send: Callable[[int], int],
+    total: int | None,
+    concurrency: int,
+    stop: threading.Event | None = None,
+) -> LoadResult:
+    """
+    Call ``send(i)`` for i in range(total) from ``concurrency`` threads.
+
+    ``send`` returns the HTTP status; 2xx/3xx count as successes and are timed.
+    With ``stop`` the load ends as soon as the event is set; ``total`` None
+    keeps sending until then.
+    """
+    result = LoadResult()
+    lock = threading.Lock()
+    indexes = itertools.count()
+
+    def worker() -> None:
+        while stop is None or not stop.is_set():
+            with lock:
+                index = next(indexes)
+            if total is not None and index >= total:
+                return
+            started = time.perf_counter()
+            try:
+                status = send(index)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    result.errors += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                result.statuses[status] = result.statuses.get(status, 0) + 1
+                if status < 400:
+                    result.latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+@contextmanager
+def work_directory() -> Iterator[str]:
+    with tempfile.TemporaryDirectory(prefix="deteccao-bench-") as path:
+        yield path
@@ -0,0 +1,77 @@
+"""
+Measure /user/login throughput, and how a login burst slows other endpoints.
+
+    python -m app.commands.login_benchmark
+    python -m app.commands.login_benchmark --logins 200 --concurrency 32
+    python -m app.commands.login_benchmark --app-dir ../before   # same load on another checkout
+
+Starts the API on a throwaway SQLite database (see ``benchmark_support``),
+registers one user and sends ``--logins`` logins, ``--concurrency`` at a time.
+Meanwhile a single client keeps calling ``--probe-path``; its latency shows
+whether password hashing starves the rest of the API. The probe is measured
+alone first as a baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from app.commands.benchmark_support import (
+    api_server,
+    bench_environment,
+    create_user,
+    request,
+    run_load,
+    work_directory,
+)
+
+PASSWORD = "benchmark-password"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--probe-path", default="/campaigns/getAllCampaigns", help="endpoint timed during the burst")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite database")
+    parser.add_argument("--app-dir", help="checkout to benchmark instead of this one")
+    args = parser.parse_args(argv)
+
+    with work_directory() as work_dir:
+        with api_server(bench_environment(work_dir, args.database_url), args.app_dir) as server:
+            email = f"login-bench-{os.getpid()}@example.com"
+            create_user(server.url, email, PASSWORD)
+            body = json.dumps({"email": email, "password": PASSWORD}).encode("utf-8")
+
+            def login(index: int) -> int:
+                status, _ = request(
+                    server.url, "POST", "/user/login", body, {"Content-Type": "application/json"}
+                )
+                return status
+
+            def probe(index: int) -> int:
+                return request(server.url, "GET", args.probe_path)[0]
+
+            idle_probe = run_load(probe, 50, 1)
+
+            # The probe runs on its own thread for as long as the burst lasts
+            burst_over = threading.Event()
+            busy_probe = {}
+            probe_thread = threading.Thread(
+                target=lambda: busy_probe.update(result=run_load(probe, None, 1, burst_over))
+            )
+            probe_thread.start()
+            try:
+                logins = run_load(login, args.logins, args.concurrency)
+            finally:
+                burst_over.set()
+                probe_thread.join()
+
+    print(f"logins x {args.concurrency} concurrent: {logins.summary()}")
+    print(f"{args.probe_path} alone:        {idle_probe.summary()}")
+    print(f"{args.probe_path} during burst: {busy_probe['result'].summary()}")
+    return 1 if logins.errors or not logins.latencies else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Local stand-in for the Detection API, for development and load tests.
+
+    python -m app.commands.mock_detector --port 9000
+    python -m app.commands.mock_detector --port 9000 --latency 0.2 --per-image-latency 0.01 \\
+        --fail-rate 0.05 --callback-url http://127.0.0.1:8000
+
+Point DETECTION_API_URL at it. It accepts both the single-image payload and
+the batched ``{"images": [...]}`` payload on ``POST /process-images``.
+``GET /stats`` reports the calls and images received so far. With
+--callback-url every accepted image is reported back as finished through
+``PUT /results/updateResultImages``, as the real detector does one by one.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockDetector:
+    def __init__(self, latency: float, per_image_latency: float, fail_rate: float, callback_url: str | None):
+        self.latency = latency
+        self.per_image_latency = per_image_latency
+        self.fail_rate = fail_rate
+        self.callback_url = callback_url.rstrip("/") if callback_url else None
+        self.calls = 0
+        self.images = 0
+        self.max_batch = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "images": self.images, "maxBatch": self.max_batch}
+
+    def process(self, payload: dict) -> tuple[int, dict]:
+        images = payload["images"] if "images" in payload else [payload]
+        with self._lock:
+            self.calls += 1
+            self.images += len(images)
+            self.max_batch = max(self.max_batch, len(images))
+
+        time.sleep(self.latency + self.per_image_latency * len(images))
+        if random.random() < self.fail_rate:
+            return 503, {"error": "mock detector failure"}
+
+        if self.callback_url:
+            threading.Thread(target=self._report, args=(images,), daemon=True).start()
+        return 200, {"accepted": len(images)}
+
+    def _report(self, images: list[dict]) -> None:
+        body = [
+            {
+                "id": image["resultId"],
+                "resultImage": image["image_url"],
+                "status": "finished",
+                "object_count": random.randint(0, 5),
+            }
+            for image in images
+        ]
+        request = urllib.request.Request(
+            f"{self.callback_url}/results/updateResultImages",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="PUT",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=30).read()
+        except OSError as e:
+            print(f"callback failed: {e}", file=sys.stderr)
+
+
+def make_handler(detector: MockDetector):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, detector.stats())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            if self.path != "/process-images":
+                self.rfile.read(length)
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError:
+                self._reply(400, {"error": "invalid JSON"})
+                return
+            self._reply(*detector.process(payload))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per call")
+    parser.add_argument("--per-image-latency", type=float, default=0.0, help="extra seconds per image")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of calls answered 503")
+    parser.add_argument("--callback-url", help="API base URL to report finished results to")
+    args = parser.parse_args(argv)
+
+    detector = MockDetector(args.latency, args.per_image_latency, args.fail_rate, args.callback_url)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(detector))
+    print(f"Mock detector listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(detector.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
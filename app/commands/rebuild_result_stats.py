@@ -0,0 +1,41 @@
+"""
+Recompute the result_stats aggregates from the result table.
+
+    python -m app.commands.rebuild_result_stats           # rebuild (backfill)
+    python -m app.commands.rebuild_result_stats --check   # report drift only
+
+With --check the exit status is 1 when any stored counter differs.
+"""
+import argparse
+import sys
+from app.database import SessionLocal
+from app.services.result_stats_service import ResultStatsService
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare stored aggregates with the result table without writing",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            mismatches = ResultStatsService.find_mismatches(db)
+            for scope, scope_key, column, stored, expected in mismatches:
+                print(f"{scope.value}:{scope_key} {column}: stored={stored} expected={expected}")
+            print(f"{len(mismatches)} mismatched counters")
+            return 1 if mismatches else 0
+
+        rows = ResultStatsService.rebuild(db)
+        print(f"Rebuilt {rows} result_stats rows")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
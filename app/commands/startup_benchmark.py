@@ -0,0 +1,92 @@
+"""
+Measure cold-start cost: import time of app.main and time to first response.
+
+    python -m app.commands.startup_benchmark
+    python -m app.commands.startup_benchmark --runs 10 --path /results/stats?campaignId=1
+    python -m app.commands.startup_benchmark --max-first-request 2.5   # CI gate
+
+Each run uses a fresh interpreter, with the current environment (DATABASE_URL,
+FAST_STARTUP, ...). Time to first response is measured from launching uvicorn
+to the first successful response from ``--path``. With --max-import or
+--max-first-request the exit status is 1 when the median exceeds the limit.
+"""
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(path: str, timeout: float) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    response.read()
+                return time.perf_counter() - started
+            except urllib.error.HTTPError as e:
+                raise RuntimeError(f"{path} answered {e.code}") from None
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/campaigns/getAllCampaigns", help="endpoint for the first request")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each server")
+    parser.add_argument("--max-import", type=float, help="fail when median import time exceeds this (s)")
+    parser.add_argument("--max-first-request", type=float, help="fail when median time to first response exceeds this (s)")
+    args = parser.parse_args(argv)
+
+    import_times = [measure_import() for _ in range(args.runs)]
+    first_request_times = [measure_first_request(args.path, args.timeout) for _ in range(args.runs)]
+
+    failed = False
+    for label, samples, limit in (
+        ("import app.main", import_times, args.max_import),
+        ("time to first response", first_request_times, args.max_first_request),
+    ):
+        median = statistics.median(samples)
+        print(f"{label}: median={median:.3f}s min={min(samples):.3f}s max={max(samples):.3f}s")
+        if limit is not None and median > limit:
+            print(f"  exceeds limit of {limit:.3f}s")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Compare upload latency with a storage client per request and a shared, pooled one.
+
+    python -m app.commands.storage_benchmark
+    python -m app.commands.storage_benchmark --uploads 400 --concurrency 16 --handshake-latency 0.05
+
+Runs ``GCPStorageService.upload_image`` against a local fake of the Cloud
+Storage JSON API, so no bucket or credentials are needed. ``per-request``
+builds a new service for every upload (credentials, HTTP session and the
+bucket existence check), as the upload route used to; ``pooled`` shares one
+service, as ``get_storage_service`` does. The fake server adds
+``--latency`` to every request and ``--handshake-latency`` to every new
+connection, standing in for the network round trip and the TLS handshake.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.commands.benchmark_support import LoadResult, run_load
+
+BUCKET = "benchmark"
+
+
+class FakeStorage:
+    def __init__(self, latency: float, handshake_latency: float):
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def counts(self) -> tuple[int, int]:
+        with self._lock:
+            return self.connections, self.requests
+
+    def make_handler(self):
+        storage = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with storage._lock:
+                    storage.connections += 1
+                time.sleep(storage.handshake_latency)
+
+            def _reply(self, status: int, body: dict) -> None:
+                with storage._lock:
+                    storage.requests += 1
+                time.sleep(storage.latency)
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == f"/storage/v1/b/{BUCKET}":
+                    self._reply(200, {"name": BUCKET})
+                else:
+                    self._reply(404, {"error": {"code": 404, "message": "Not Found"}})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._reply(200, {"bucket": BUCKET, "name": "uploaded", "generation": "1"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _prepare_environment(endpoint: str) -> None:
+    # Settings are read on import; the API's required ones get harmless values
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ.setdefault("DETECTION_API_URL", "http://127.0.0.1:9/unused")
+    os.environ["STORAGE_EMULATOR_HOST"] = endpoint
+    os.environ["GCP_STORAGE_BUCKET_NAME"] = BUCKET
+    os.environ.pop("GCP_CREDENTIALS_PATH", None)
+
+    import google.auth
+    from google.auth.credentials import AnonymousCredentials
+
+    # The fake server does not check tokens; skip the credential lookup entirely
+    google.auth.default = lambda *args, **kwargs: (AnonymousCredentials(), "benchmark")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-kb", type=int, default=256, help="size of each uploaded image")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added to every request")
+    parser.add_argument("--handshake-latency", type=float, default=0.03, help="seconds added to every new connection")
+    args = parser.parse_args(argv)
+
+    fake = FakeStorage(args.latency, args.handshake_latency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.make_handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _prepare_environment(f"http://127.0.0.1:{server.server_address[1]}")
+
+    from app.services.gcp_storage_service import GCPStorageService
+
+    def per_request(index: int) -> int:
+        try:
+            service = GCPStorageService()
+            try:
+                service.upload_image(os.urandom(args.size_kb * 1024))
+            finally:
+                service.close()
+        except Exception as e:
+            print(f"upload failed: {e}", file=sys.stderr)
+            return 500
+        return 200
+
+    shared = GCPStorageService()
+
+    def pooled(index: int) -> int:
+        try:
+            shared.upload_image(os.urandom(args.size_kb * 1024))
+        except Exception as e:
+            print(f"upload failed: {e}", file=sys.stderr)
+            return 500
+        return 200
+
+    results: dict[str, LoadResult] = {}
+    try:
+        for label, send in (("per-request", per_request), ("pooled", pooled)):
+            connections, requests = fake.counts()
+            results[label] = run_load(send, args.uploads, args.concurrency)
+            opened, sent = (now - then for now, then in zip(fake.counts(), (connections, requests)))
+            print(f"{label}: {results[label].summary()}")
+            print(f"  {opened} connections opened, {sent / args.uploads:.1f} storage requests per upload")
+    finally:
+        shared.close()
+        server.shutdown()
+
+    before, after = results["per-request"], results["pooled"]
+    if before.latencies and after.latencies:
+        print(
+            f"pooled vs per-request: p50 {before.percentile(0.5) * 1000:.0f}ms -> "
+            f"{after.percentile(0.5) * 1000:.0f}ms, throughput x{after.throughput / before.throughput:.1f}"
+        )
+    return 0 if len(before.latencies) == len(after.latencies) == args.uploads else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
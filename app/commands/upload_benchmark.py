@@ -0,0 +1,75 @@
+"""
+Measure API memory and throughput under concurrent image uploads.
+
+    python -m app.commands.upload_benchmark
+    python -m app.commands.upload_benchmark --size-mb 12 --concurrency 32 --uploads 128
+    python -m app.commands.upload_benchmark --max-peak-growth-mb 150   # CI gate
+
+Starts the API on a throwaway SQLite database with local storage (see
+``benchmark_support``) and posts ``--uploads`` distinct images of ``--size-mb``
+to ``/results/uploadImage``, ``--concurrency`` at a time. Reports upload
+throughput and the server's resident memory before the load and at its peak
+(VmHWM, Linux only). Uploads are streamed to storage in UPLOAD_CHUNK_SIZE
+chunks, so the peak should barely move with ``--size-mb``; with
+--max-peak-growth-mb the exit status is 1 when it grows by more than that.
+"""
+import argparse
+import os
+import sys
+from app.commands.benchmark_support import (
+    api_server,
+    bench_environment,
+    create_user,
+    encode_multipart,
+    memory_mb,
+    request,
+    run_load,
+    work_directory,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10.0, help="size of each uploaded image")
+    parser.add_argument("--uploads", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite database")
+    parser.add_argument("--app-dir", help="checkout to benchmark instead of this one")
+    parser.add_argument("--max-peak-growth-mb", type=float, help="fail when peak RSS grows by more than this")
+    args = parser.parse_args(argv)
+
+    size = int(args.size_mb * 1024 * 1024)
+    # Random prefix per upload, so deduplication by content hash never skips one
+    filler = os.urandom(size)
+
+    with work_directory() as work_dir:
+        with api_server(bench_environment(work_dir, args.database_url), args.app_dir) as server:
+            user_id = create_user(server.url, f"upload-bench-{os.getpid()}@example.com")
+            before = memory_mb(server.pid)
+
+            def upload(index: int) -> int:
+                body, content_type = encode_multipart(
+                    {"userId": str(user_id), "type": "terreno"},
+                    [("file", f"photo-{index}.jpg", os.urandom(16) + filler[16:], "image/jpeg")],
+                )
+                status, _ = request(server.url, "POST", "/results/uploadImage", body, {"Content-Type": content_type})
+                return status
+
+            result = run_load(upload, args.uploads, args.concurrency)
+            after = memory_mb(server.pid)
+
+    growth = after["peak"] - before["rss"]
+    print(f"uploads of {args.size_mb:g} MiB x {args.concurrency} concurrent: {result.summary()}")
+    print(f"  throughput {result.throughput * args.size_mb:.1f} MiB/s")
+    print(
+        f"  server RSS before={before['rss']:.0f} MiB peak={after['peak']:.0f} MiB "
+        f"(+{growth:.0f} MiB, {growth / args.concurrency:.1f} MiB per concurrent upload)"
+    )
+    if args.max_peak_growth_mb is not None and growth > args.max_peak_growth_mb:
+        print(f"  exceeds limit of {args.max_peak_growth_mb:.0f} MiB")
+        return 1
+    return 1 if result.errors or not result.latencies else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
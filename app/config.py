@@ -2,13 +2,117 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Skip create_all and eager client setup at startup; the schema is managed by
+    # `alembic upgrade head` and storage is connected on first upload
+    FAST_STARTUP: bool = False
+    # Serve requests through an async engine (asyncpg / aiosqlite) instead of the threadpool
+    DATABASE_ASYNC: bool = False
+    # Connection pool per process (PostgreSQL). Keep (pool size + overflow) x instances
+    # below the server's max_connections when Cloud Run scales out
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int | None = None
     GCP_STORAGE_BUCKET_NAME: str = "images"
     GCP_PROJECT_ID: str | None = None
     GCP_CREDENTIALS_PATH: str | None = None
+    # Max keep-alive connections kept open to Cloud Storage by the shared client
+    GCP_HTTP_POOL_SIZE: int = 32
     DETECTION_API_URL: str
+    # Background detection dispatch: concurrent detector calls and retry policy
+    DETECTION_WORKERS: int = 4
+    DETECTION_MAX_ATTEMPTS: int = 5
+    DETECTION_RETRY_BACKOFF_SECONDS: float = 2.0
+    # Jobs not completed within the lease are handed to another worker
+    DETECTION_LEASE_SECONDS: int = 120
+    DETECTION_POLL_INTERVAL_SECONDS: float = 2.0
+    # Disable to leave detection to dedicated `python -m app.workers.detection_worker` processes
+    DETECTION_DISPATCH_IN_PROCESS: bool = True
+    # Images per detector call (1 = one image per call) and max wait for a batch to fill
+    DETECTION_BATCH_SIZE: int = 1
+    DETECTION_BATCH_LINGER_SECONDS: float = 0.05
+    DETECTION_TIMEOUT_SECONDS: float = 30.0
+    # Circuit breaker: consecutive failures before failing fast, and seconds before a probe
+    DETECTION_BREAKER_FAILURES: int = 5
+    DETECTION_BREAKER_RESET_SECONDS: float = 30.0
+    # Calls slower than this shrink the adaptive concurrency window (max DETECTION_WORKERS)
+    DETECTION_LATENCY_TARGET_SECONDS: float = 5.0
+
+    # Idempotency-Key: how long a response is replayed, how long a running request
+    # blocks retries before it counts as abandoned, LRU size, and largest body stored
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_SECONDS: int = 120
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = 10000
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1024 * 1024
+
+    # Requests slower than this log every SQL statement they ran
+    SLOW_REQUEST_THRESHOLD_MS: int = 1000
+
+    # Storage backend: "gcp" (Google Cloud Storage) or "local" (filesystem, dev/tests)
+    STORAGE_BACKEND: str = "gcp"
+    LOCAL_STORAGE_PATH: str = "./storage"
+    LOCAL_STORAGE_BASE_URL: str | None = None
+    # Uploads are streamed in chunks of this size; GCS requires a multiple of 256 KiB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Batch uploads: max files per request and concurrent storage uploads per request
+    BATCH_UPLOAD_MAX_FILES: int = 50
+    BATCH_UPLOAD_CONCURRENCY: int = 8
+    # Optional upload normalization: fix EXIF rotation, fit within UPLOAD_MAX_DIMENSION
+    # and re-encode as JPEG before storing; the limits are advertised at
+    # /results/uploadConstraints so clients can downscale first
+    UPLOAD_NORMALIZE_ENABLED: bool = False
+    UPLOAD_NORMALIZE_WORKERS: int = 2
+    UPLOAD_NORMALIZE_MAX_PENDING: int = 32
+    UPLOAD_MAX_DIMENSION: int = 1920
+    UPLOAD_JPEG_QUALITY: int = 85
+    # Thumbnails and previews made after each upload and detection result, on
+    # worker processes; queued work beyond the limit is left for backfill_derivatives
+    IMAGE_DERIVATIVES_ENABLED: bool = True
+    IMAGE_DERIVATIVE_WORKERS: int = 2
+    IMAGE_DERIVATIVE_MAX_PENDING: int = 200
+    # Square thumbnail side and longest preview side in pixels; format is "webp" or "jpeg"
+    THUMBNAIL_SIZE: int = 256
+    PREVIEW_MAX_SIZE: int = 1280
+    DERIVATIVE_FORMAT: str = "webp"
+    DERIVATIVE_QUALITY: int = 75
+    # Hosts (comma-separated, "host" or "host:port") whose images may be downloaded to
+    # make derivatives, besides the configured storage; empty means DETECTION_API_URL's
+    DERIVATIVE_SOURCE_HOSTS: str = ""
+    # Max detector callbacks accepted by one updateResultImages request
+    BATCH_RESULT_UPDATE_MAX_ITEMS: int = 1000
+
+    # Map tiles: clusters per tile side, and in-process cache size/lifetime
+    TILE_GRID_SIZE: int = 16
+    TILE_CACHE_MAX_ENTRIES: int = 4096
+    TILE_CACHE_TTL_SECONDS: int = 60
+
+    # Read-through cache for campaigns: "memory" (per process) or "redis" (shared,
+    # needs the redis package); lookups fall back to the database when it fails
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str | None = None
+    CACHE_TIMEOUT_SECONDS: float = 0.5
+    CACHE_MAX_ENTRIES: int = 10000
+    CAMPAIGN_CACHE_TTL_SECONDS: int = 300
+
+    # Password hashing: bcrypt cost, worker processes, and max queued calls before 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Session tokens: signing secret, retired secrets still accepted during rotation
+    # (comma-separated), and token lifetimes. The API refuses to start without
+    # AUTH_SECRET_KEY unless AUTH_ALLOW_EPHEMERAL_SECRET is set (single-process
+    # dev/tests only: tokens are signed with a random key per process)
+    AUTH_SECRET_KEY: str | None = None
+    AUTH_ALLOW_EPHEMERAL_SECRET: bool = False
+    AUTH_PREVIOUS_SECRET_KEYS: str = ""
+    ACCESS_TOKEN_TTL_SECONDS: int = 15 * 60
+    REFRESH_TOKEN_TTL_SECONDS: int = 30 * 24 * 60 * 60
 
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignore extra environment variables
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,23 +1,164 @@
-from sqlalchemy import create_engine
+import time
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app import metrics
 from app.config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
+_checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+_checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS", ["engine"]
+)
+_checked_out = metrics.gauge("db_pool_checked_out", "Connections currently checked out", ["engine"])
+_overflow = metrics.gauge(
+    "db_pool_overflow", "Connections open beyond DB_POOL_SIZE (negative while the pool fills)", ["engine"]
+)
+_connection_age = metrics.histogram(
+    "db_pool_connection_age_seconds",
+    "Age of connections when they are checked out",
+    ["engine"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200),
+)
+_connections_opened = metrics.counter(
+    "db_pool_connections_opened_total", "New database connections opened", ["engine"]
+)
+
+
+class _TimedPoolMixin:
+    """Records how long each checkout waits for a free connection."""
+
+    metrics_label = ""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _checkout_timeouts.inc(engine=self.metrics_label)
+            raise
+        finally:
+            _checkout_wait.observe(time.perf_counter() - started, engine=self.metrics_label)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _instrument_pool(sync_engine, label: str) -> None:
+    # engine.pool is looked up at scrape time because dispose() replaces it
+    _checked_out.set_function(lambda: sync_engine.pool.checkedout(), engine=label)
+    _overflow.set_function(lambda: sync_engine.pool.overflow(), engine=label)
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["opened_at"] = time.monotonic()
+        _connections_opened.inc(engine=label)
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        opened_at = connection_record.info.get("opened_at")
+        if opened_at is not None:
+            _connection_age.observe(time.monotonic() - opened_at, engine=label)
+
+
+def _pool_options(poolclass) -> dict:
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL, connect_args={"check_same_thread": False}
     )
 else:
-    engine = create_engine(DATABASE_URL)
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    engine = create_engine(DATABASE_URL, connect_args=connect_args, **_pool_options(TimedQueuePool))
+    _instrument_pool(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# Async drivers used for the request path when DATABASE_ASYNC is enabled
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str):
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC:
+    if DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(_async_url(DATABASE_URL))
+    else:
+        connect_args = {}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+            }
+        async_engine = create_async_engine(
+            _async_url(DATABASE_URL),
+            connect_args=connect_args,
+            **_pool_options(TimedAsyncQueuePool),
+        )
+        _instrument_pool(async_engine.sync_engine, "async")
+    # Attributes must stay loaded after commit: touching an expired one outside
+    # run_sync would need I/O the event loop cannot do implicitly
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Run a synchronous service call on ``db`` from an async route without blocking the event loop.
+
+    ``fn`` receives a sync Session as its first argument. With DATABASE_ASYNC the
+    request session is an AsyncSession and ``fn`` runs through ``run_sync``, so its
+    queries go through the async driver on the event loop; otherwise it runs on
+    the threadpool with the regular Session.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,327 @@
+"""
+``Idempotency-Key`` support for every mutating endpoint.
+
+Clients on flaky networks retry POST/PUT/PATCH/DELETE requests whose response
+they never saw. When such a request carries an ``Idempotency-Key`` header, the
+first response for that key, caller, method and path is stored in the
+``idempotency_key`` table for IDEMPOTENCY_TTL_SECONDS and replayed to every
+retry (marked ``Idempotent-Replayed: true``), without running the endpoint
+again: no second upload, result row or detection job. An in-process LRU of
+recent responses answers most retries without touching the database.
+
+The caller is the subject of a valid bearer token, so one user never gets
+another's stored response for the same key. A SHA-256 of the request body is
+stored with the response; reusing a key with a different body gets 422. The
+multipart boundary is left out of the hash, since clients may pick a new one
+for each attempt.
+
+A retry that arrives while the first request is still running gets 409. A
+request that fails with a 5xx or an exception is not stored, so retrying it
+runs it again.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from app import metrics
+from app.auth import USER_AUDIENCE, USER_PORTAL_AUDIENCE
+from app.config import settings
+from app.database import SessionLocal
+from app.services.idempotency_service import IdempotencyService
+from app.services.token_service import TokenService, InvalidTokenError
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+MAX_KEY_LENGTH = 255
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+# Responses carrying credentials are never stored
+EXCLUDED_PATHS = frozenset({"/user/login", "/user/refresh", "/userPortal/login", "/userPortal/refresh"})
+PURGE_INTERVAL_SECONDS = 600
+
+_requests = metrics.counter(
+    "idempotency_requests_total",
+    "Requests with an Idempotency-Key by outcome "
+    "(executed, replayed_memory, replayed_database, conflict, mismatch, not_stored)",
+    ["outcome"],
+)
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    # None when the first request's body was not fully read, so it cannot be compared
+    request_hash: str | None
+    expires_at: datetime
+
+
+CacheKey = tuple[str, str, str, str]
+
+
+def _caller(scope) -> str:
+    """Identify who sent the request, so stored responses are never shared between callers."""
+    authorization = dict(scope["headers"]).get(b"authorization")
+    if authorization:
+        scheme, _, token = authorization.decode("latin-1").partition(" ")
+        if scheme.lower() == "bearer":
+            for audience in (USER_AUDIENCE, USER_PORTAL_AUDIENCE):
+                try:
+                    identity = TokenService.decode(token.strip(), audience)
+                except InvalidTokenError:
+                    continue
+                # Stable across token refreshes, so a retry with a new token still replays
+                return f"{audience}:{identity.subject_id}"
+        return "authorization:" + hashlib.sha256(authorization).hexdigest()
+    client = scope.get("client")
+    return f"client:{client[0] if client else ''}"
+
+
+def _multipart_boundary(scope) -> bytes | None:
+    content_type = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1")
+    media_type, _, params = content_type.partition(";")
+    if media_type.strip().lower() != "multipart/form-data":
+        return None
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+class RequestBodyHasher:
+    """SHA-256 of a streamed request body, with the multipart boundary removed."""
+
+    def __init__(self, boundary: bytes | None):
+        self._hash = hashlib.sha256()
+        self._boundary = boundary
+        # Bytes held back because a boundary may continue in the next chunk
+        self._tail = b""
+        self.complete = False
+
+    def update(self, message) -> None:
+        if message["type"] != "http.request":
+            return
+        chunk = message.get("body", b"")
+        if self._boundary:
+            data = (self._tail + chunk).replace(self._boundary, b"")
+            keep = len(self._boundary) - 1
+            self._tail = data[-keep:] if keep else b""
+            chunk = data[: len(data) - len(self._tail)]
+        self._hash.update(chunk)
+        if not message.get("more_body", False):
+            self.complete = True
+
+    def hexdigest(self) -> str | None:
+        if not self.complete:
+            return None
+        digest = self._hash.copy()
+        digest.update(self._tail)
+        return digest.hexdigest()
+
+
+async def _hash_request_body(scope, receive) -> str | None:
+    """Read and hash the rest of a request body that the endpoint will not see."""
+    hasher = RequestBodyHasher(_multipart_boundary(scope))
+    while not hasher.complete:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        hasher.update(message)
+    return hasher.hexdigest()
+
+
+class StoredResponseCache:
+    """LRU of completed responses; only touched from the event loop, so no lock."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, StoredResponse] = OrderedDict()
+
+    def get(self, cache_key: CacheKey) -> StoredResponse | None:
+        stored = self._entries.get(cache_key)
+        if stored is None:
+            return None
+        if stored.expires_at <= datetime.utcnow():
+            del self._entries[cache_key]
+            return None
+        self._entries.move_to_end(cache_key)
+        return stored
+
+    def put(self, cache_key: CacheKey, stored: StoredResponse) -> None:
+        self._entries[cache_key] = stored
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._cache = StoredResponseCache(settings.IDEMPOTENCY_CACHE_MAX_ENTRIES)
+        self._next_purge = 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        key = dict(scope["headers"]).get(HEADER)
+        if key is None or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must have 1 to {MAX_KEY_LENGTH} characters"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        cache_key = (key, _caller(scope), scope["method"], scope["path"])
+        stored = self._cache.get(cache_key)
+        if stored is not None:
+            await self._replay(stored, "replayed_memory", scope, receive, send)
+            return
+
+        claimed, entry = await run_in_threadpool(self._claim, cache_key)
+        if not claimed:
+            if entry is not None and entry.response_status is not None:
+                stored = StoredResponse(
+                    status=entry.response_status,
+                    headers=[tuple(header) for header in json.loads(entry.response_headers)],
+                    body=entry.response_body,
+                    request_hash=entry.request_hash,
+                    expires_at=entry.expires_at,
+                )
+                self._cache.put(cache_key, stored)
+                await self._replay(stored, "replayed_database", scope, receive, send)
+                return
+            _requests.inc(outcome="conflict")
+            response = JSONResponse(
+                {"detail": "Uma requisicao com esta Idempotency-Key ainda esta em andamento"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = None
+        headers: list[tuple[str, str]] = []
+        body = bytearray()
+        complete = False
+        request_body = RequestBodyHasher(_multipart_boundary(scope))
+
+        async def hashing_receive():
+            message = await receive()
+            request_body.update(message)
+            return message
+
+        async def capture(message):
+            nonlocal status_code, complete
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers.extend(
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                )
+            elif message["type"] == "http.response.body":
+                if len(body) <= settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    body.extend(message.get("body", b""))
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, hashing_receive, capture)
+        except BaseException:
+            await run_in_threadpool(self._release, cache_key)
+            raise
+
+        if (
+            complete
+            and status_code is not None
+            and status_code < 500
+            and len(body) <= settings.IDEMPOTENCY_MAX_BODY_BYTES
+        ):
+            stored = StoredResponse(
+                status=status_code,
+                headers=headers,
+                body=bytes(body),
+                request_hash=request_body.hexdigest(),
+                expires_at=datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            )
+            await run_in_threadpool(self._complete, cache_key, stored)
+            self._cache.put(cache_key, stored)
+            _requests.inc(outcome="executed")
+        else:
+            await run_in_threadpool(self._release, cache_key)
+            _requests.inc(outcome="not_stored")
+
+    @staticmethod
+    async def _replay(stored: StoredResponse, outcome: str, scope, receive, send) -> None:
+        if stored.request_hash is not None:
+            if await _hash_request_body(scope, receive) != stored.request_hash:
+                _requests.inc(outcome="mismatch")
+                response = JSONResponse(
+                    {"detail": "Esta Idempotency-Key ja foi usada com um corpo de requisicao diferente"},
+                    status_code=422,
+                )
+                await response(scope, receive, send)
+                return
+        _requests.inc(outcome=outcome)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers
+                ]
+                + [REPLAYED_HEADER],
+            }
+        )
+        await send({"type": "http.response.body", "body": stored.body})
+
+    def _claim(self, cache_key: CacheKey):
+        db = SessionLocal()
+        try:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                removed = IdempotencyService.purge_expired(db)
+                if removed:
+                    logger.info("Purged %d expired idempotency keys", removed)
+            return IdempotencyService.claim(db, *cache_key, settings.IDEMPOTENCY_LOCK_SECONDS)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _complete(cache_key: CacheKey, stored: StoredResponse) -> None:
+        db = SessionLocal()
+        try:
+            IdempotencyService.complete(
+                db,
+                *cache_key,
+                stored.status,
+                json.dumps(stored.headers),
+                stored.body,
+                stored.request_hash,
+                settings.IDEMPOTENCY_TTL_SECONDS,
+            )
+        finally:
+            db.close()
+
+    @staticmethod
+    def _release(cache_key: CacheKey) -> None:
+        db = SessionLocal()
+        try:
+            IdempotencyService.release(db, *cache_key)
+        finally:
+            db.close()
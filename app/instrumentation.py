@@ -0,0 +1,152 @@
+"""
+Per-request latency and SQL instrumentation.
+
+``RequestMetricsMiddleware`` times every request and labels it with the route
+template, so ``/results/getResult/{result_id}`` is one series. SQLAlchemy
+engine events attribute each statement to the current request via a context
+variable. This works for threadpool and ``run_sync`` calls, because both carry
+the request's context. Requests slower than SLOW_REQUEST_THRESHOLD_MS log their
+statement list, which makes N+1 query patterns visible.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statements kept per request for the slow-request log
+MAX_RECORDED_STATEMENTS = 200
+
+_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route", "status"]
+)
+_request_queries = metrics.histogram(
+    "http_request_db_queries",
+    "SQL statements issued per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+_request_db_seconds = metrics.histogram(
+    "http_request_db_seconds", "Total time spent in SQL statements per request", ["method", "route"]
+)
+_query_seconds = metrics.histogram("db_query_duration_seconds", "SQL statement execution time")
+_external_seconds = metrics.histogram(
+    "external_call_duration_seconds",
+    "Time spent calling external services",
+    ["service", "operation", "outcome"],
+)
+
+
+@dataclass
+class RequestStats:
+    query_count: int = 0
+    db_seconds: float = 0.0
+    external_seconds: float = 0.0
+    statements: list[tuple[float, str]] = field(default_factory=list)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+    _query_seconds.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.db_seconds += elapsed
+        if len(stats.statements) < MAX_RECORDED_STATEMENTS:
+            stats.statements.append((elapsed, statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+@contextmanager
+def timed_external_call(service: str, operation: str):
+    """Time a call to an external service, attributing it to the current request if any."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        _external_seconds.observe(elapsed, service=service, operation=operation, outcome=outcome)
+        stats = _current.get()
+        if stats is not None:
+            stats.external_seconds += elapsed
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            self._record(scope, status_code, elapsed, stats)
+
+    @staticmethod
+    def _record(scope, status_code: int, elapsed: float, stats: RequestStats) -> None:
+        route = scope.get("route")
+        # Unmatched paths share one label so scanners cannot blow up the series count
+        route_label = getattr(route, "path", "unmatched")
+        method = scope["method"]
+        _request_seconds.observe(elapsed, method=method, route=route_label, status=str(status_code))
+        _request_queries.observe(stats.query_count, method=method, route=route_label)
+        _request_db_seconds.observe(stats.db_seconds, method=method, route=route_label)
+
+        if elapsed * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            statements = "\n".join(
+                f"  {seconds * 1000:8.1f} ms  {' '.join(statement.split())}"
+                for seconds, statement in stats.statements
+            )
+            logger.warning(
+                "Slow request %s %s: %.0f ms, status %s, %d queries (%.0f ms in DB), "
+                "%.0f ms in external calls\n%s",
+                method,
+                scope["path"],
+                elapsed * 1000,
+                status_code,
+                stats.query_count,
+                stats.db_seconds * 1000,
+                stats.external_seconds * 1000,
+                statements,
+            )
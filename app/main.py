@@ -1,18 +1,57 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI        
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
 from app.routers import routers   
-from app.database import Base, engine
+from app.database import Base, engine, async_engine
+from app.services.storage_service import init_storage_service, close_storage_service
+from app.services.detection_dispatcher import detection_dispatcher
+from app.services.password_service import password_hasher
+from app.services.image_derivative_service import image_derivatives
+from app.services.image_normalize_service import image_normalizer
+from app.services.token_service import TokenService
+from app.instrumentation import RequestMetricsMiddleware
+from app.idempotency import IdempotencyMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-Base.metadata.create_all(bind=engine) 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    TokenService.check_configuration()
+    if not settings.FAST_STARTUP:
+        await run_in_threadpool(Base.metadata.create_all, bind=engine)
+        # Share one storage client (credentials, HTTP pool, bucket handle) across requests
+        init_storage_service()
+    password_hasher.start()
+    if settings.IMAGE_DERIVATIVES_ENABLED:
+        image_derivatives.start()
+    if settings.UPLOAD_NORMALIZE_ENABLED:
+        image_normalizer.start()
+    if settings.DETECTION_DISPATCH_IN_PROCESS:
+        detection_dispatcher.start()
+    yield
+    if settings.DETECTION_DISPATCH_IN_PROCESS:
+        await run_in_threadpool(detection_dispatcher.stop)
+    await run_in_threadpool(image_normalizer.shutdown)
+    await run_in_threadpool(image_derivatives.shutdown)
+    await run_in_threadpool(password_hasher.shutdown)
+    close_storage_service()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 app = FastAPI(
     title="Breeding Site Detection API",      
     description="Integration API for Mosquito Breeding Sites Detection System", 
     version="1.0.0",
     docs_url="/swagger",   
-    redoc_url=None                        
+    redoc_url=None,
+    lifespan=lifespan,
 )
 
+# Inside CORS, so replayed responses get CORS headers for the retrying request
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,5 +60,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it is outermost and times the whole request, CORS included
+app.add_middleware(RequestMetricsMiddleware)
+
 for router in routers:
     app.include_router(router)
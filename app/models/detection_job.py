@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index
+from app.database import Base
+from app.models.enums.detection_job import DetectionJobStatus
+
+
+class DetectionJobModel(Base):
+    __tablename__ = "detection_job"
+    __table_args__ = (
+        Index("ix_detection_job_status_next_run_at", "status", "next_run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    result_id = Column(Integer, ForeignKey("result.id", ondelete="CASCADE"), nullable=False, unique=True)
+    image_url = Column(String, nullable=False)
+    status = Column(
+        Enum(DetectionJobStatus, name="detection_job_status"),
+        nullable=False,
+        default=DetectionJobStatus.pending,
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    next_run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_expires_at = Column(DateTime, nullable=True)
+    locked_by = Column(String(100), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,7 @@
+import enum
+
+class DetectionJobStatus(enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
@@ -0,0 +1,5 @@
+import enum
+
+class ResultStatsScope(enum.Enum):
+    campaign = "campaign"
+    city = "city"
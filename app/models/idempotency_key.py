@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Text, UniqueConstraint
+from app.database import Base
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        UniqueConstraint(
+            "key", "caller", "method", "path", name="uq_idempotency_key_key_caller_method_path"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String(255), nullable=False)
+    # Who sent the request: "<audience>:<user id>" for a valid bearer token, else a
+    # hash of the Authorization header, else "client:<address>"
+    caller = Column(String(100), nullable=False)
+    method = Column(String(10), nullable=False)
+    path = Column(String(255), nullable=False)
+    # NULL while the first request is still running
+    response_status = Column(Integer, nullable=True)
+    # SHA-256 of the request body; NULL if the endpoint did not read the whole body
+    request_hash = Column(String(64), nullable=True)
+    # JSON list of [name, value] pairs
+    response_headers = Column(Text, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # End of the in-progress lock, then of the stored response's lifetime
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Enum, Index, Float
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.enums.result import ResultType, ResultStatus
@@ -7,12 +7,24 @@ from app.models.enums.result import ResultType, ResultStatus
 
 class ResultModel(Base):
     __tablename__ = "result"
+    __table_args__ = (
+        # Keyset pagination order used by getAllResults
+        Index("ix_result_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     campaign_id = Column(Integer, ForeignKey("campaign.id", ondelete="SET NULL"), nullable=True)
     user_id = Column(Integer, ForeignKey("user_mobile.id", ondelete="SET NULL"), nullable=True, index=True)
     original_image = Column(String, nullable=False)
+    # SHA-256 of the uploaded bytes; finds re-submissions of the same photo
+    content_hash = Column(String(64), nullable=True, index=True)
     result_image = Column(String, nullable=True)
+    # Derived copies under thumbnail/ and preview/; NULL until generated, clients
+    # fall back to the full-size image
+    original_thumbnail = Column(String, nullable=True)
+    original_preview = Column(String, nullable=True)
+    result_thumbnail = Column(String, nullable=True)
+    result_preview = Column(String, nullable=True)
     type = Column(Enum(ResultType, name="result_type"), nullable=False)
     status = Column(Enum(ResultStatus, name="result_status"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -20,8 +32,21 @@ class ResultModel(Base):
     object_count = Column(Integer, nullable=True)
     feedback_like = Column(Boolean, default=None, nullable=True)
     feedback_comment = Column(String, nullable=True)
-    lat = Column(String(50), nullable=True)
-    lng = Column(String(50), nullable=True)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    # Geohash of (lat, lng); prefix ranges on this index back the map/bounding-box queries
+    geohash = Column(String(12), nullable=True, index=True)
+    # Captured at upload time from the user's address (or the campaign) for getResultByCity
+    city = Column(String(100), nullable=True)
 
     campaign = relationship("CampaignModel", back_populates="results")
     user = relationship("UserModel", back_populates="results")
+
+
+# Serves getResultByCity as a single index range scan, newest first
+Index(
+    "ix_result_city_created_at_id",
+    ResultModel.city,
+    ResultModel.created_at.desc(),
+    ResultModel.id.desc(),
+)
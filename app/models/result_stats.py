@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Enum, UniqueConstraint
+from app.database import Base
+from app.models.enums.result_stats import ResultStatsScope
+
+
+class ResultStatsModel(Base):
+    """Running totals of results per campaign or per city, kept in sync by ResultService."""
+
+    __tablename__ = "result_stats"
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_key", name="uq_result_stats_scope_key"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scope = Column(Enum(ResultStatsScope, name="result_stats_scope"), nullable=False)
+    scope_key = Column(String(255), nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    status_visualized = Column(Integer, nullable=False, default=0)
+    status_processing = Column(Integer, nullable=False, default=0)
+    status_finished = Column(Integer, nullable=False, default=0)
+    status_failed = Column(Integer, nullable=False, default=0)
+    type_terreno = Column(Integer, nullable=False, default=0)
+    type_propriedade = Column(Integer, nullable=False, default=0)
+    object_count_sum = Column(Integer, nullable=False, default=0)
+    feedback_likes = Column(Integer, nullable=False, default=0)
+    feedback_dislikes = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
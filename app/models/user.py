@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Float
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -26,6 +26,6 @@ class AddressModel(Base):
     neighborhood = Column(String(100), nullable=False)
     complement = Column(String(10), nullable=True)
     city = Column(String(100), nullable=False)
-    lat = Column(String(50), nullable=False)
-    lng = Column(String(50), nullable=False)
+    lat = Column(Float, nullable=False)
+    lng = Column(Float, nullable=False)
     user = relationship("UserModel", back_populates="address")
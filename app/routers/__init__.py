@@ -2,10 +2,12 @@ from .user import router as userRouter
 from .userPortal import router as userPortalRouter
 from .campaign import router as campaignRouter
 from .result import router as resultRouter
+from .metrics import router as metricsRouter
 
 routers = [
     userRouter,
     userPortalRouter,
     campaignRouter,
     resultRouter,
+    metricsRouter,
 ]
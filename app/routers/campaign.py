@@ -11,8 +11,7 @@ from app.schemas.campaign import (
     CampaignResultFeedback,
 )
 from app.services.campaign_service import CampaignService
-from app.models.enums.result import ResultStatus
-from app.database import get_db
+from app.database import get_db, run_db
 
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
@@ -26,6 +25,10 @@ def _map_result(result_model) -> CampaignResult:
         id=result_model.id,
         originalImage=result_model.original_image,
         resultImage=result_model.result_image,
+        originalThumbnail=result_model.original_thumbnail,
+        originalPreview=result_model.original_preview,
+        resultThumbnail=result_model.result_thumbnail,
+        resultPreview=result_model.result_preview,
         type=result_model.type,
         status=result_model.status,
         feedback=feedback,
@@ -35,14 +38,11 @@ def _map_result(result_model) -> CampaignResult:
 def _map_campaign(
     campaign_model,
     *,
-    only_user_id: int | None = None,
     include_results: bool = True,
 ) -> Campaign:
     results_model = []
     if include_results:
         results_model = campaign_model.results or []
-        if only_user_id is not None:
-            results_model = [result for result in results_model if result.user_id == only_user_id]
 
     results = [_map_result(result) for result in results_model]
     return Campaign(
@@ -74,27 +74,28 @@ def _map_campaign_basic(campaign_model) -> CampaignBasicResponse:
 # ------------------------- POST -------------------------------
 
 @router.post("/createCampaign", response_model=CampaignBasicResponse)
-def create_campaign(campaign: CampaignCreate, db: Session = Depends(get_db)):
-    created_campaign = CampaignService.create_campaign(db, campaign)
+async def create_campaign(campaign: CampaignCreate, db: Session = Depends(get_db)):
+    created_campaign = await run_db(db, CampaignService.create_campaign, campaign)
     return _map_campaign_basic(created_campaign)
 
 
 # ------------------------- GET -------------------------------
 
 @router.get("/getCampaign/{campaign_id}", response_model=Campaign)
-def get_campaign(campaign_id: int, db: Session = Depends(get_db)):
-    campaign = CampaignService.get_campaign_by_id(db, campaign_id)
+async def get_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    campaign = await run_db(db, CampaignService.get_campaign_by_id, campaign_id)
     if not campaign:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campaign not found",
         )
+    await run_db(db, CampaignService.load_results, [campaign])
     return _map_campaign(campaign)
 
 
 @router.get("/getCampaignByUser/{userId}", response_model=CampaignResponse)
-def get_campaigns_for_user(userId: int, db: Session = Depends(get_db)):
-    campaigns, _, error = CampaignService.get_campaigns_for_user(db, userId)
+async def get_campaigns_for_user(userId: int, db: Session = Depends(get_db)):
+    campaigns, _, error = await run_db(db, CampaignService.get_campaigns_for_user, userId)
     if error == "USER_NOT_FOUND":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -106,13 +107,14 @@ def get_campaigns_for_user(userId: int, db: Session = Depends(get_db)):
             detail="Endereco do User not found",
         )
 
-    campaigns_list = [_map_campaign(c, only_user_id=userId) for c in campaigns]
+    await run_db(db, CampaignService.load_results, campaigns, user_id=userId)
+    campaigns_list = [_map_campaign(c) for c in campaigns]
     return {"campaigns": campaigns_list}
 
 
 @router.get("/getCampaignByUserPortal/{userPortalId}", response_model=CampaignResponse)
-def get_campaigns_by_portal(userPortalId: int, db: Session = Depends(get_db)):
-    campaigns, _, error = CampaignService.get_campaigns_for_user_portal(db, userPortalId)
+async def get_campaigns_by_portal(userPortalId: int, db: Session = Depends(get_db)):
+    campaigns, _, error = await run_db(db, CampaignService.get_campaigns_for_user_portal, userPortalId)
     if error == "USER_PORTAL_NOT_FOUND":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -124,8 +126,8 @@ def get_campaigns_by_portal(userPortalId: int, db: Session = Depends(get_db)):
 
 
 @router.get("/getCampaignHome/{userId}", response_model=UserCampaignsResponse)
-def get_campaign_home(userId: int, db: Session = Depends(get_db)):
-    campaigns, _, error = CampaignService.get_campaigns_for_user(db, userId)
+async def get_campaign_home(userId: int, db: Session = Depends(get_db)):
+    campaigns, _, error = await run_db(db, CampaignService.get_campaigns_for_user, userId)
     if error == "USER_NOT_FOUND":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -137,32 +139,29 @@ def get_campaign_home(userId: int, db: Session = Depends(get_db)):
             detail="Endereco do User not found",
         )
 
-    visualized_value = getattr(ResultStatus.visualized, "value", ResultStatus.visualized)
+    not_displayed = await run_db(
+        db,
+        CampaignService.count_results_not_displayed,
+        [campaign.id for campaign in campaigns],
+        userId,
+    )
     campaign_items = []
     for campaign in campaigns:
-        results = campaign.results or []
-        results_not_displayed = 0
-        for result in results:
-            if result.user_id != userId:
-                continue
-            status_value = getattr(result.status, "value", result.status)
-            if status_value != visualized_value:
-                results_not_displayed += 1
-
         campaign_items.append(
             {
                 "id": campaign.id,
                 "title": campaign.title,
                 "description": campaign.description,
-                "resultsNotDisplayed": results_not_displayed,
+                "resultsNotDisplayed": not_displayed.get(campaign.id, 0),
             }
         )
 
     return {"campaigns": campaign_items}
 
 @router.get("/getAllCampaigns", response_model=CampaignResponse)
-def get_all_campaigns(db: Session = Depends(get_db)):
-    campaigns = CampaignService.get_all_campaigns(db)
+async def get_all_campaigns(db: Session = Depends(get_db)):
+    campaigns = await run_db(db, CampaignService.get_all_campaigns)
+    await run_db(db, CampaignService.load_results, campaigns)
     campaigns_list = [_map_campaign(c) for c in campaigns]
     return {"campaigns": campaigns_list}
 
@@ -170,21 +169,22 @@ def get_all_campaigns(db: Session = Depends(get_db)):
 # ------------------------- PUT -------------------------------
 
 @router.put("/updateCampaign/{campaign_id}", response_model=Campaign)
-def update_campaign(campaign_id: int, campaign_update: CampaignUpdate, db: Session = Depends(get_db)):
-    campaign = CampaignService.update_campaign(db, campaign_id, campaign_update)
+async def update_campaign(campaign_id: int, campaign_update: CampaignUpdate, db: Session = Depends(get_db)):
+    campaign = await run_db(db, CampaignService.update_campaign, campaign_id, campaign_update)
     if not campaign:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campaign not found",
         )
+    await run_db(db, CampaignService.load_results, [campaign])
     return _map_campaign(campaign)
 
 
 # ------------------------- DELETE -------------------------------
 
 @router.delete("/deleteCampaign/{campaign_id}")
-def delete_campaign(campaign_id: int, db: Session = Depends(get_db)):
-    deleted = CampaignService.delete_campaign(db, campaign_id)
+async def delete_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    deleted = await run_db(db, CampaignService.delete_campaign, campaign_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
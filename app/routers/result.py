@@ -1,20 +1,49 @@
+import asyncio
+from datetime import datetime
 from typing import List, Optional, Union
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.schemas.result import Result, ResultFeedback, ResultStatusUpdate, ResultFeedbackUpdate, ResultImageUpdate, ImageUploadResponse, ResultType, Coordinates, CityRequest
+from app.schemas.result import UploadConstraints, Result, ResultFeedback, ResultStatusUpdate, ResultFeedbackUpdate, ResultImageUpdate, ResultImageBatchItem, ResultImageBatchUpdateResponse, ImageUploadResponse, BatchImageUploadItem, BatchImageUploadResponse, ResultType, ResultStatus, Coordinates, CityRequest, ResultStats, ResultStatsByStatus, ResultStatsByType, ResultStatsFeedback, TileClusters
+from app.config import settings
 from app.services.result_service import (
     ResultService,
     CampaignNotFoundError,
     UserNotFoundError,
 )
-from app.services.gcp_storage_service import GCPStorageService
-from app.services.detection_api_service import DetectionAPIService
-from app.database import get_db
+from app.services.result_stats_service import ResultStatsService
+from app.services.storage_service import get_storage_service, hash_image_stream
+from app.services.geo_service import GeoService
+from app.services.tile_service import tile_service, MAX_ZOOM
+from app.services.detection_dispatcher import detection_dispatcher
+from app.services.image_derivative_service import image_derivatives, ORIGINAL, RESULT
+from app.services.image_normalize_service import (
+    image_normalizer,
+    InvalidImageError,
+    CONTENT_TYPE as NORMALIZED_CONTENT_TYPE,
+    FILE_EXTENSION as NORMALIZED_FILE_EXTENSION,
+)
+from app.database import get_db, run_db, SessionLocal
+from app.models.enums.result import ResultStatus as ModelResultStatus, ResultType as ModelResultType
+from app.models.enums.result_stats import ResultStatsScope
+import base64
 import os
 import json
 
 router = APIRouter(prefix="/results", tags=["results"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+EXPORT_BATCH_SIZE = 500
+
+IMAGE_UPDATE_ERRORS = {
+    "RESULT_NOT_FOUND": "Resultado nao encontrado",
+    "DUPLICATE_RESULT_ID": "Resultado repetido no mesmo lote",
+    "INVALID_STATUS": "Status invalido. Apenas 'finished' ou 'failed' sao permitidos para atualizacao de imagem",
+    "INVALID_STATUS_FOR_IMAGE_UPDATE": "Status invalido. Apenas 'finished' ou 'failed' sao permitidos para atualizacao de imagem",
+    "OBJECT_COUNT_REQUIRED_FOR_FINISHED": "object_count e obrigatorio quando o status e 'finished'",
+}
+
 
 def _map_result(model) -> Result:
     feedback = ResultFeedback(
@@ -22,14 +51,18 @@ def _map_result(model) -> Result:
         comment=model.feedback_comment,
     )
     coordinates = Coordinates(
-        lat=model.lat,
-        lng=model.lng,
+        lat=str(model.lat) if model.lat is not None else None,
+        lng=str(model.lng) if model.lng is not None else None,
     )
     return Result(
         id=model.id,
         campaignId=model.campaign_id,
         originalImage=model.original_image,
         resultImage=model.result_image,
+        originalThumbnail=model.original_thumbnail,
+        originalPreview=model.original_preview,
+        resultThumbnail=model.result_thumbnail,
+        resultPreview=model.result_preview,
         type=model.type,
         status=model.status,
         created_at=model.created_at,
@@ -41,15 +74,301 @@ def _map_result(model) -> Result:
     )
 
 
+def _encode_cursor(model) -> str:
+    raw = f"{model.created_at.isoformat()}|{model.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, result_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(result_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor invalido"
+        )
+
+
+def _parse_campaign_id(campaignId: Optional[Union[int, str]]) -> Optional[int]:
+    # Accept both int and str, convert empty string or "null" to None
+    if campaignId is None:
+        return None
+    if isinstance(campaignId, int):
+        return campaignId
+    if isinstance(campaignId, str):
+        campaign_id_str = campaignId.strip()
+        if not campaign_id_str or campaign_id_str.lower() == "null":
+            return None
+        try:
+            return int(campaign_id_str)
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="campaignId must be a valid integer or null"
+            )
+    # Try to convert other types to int
+    try:
+        return int(campaignId)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="campaignId must be a valid integer or null"
+        )
+
+
+def _parse_coordinate_pair(coords_data) -> tuple[Optional[float], Optional[float]]:
+    if coords_data is None:
+        return None, None
+    if not isinstance(coords_data, dict):
+        raise TypeError("coordinates must be an object")
+
+    # Strict validation: lat and lng must be strings
+    lat = coords_data.get("lat")
+    lng = coords_data.get("lng") or coords_data.get("long")  # Support both "lng" and "long"
+
+    for name, value in (("lat", lat), ("lng", lng)):
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid coordinates: '{name}' must be a string"
+            )
+        try:
+            number = float(value)
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid coordinates: '{name}' must be a numeric string"
+            )
+        try:
+            GeoService.check_coordinate(name, number)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=f"Invalid coordinates: '{name}' {e}"
+            )
+
+    return (
+        float(lat) if lat is not None else None,
+        float(lng) if lng is not None else None,
+    )
+
+
+def _load_coordinates_json(coordinates: Optional[str]):
+    # Handle missing value and string "null" explicitly
+    if not coordinates or coordinates.strip().lower() == "null":
+        return None
+    try:
+        return json.loads(coordinates)
+    except (json.JSONDecodeError, TypeError):
+        raise _invalid_coordinates_format()
+
+
+def _invalid_coordinates_format() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid coordinates format. Expected JSON object like {\"lat\": \"string\", \"lng\": \"string\"} or null"
+    )
+
+
+def _parse_coordinates(coordinates: Optional[str]) -> tuple[Optional[float], Optional[float]]:
+    """Parse the uploadImage ``coordinates`` form field: a JSON object, or null."""
+    try:
+        return _parse_coordinate_pair(_load_coordinates_json(coordinates))
+    except (AttributeError, TypeError):
+        raise _invalid_coordinates_format()
+
+
+def _parse_batch_coordinates(
+    coordinates: Optional[str], count: int
+) -> list[tuple[Optional[float], Optional[float]]]:
+    """
+    Parse the uploadImages ``coordinates`` form field: one JSON object (or null)
+    for every file, or a JSON list with one object or null per file.
+    """
+    try:
+        coords_data = _load_coordinates_json(coordinates)
+        if isinstance(coords_data, list):
+            if len(coords_data) != count:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid coordinates: the list must have one entry per file"
+                )
+            return [_parse_coordinate_pair(item) for item in coords_data]
+        return [_parse_coordinate_pair(coords_data)] * count
+    except (AttributeError, TypeError):
+        raise _invalid_coordinates_format()
+
+
+INVALID_IMAGE_MESSAGE = "Arquivo enviado nao e uma imagem valida"
+
+
+async def _store_upload(storage, file: UploadFile, content_hash: str) -> tuple[str, Optional[bytes]]:
+    """
+    Send one upload to storage, normalized first when UPLOAD_NORMALIZE_ENABLED.
+
+    Returns:
+        The image URL, and the stored bytes when normalization replaced the upload
+
+    Raises:
+        InvalidImageError: If normalization is enabled and the file is not an image
+    """
+    if settings.UPLOAD_NORMALIZE_ENABLED:
+        await file.seek(0)
+        normalized = await image_normalizer.normalize(await file.read())
+        if normalized is not None:
+            # Named after the upload's hash, the one stored on the row, so a
+            # repeated photo maps to the same blob and the same duplicate check
+            image_url = await run_in_threadpool(
+                storage.upload_image, normalized, NORMALIZED_FILE_EXTENSION, content_hash
+            )
+            return image_url, normalized
+
+    # Stream the spooled upload to storage in chunks instead of reading it into memory
+    await file.seek(0)
+    image_url = await run_in_threadpool(
+        storage.upload_image_stream, file.file, _file_extension(file.filename), content_hash
+    )
+    return image_url, None
+
+
+def _queue_upload_derivatives(uploads: list[tuple[int, str, Optional[bytes]]]) -> None:
+    """
+    Hand fresh uploads to the derivative pipeline.
+
+    Normalized uploads pass the bytes already in memory; streamed uploads pass
+    None and the worker reads the image back from storage, so queued work never
+    holds whole originals.
+    """
+    if not settings.IMAGE_DERIVATIVES_ENABLED:
+        return
+    for result_id, image_url, data in uploads:
+        image_derivatives.submit(result_id, ORIGINAL, image_url, data)
+
+
+def _queue_result_derivatives(results: list[tuple[int, str]]) -> None:
+    if not settings.IMAGE_DERIVATIVES_ENABLED:
+        return
+    for result_id, result_image in results:
+        image_derivatives.submit(result_id, RESULT, result_image)
+
+
+def _is_repeated_upload(previous) -> bool:
+    # A failed detection is worth retrying; any other earlier result is the same report again
+    return previous is not None and previous.status != ModelResultStatus.failed
+
+
+def _file_extension(filename: Optional[str]) -> str:
+    file_extension = os.path.splitext(filename or "")[1].lstrip('.').lower()
+    return file_extension or "jpg"  # Default extension
+
+
 @router.get("/getAllResults", response_model=List[Result])
-def get_all_results(db: Session = Depends(get_db)):
-    results = ResultService.get_all_results(db)
+async def get_all_results(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status_filter: Optional[ResultStatus] = Query(None, alias="status"),
+    type: Optional[ResultType] = None,
+    campaignId: Optional[int] = None,
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    List results, newest first.
+
+    With ``limit`` the results are paginated by ``(created_at, id)``: the
+    cursor for the next page is returned in the ``X-Next-Cursor`` header and
+    passed back as ``cursor``. With ``stream=true`` every matching result is
+    streamed as NDJSON (one result per line) with flat memory use. Without
+    either, the full list is returned as before.
+    """
+    model_status = ModelResultStatus(status_filter.value) if status_filter else None
+    model_type = ModelResultType(type.value) if type else None
+
+    if stream:
+        def export():
+            # The request session is closed once the route returns, so the export owns one
+            export_db = SessionLocal()
+            try:
+                for model in ResultService.iter_results(
+                    export_db, EXPORT_BATCH_SIZE, model_status, model_type, campaignId
+                ):
+                    yield _map_result(model).model_dump_json() + "\n"
+            finally:
+                export_db.close()
+
+        return StreamingResponse(export(), media_type="application/x-ndjson")
+
+    if limit is None and cursor is None:
+        results = await run_db(db, ResultService.get_all_results, model_status, model_type, campaignId)
+        return [_map_result(result) for result in results]
+
+    page_size = limit or 100
+    after = _decode_cursor(cursor) if cursor else None
+    results = await run_db(
+        db, ResultService.get_results_page, page_size, after, model_status, model_type, campaignId
+    )
+    if len(results) == page_size:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(results[-1])
     return [_map_result(result) for result in results]
 
 
+def _map_stats(scope: ResultStatsScope, key: str, model) -> ResultStats:
+    def value(column: str) -> int:
+        return getattr(model, column) if model is not None else 0
+
+    likes = value("feedback_likes")
+    dislikes = value("feedback_dislikes")
+    return ResultStats(
+        scope=scope.value,
+        key=key,
+        total=value("total"),
+        byStatus=ResultStatsByStatus(
+            visualized=value("status_visualized"),
+            processing=value("status_processing"),
+            finished=value("status_finished"),
+            failed=value("status_failed"),
+        ),
+        byType=ResultStatsByType(
+            terreno=value("type_terreno"),
+            propriedade=value("type_propriedade"),
+        ),
+        objectCount=value("object_count_sum"),
+        feedback=ResultStatsFeedback(
+            likes=likes,
+            dislikes=dislikes,
+            likeRatio=likes / (likes + dislikes) if likes + dislikes else None,
+        ),
+    )
+
+
+@router.get("/stats", response_model=ResultStats)
+async def get_result_stats(
+    campaignId: Optional[int] = None,
+    city: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Totals for one campaign or one city, read from the precomputed result_stats table."""
+    if (campaignId is None) == (city is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe exatamente um filtro: campaignId ou city"
+        )
+
+    if campaignId is not None:
+        scope, key = ResultStatsScope.campaign, str(campaignId)
+    else:
+        scope, key = ResultStatsScope.city, city
+
+    return _map_stats(scope, key, await run_db(db, ResultStatsService.get_stats, scope, key))
+
+
 @router.get("/getResult/{result_id}", response_model=Result)
-def get_result_by_id(result_id: int, db: Session = Depends(get_db)):
-    result = ResultService.get_result_by_id(db, result_id)
+async def get_result_by_id(result_id: int, db: Session = Depends(get_db)):
+    result = await run_db(db, ResultService.get_result_by_id, result_id)
     if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,8 +379,8 @@ def get_result_by_id(result_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/getResultByUser/{user_id}", response_model=List[Result])
-def get_results_by_user(user_id: int, db: Session = Depends(get_db)):
-    results = ResultService.get_results_by_user(db, user_id)
+async def get_results_by_user(user_id: int, db: Session = Depends(get_db)):
+    results = await run_db(db, ResultService.get_results_by_user, user_id)
     if not results:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -72,20 +391,91 @@ def get_results_by_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/getResultByCity", response_model=List[Result])
-def get_results_by_city(payload: CityRequest, db: Session = Depends(get_db)):
-    results = ResultService.get_results_by_city(db, payload.city)
-    if not results:
+async def get_results_by_city(
+    payload: CityRequest,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    List the results of a city, newest first.
+
+    With ``limit`` the list is paginated like getAllResults: the next page's
+    cursor is returned in the ``X-Next-Cursor`` header.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    results = await run_db(db, ResultService.get_results_by_city, payload.city, limit, after)
+    if not results and after is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Nenhum resultado encontrado para a cidade: {payload.city}"
         )
 
+    if limit is not None and len(results) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(results[-1])
+    return [_map_result(result) for result in results]
+
+
+@router.get("/getResultsInBounds", response_model=List[Result])
+async def get_results_in_bounds(
+    minLat: float = Query(..., ge=-90, le=90),
+    minLng: float = Query(..., ge=-180, le=180),
+    maxLat: float = Query(..., ge=-90, le=90),
+    maxLng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(1000, ge=1, le=5000),
+    status_filter: Optional[ResultStatus] = Query(None, alias="status"),
+    db: Session = Depends(get_db),
+):
+    """List the results inside a map viewport, newest first."""
+    if minLat > maxLat or minLng > maxLng:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Limites invalidos: minLat/minLng devem ser menores que maxLat/maxLng"
+        )
+
+    model_status = ModelResultStatus(status_filter.value) if status_filter else None
+    results = await run_db(
+        db, ResultService.get_results_in_bounds, minLat, minLng, maxLat, maxLng, limit, model_status
+    )
     return [_map_result(result) for result in results]
 
 
+@router.get("/getResultsNearby", response_model=List[Result])
+async def get_results_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(..., gt=0, le=50000, description="Raio em metros"),
+    limit: int = Query(1000, ge=1, le=5000),
+    status_filter: Optional[ResultStatus] = Query(None, alias="status"),
+    db: Session = Depends(get_db),
+):
+    """List the results within ``radius`` meters of a point, nearest first."""
+    model_status = ModelResultStatus(status_filter.value) if status_filter else None
+    nearby = await run_db(db, ResultService.get_results_near, lat, lng, radius, limit, model_status)
+    return [_map_result(result) for result, _distance in nearby]
+
+
+@router.get("/tiles/{z}/{x}/{y}", response_model=TileClusters)
+async def get_result_tile(z: int, x: int, y: int, db: Session = Depends(get_db)):
+    """
+    Clusters of finished results inside an XYZ map tile.
+
+    Each cluster carries the number of results, their summed object_count and
+    their centroid, so the map can draw one marker per cluster.
+    """
+    if not 0 <= z <= MAX_ZOOM or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Tile invalido"
+        )
+
+    return TileClusters(z=z, x=x, y=y, clusters=await run_db(db, tile_service.get_clusters, z, x, y))
+
+
 @router.put("/updateResultStatus", response_model=Result)
-def update_result_status(payload: ResultStatusUpdate, db: Session = Depends(get_db)):
-    result, error = ResultService.update_result_status(db, payload.id, payload.status)
+async def update_result_status(payload: ResultStatusUpdate, db: Session = Depends(get_db)):
+    result, error = await run_db(db, ResultService.update_result_status, payload.id, payload.status)
     if error == "RESULT_NOT_FOUND":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,9 +491,14 @@ def update_result_status(payload: ResultStatusUpdate, db: Session = Depends(get_
 
 
 @router.put("/updateResultImage", response_model=Result)
-def update_result_image(payload: ResultImageUpdate, db: Session = Depends(get_db)):
-    result, error = ResultService.update_result_image_and_status(
-        db, payload.id, payload.resultImage, payload.status, payload.object_count
+async def update_result_image(payload: ResultImageUpdate, db: Session = Depends(get_db)):
+    result, error = await run_db(
+        db,
+        ResultService.update_result_image_and_status,
+        payload.id,
+        payload.resultImage,
+        payload.status,
+        payload.object_count,
     )
     if error == "RESULT_NOT_FOUND":
         raise HTTPException(
@@ -121,13 +516,55 @@ def update_result_image(payload: ResultImageUpdate, db: Session = Depends(get_db
             detail="object_count e obrigatorio quando o status e 'finished'"
         )
 
+    if result.status == ModelResultStatus.finished:
+        _queue_result_derivatives([(result.id, result.result_image)])
     return _map_result(result)
 
 
+@router.put("/updateResultImages", response_model=ResultImageBatchUpdateResponse)
+async def update_result_images(payload: List[ResultImageUpdate], db: Session = Depends(get_db)):
+    """
+    Bulk version of updateResultImage for the detector working through a backlog.
+
+    All valid items are applied in one transaction; invalid ones are reported
+    per item in ``results`` and do not block the others.
+    """
+    if len(payload) > settings.BATCH_RESULT_UPDATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Lote muito grande: no maximo {settings.BATCH_RESULT_UPDATE_MAX_ITEMS} itens"
+        )
+
+    errors = await run_db(
+        db,
+        ResultService.update_result_images,
+        [(item.id, item.resultImage, item.status, item.object_count) for item in payload],
+    )
+    items = [
+        ResultImageBatchItem(
+            id=item.id,
+            success=error is None,
+            error=IMAGE_UPDATE_ERRORS.get(error, error),
+        )
+        for item, error in zip(payload, errors)
+    ]
+    _queue_result_derivatives([
+        (item.id, item.resultImage)
+        for item, error in zip(payload, errors)
+        if error is None and item.status == ResultStatus.finished
+    ])
+    failed_count = sum(error is not None for error in errors)
+    return ResultImageBatchUpdateResponse(
+        updated_count=len(items) - failed_count,
+        failed_count=failed_count,
+        results=items,
+    )
+
+
 @router.put("/updateResultFeedback", response_model=Result)
-def update_result_feedback(payload: ResultFeedbackUpdate, db: Session = Depends(get_db)):
-    result, error = ResultService.update_result_feedback(
-        db, payload.id, payload.like, payload.comment
+async def update_result_feedback(payload: ResultFeedbackUpdate, db: Session = Depends(get_db)):
+    result, error = await run_db(
+        db, ResultService.update_result_feedback, payload.id, payload.like, payload.comment
     )
     if error == "RESULT_NOT_FOUND":
         raise HTTPException(
@@ -139,8 +576,8 @@ def update_result_feedback(payload: ResultFeedbackUpdate, db: Session = Depends(
 
 
 @router.delete("/deleteResult/{result_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_result(result_id: int, db: Session = Depends(get_db)):
-    success, error = ResultService.delete_result(db, result_id)
+async def delete_result(result_id: int, db: Session = Depends(get_db)):
+    success, error = await run_db(db, ResultService.delete_result, result_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -150,6 +587,25 @@ def delete_result(result_id: int, db: Session = Depends(get_db)):
     return None
 
 
+@router.get("/uploadConstraints", response_model=UploadConstraints)
+async def get_upload_constraints(response: Response):
+    """
+    Image limits for clients to apply before uploading.
+
+    Downscaling to ``maxDimension`` and encoding as ``format`` on the device
+    cuts upload time and mobile data; anything larger is either resized by the
+    server (``serverNormalizes``) or stored and detected at full size.
+    """
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return UploadConstraints(
+        maxDimension=settings.UPLOAD_MAX_DIMENSION,
+        format=NORMALIZED_CONTENT_TYPE,
+        quality=settings.UPLOAD_JPEG_QUALITY,
+        maxFiles=settings.BATCH_UPLOAD_MAX_FILES,
+        serverNormalizes=settings.UPLOAD_NORMALIZE_ENABLED,
+    )
+
+
 @router.post("/uploadImage", response_model=ImageUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_images(
     file: UploadFile = File(...),
@@ -159,134 +615,121 @@ async def upload_images(
     coordinates: Optional[str] = Form(None),
     db: Session = Depends(get_db),
 ):
+    """
+    Upload one image and queue it for detection.
 
-    from app.models.enums.result import ResultType as ModelResultType
-    
-    gcp_storage = GCPStorageService()
+    Sending the same image again for the same user and campaign (e.g. a client
+    retrying after a timeout) returns the earlier result with ``duplicate`` set,
+    without storing or detecting it again. Only a failed earlier result is
+    detected again, reusing the stored image.
+    """
+    campaign_id_int = _parse_campaign_id(campaignId)
+    lat, lng = _parse_coordinates(coordinates)
+
+    try:
+        target = await run_db(db, ResultService.get_upload_target, userId, campaign_id_int)
+    except UserNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario nao encontrado"
+        )
+    except CampaignNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campanha nao encontrada"
+        )
+
+    storage = await run_in_threadpool(get_storage_service)
     
     try:
-        # Read file content
-        contents = await file.read()
-        
-        # Get file extension
-        file_extension = os.path.splitext(file.filename)[1].lstrip('.').lower()
-        if not file_extension:
-            file_extension = "jpg"  # Default extension
-        
-        # Upload to GCP Storage
-        image_url = gcp_storage.upload_image(contents, file_extension)
+        content_hash = await run_in_threadpool(hash_image_stream, file.file)
+        previous = (
+            await run_db(db, ResultService.find_uploaded_images, target, [content_hash])
+        ).get(content_hash)
+        if _is_repeated_upload(previous):
+            return ImageUploadResponse(
+                success=True,
+                message="Imagem ja enviada",
+                uploaded_image=previous.original_image,
+                result_id=previous.id,
+                failed_count=0,
+                duplicate=True,
+            )
+
+        stored = None
+        if previous is not None:
+            # Detection failed last time; run it again on the stored copy
+            image_url = previous.original_image
+        else:
+            image_url, stored = await _store_upload(storage, file, content_hash)
         
         # Convert schema ResultType to model ResultType
         result_type = ModelResultType[type.value]
-        
-        # Handle campaignId: accept both int and str, convert empty string or "null" to None
-        campaign_id_int = None
-        if campaignId is not None:
-            if isinstance(campaignId, int):
-                campaign_id_int = campaignId
-            elif isinstance(campaignId, str):
-                campaign_id_str = campaignId.strip()
-                if campaign_id_str and campaign_id_str.lower() != "null":
-                    try:
-                        campaign_id_int = int(campaign_id_str)
-                    except (ValueError, TypeError):
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="campaignId must be a valid integer or null"
-                        )
-            else:
-                # Try to convert other types to int
-                try:
-                    campaign_id_int = int(campaignId)
-                except (ValueError, TypeError):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="campaignId must be a valid integer or null"
-                    )
-        
-        # Parse coordinates JSON if provided
-        lat = None
-        lng = None
-        if coordinates:
-            # Handle string "null" explicitly
-            if coordinates.strip().lower() == "null":
-                lat = None
-                lng = None
-            else:
-                try:
-                    coords_data = json.loads(coordinates)
-                    if coords_data is not None:
-                        # Strict validation: lat and lng must be strings
-                        lat = coords_data.get("lat")
-                        lng = coords_data.get("lng") or coords_data.get("long")  # Support both "lng" and "long"
-                        
-                        # Validate types - must be strings or None
-                        if lat is not None and not isinstance(lat, str):
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Invalid coordinates: 'lat' must be a string"
-                            )
-                        if lng is not None and not isinstance(lng, str):
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Invalid coordinates: 'lng' must be a string"
-                            )
-                        
-                        # Validate that coordinate strings are numeric (optional but recommended)
-                        if lat is not None:
-                            try:
-                                float(lat)
-                            except (ValueError, TypeError):
-                                raise HTTPException(
-                                    status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail="Invalid coordinates: 'lat' must be a numeric string"
-                                )
-                        if lng is not None:
-                            try:
-                                float(lng)
-                            except (ValueError, TypeError):
-                                raise HTTPException(
-                                    status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail="Invalid coordinates: 'lng' must be a numeric string"
-                                )
-                except HTTPException:
-                    raise
-                except (json.JSONDecodeError, TypeError):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Invalid coordinates format. Expected JSON object like {\"lat\": \"string\", \"lng\": \"string\"} or null"
-                    )
-        
+
         # Create result record
-        result = ResultService.create_result_from_upload(
-            db=db,
-            image_url=image_url,
-            user_id=userId,
-            campaign_id=campaign_id_int,
-            result_type=result_type,
-            lat=lat,
-            lng=lng,
+        result_ids = await run_db(
+            db,
+            ResultService.create_results_from_uploads,
+            target,
+            [(image_url, lat, lng, content_hash)],
+            result_type,
         )
         
-        # Call Detection API to process the image
-        detection_api = DetectionAPIService()
-        try:
-            detection_response = detection_api.process_image(image_url, result.id)
-            # Use the detection API response message if available, otherwise use default
-            message = detection_response.get("message", "Imagem enviada com sucesso")
-        except Exception as e:
-            # If detection API call fails, log but don't fail the upload
-            # The image was already uploaded and result created
-            message = f"Imagem enviada com sucesso, mas falha ao processar com Detection API: {str(e)}"
+        # The detection job was committed with the result; wake the dispatcher to send it now
+        detection_dispatcher.notify()
+        _queue_upload_derivatives([(result_ids[0], image_url, stored)])
+        message = "Imagem enviada com sucesso"
         
         return ImageUploadResponse(
             success=True,
             message=message,
             uploaded_image=image_url,
-            result_id=result.id,
+            result_id=result_ids[0],
             failed_count=0,
         )
         
+    except InvalidImageError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=INVALID_IMAGE_MESSAGE
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao fazer upload da imagem: {str(e)}"
+        )
+
+
+@router.post("/uploadImages", response_model=BatchImageUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_images_batch(
+    files: List[UploadFile] = File(...),
+    userId: int = Form(...),
+    campaignId: Optional[Union[int, str]] = Form(None),
+    type: ResultType = Form(...),
+    coordinates: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload several images of the same user and campaign in one request.
+
+    The user and campaign are checked once, the files are sent to storage
+    concurrently (BATCH_UPLOAD_CONCURRENCY at a time) and the results are
+    created in one transaction. ``results`` reports the outcome of every file
+    in request order; files that failed to upload are counted in ``failed_count``.
+    Images already uploaded, earlier or in the same request, are reported with
+    ``duplicate`` set and the existing result, as in uploadImage.
+    """
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many files: at most {settings.BATCH_UPLOAD_MAX_FILES} per request"
+        )
+
+    campaign_id_int = _parse_campaign_id(campaignId)
+    file_coordinates = _parse_batch_coordinates(coordinates, len(files))
+
+    try:
+        target = await run_db(db, ResultService.get_upload_target, userId, campaign_id_int)
     except UserNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -297,10 +740,112 @@ async def upload_images(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campanha nao encontrada"
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao fazer upload da imagem: {str(e)}"
+
+    storage = await run_in_threadpool(get_storage_service)
+    semaphore = asyncio.Semaphore(settings.BATCH_UPLOAD_CONCURRENCY)
+
+    async def digest(file: UploadFile) -> str:
+        async with semaphore:
+            return await run_in_threadpool(hash_image_stream, file.file)
+
+    async def upload(index: int) -> tuple[str, Optional[bytes]]:
+        async with semaphore:
+            return await _store_upload(storage, files[index], hashes[index])
+
+    items = [BatchImageUploadItem(filename=file.filename, success=False) for file in files]
+    hashes = await asyncio.gather(*(digest(file) for file in files), return_exceptions=True)
+    for index, content_hash in enumerate(hashes):
+        if isinstance(content_hash, BaseException):
+            items[index].error = f"Erro ao ler a imagem: {str(content_hash)}"
+    previous = await run_db(
+        db,
+        ResultService.find_uploaded_images,
+        target,
+        [content_hash for content_hash in hashes if isinstance(content_hash, str)],
+    )
+
+    image_urls: dict[int, str] = {}
+    to_upload: list[int] = []
+    # Files repeating an earlier file of this request share its outcome
+    first_with_hash: dict[str, int] = {}
+    repeats: list[tuple[int, int]] = []
+    for index, content_hash in enumerate(hashes):
+        if not isinstance(content_hash, str):
+            continue
+        earlier = previous.get(content_hash)
+        if _is_repeated_upload(earlier):
+            items[index].success = True
+            items[index].uploaded_image = earlier.original_image
+            items[index].result_id = earlier.id
+            items[index].duplicate = True
+        elif content_hash in first_with_hash:
+            repeats.append((index, first_with_hash[content_hash]))
+        else:
+            first_with_hash[content_hash] = index
+            if earlier is not None:
+                # Detection failed last time; run it again on the stored copy
+                image_urls[index] = earlier.original_image
+            else:
+                to_upload.append(index)
+
+    outcomes = await asyncio.gather(*(upload(index) for index in to_upload), return_exceptions=True)
+    stored: dict[int, bytes] = {}
+    for index, outcome in zip(to_upload, outcomes):
+        if isinstance(outcome, InvalidImageError):
+            items[index].error = INVALID_IMAGE_MESSAGE
+        elif isinstance(outcome, BaseException):
+            items[index].error = f"Erro ao fazer upload da imagem: {str(outcome)}"
+        else:
+            image_urls[index], data = outcome
+            if data is not None:
+                stored[index] = data
+    uploaded = sorted(image_urls.items())
+
+    if uploaded:
+        try:
+            result_ids = await run_db(
+                db,
+                ResultService.create_results_from_uploads,
+                target,
+                [
+                    (image_url, *file_coordinates[index], hashes[index])
+                    for index, image_url in uploaded
+                ],
+                ModelResultType[type.value],
+            )
+        except Exception as e:
+            for index, _ in uploaded:
+                items[index].error = f"Erro ao salvar resultado: {str(e)}"
+        else:
+            for (index, image_url), result_id in zip(uploaded, result_ids):
+                items[index].success = True
+                items[index].uploaded_image = image_url
+                items[index].result_id = result_id
+            # The detection jobs were committed with the results; wake the dispatcher
+            detection_dispatcher.notify()
+            _queue_upload_derivatives([
+                (result_id, image_url, stored.get(index))
+                for (index, image_url), result_id in zip(uploaded, result_ids)
+            ])
+
+    for index, first in repeats:
+        items[index] = items[first].model_copy(
+            update={"filename": files[index].filename, "duplicate": items[first].success}
         )
 
+    uploaded_count = sum(item.success for item in items)
+    failed_count = len(items) - uploaded_count
+    if failed_count == 0:
+        message = "Imagens enviadas com sucesso"
+    elif uploaded_count == 0:
+        message = "Nenhuma imagem foi enviada"
+    else:
+        message = f"{uploaded_count} de {len(items)} imagens enviadas com sucesso"
 
+    return BatchImageUploadResponse(
+        success=failed_count == 0,
+        message=message,
+        uploaded_count=uploaded_count,
+        failed_count=failed_count,
+        results=items,
+    )
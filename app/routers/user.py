@@ -2,18 +2,30 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.schemas.user import User, UserCreate, UserLogin, UserUpdate, UserLoginResponse
 from app.services.user_service import UserService, UserEmailAlreadyExists
-from app.database import get_db
+from app.schemas.auth import TokenPair, TokenRefresh
+from app.services.password_service import password_hasher, password_pool_busy, PasswordHasherBusy
+from app.services.token_service import TokenService, InvalidTokenError, REFRESH
+from app.auth import USER_AUDIENCE
+from app.database import get_db, run_db
 
 router = APIRouter(prefix="/user", tags=["user"])
 
+
 # ------------------------- POST -------------------------------
 
 # Endpoint POST - Create User
 @router.post("/createUser", response_model=User)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     address = user.address
     try:
-        return UserService.create_user(db, user, address)
+        # Checked before hashing so a taken email costs no bcrypt call; the
+        # service checks again for concurrent signups
+        if await run_db(db, UserService.email_in_use, user.email):
+            raise UserEmailAlreadyExists()
+        hashed_password = await password_hasher.hash(user.password)
+        return await run_db(db, UserService.create_user, user, address, hashed_password)
+    except PasswordHasherBusy:
+        raise password_pool_busy() from None
     except UserEmailAlreadyExists:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -22,8 +34,11 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 #Endpoint POST - User Login
 @router.post("/login", response_model=UserLoginResponse)
-def login(user_login: UserLogin, db: Session = Depends(get_db)):
-    user = UserService.authenticate(db, user_login)
+async def login(user_login: UserLogin, db: Session = Depends(get_db)):
+    try:
+        user = await UserService.authenticate(db, user_login)
+    except PasswordHasherBusy:
+        raise password_pool_busy() from None
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,20 +50,37 @@ def login(user_login: UserLogin, db: Session = Depends(get_db)):
             "id": user.id,
             "name": user.name,
             "email": user.email,
-        }
+        },
+        "tokens": TokenService.issue_tokens(user.id, USER_AUDIENCE),
     }
 
+#Endpoint POST - Exchange a refresh token for a new token pair
+@router.post("/refresh", response_model=TokenPair)
+async def refresh_tokens(body: TokenRefresh, db: Session = Depends(get_db)):
+    try:
+        identity = TokenService.decode(body.refreshToken, USER_AUDIENCE, REFRESH)
+    except InvalidTokenError:
+        identity = None
+    # Refresh is the only token path that reads the database, so deleted users lose access
+    if not identity or not await run_db(db, UserService.user_exists, identity.subject_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return TokenService.issue_tokens(identity.subject_id, USER_AUDIENCE)
+
 # ------------------------- GET -------------------------------
 
 # Endpoint GET - List all users
 @router.get("/getAllUsers", response_model=list[User])
-def list_users(db: Session = Depends(get_db)):
-    return UserService.list_users(db)
+async def list_users(db: Session = Depends(get_db)):
+    return await run_db(db, UserService.list_users)
 
 # Endpoint GET - Get user by id
 @router.get("/getUser/{user_id}", response_model=User)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = UserService.get_user_by_id(db, user_id)
+async def get_user(user_id: int, db: Session = Depends(get_db)):
+    user = await run_db(db, UserService.get_user_by_id, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,9 +92,18 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 # Endpoint PUT - Update user
 @router.put("/updateUser/{user_id}", response_model=User)
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     try:
-        user = UserService.update_user(db, user_id, user_update)
+        hashed_password = None
+        if user_update.password is not None:
+            if user_update.email is not None and await run_db(
+                db, UserService.email_in_use, user_update.email, user_id
+            ):
+                raise UserEmailAlreadyExists()
+            hashed_password = await password_hasher.hash(user_update.password)
+        user = await run_db(db, UserService.update_user, user_id, user_update, hashed_password)
+    except PasswordHasherBusy:
+        raise password_pool_busy() from None
     except UserEmailAlreadyExists:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -80,8 +121,8 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
 
 # Endpoint DELETE - Delete user
 @router.delete("/deleteUser/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    deleted = UserService.delete_user(db, user_id)
+async def delete_user(user_id: int, db: Session = Depends(get_db)):
+    deleted = await run_db(db, UserService.delete_user, user_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -11,7 +11,11 @@ from app.services.userPortal_service import (
     UserPortalService,
     UserPortalEmailAlreadyExists,
 )
-from app.database import get_db
+from app.schemas.auth import TokenPair, TokenRefresh
+from app.services.password_service import password_hasher, password_pool_busy, PasswordHasherBusy
+from app.services.token_service import TokenService, InvalidTokenError, REFRESH
+from app.auth import USER_PORTAL_AUDIENCE
+from app.database import get_db, run_db
 
 router = APIRouter(prefix="/userPortal", tags=["userPortal"])
 
@@ -19,9 +23,16 @@ router = APIRouter(prefix="/userPortal", tags=["userPortal"])
 # ------------------------- POST -------------------------------
 
 @router.post("/createUserPortal", response_model=UserPortalLoginResponse)
-def create_user_portal(user: UserPortalCreate, db: Session = Depends(get_db)):
+async def create_user_portal(user: UserPortalCreate, db: Session = Depends(get_db)):
     try:
-        user_portal = UserPortalService.create_user_portal(db, user)
+        # Checked before hashing so a taken email costs no bcrypt call; the
+        # service checks again for concurrent signups
+        if await run_db(db, UserPortalService.email_in_use, user.email):
+            raise UserPortalEmailAlreadyExists()
+        hashed_password = await password_hasher.hash(user.password)
+        user_portal = await run_db(db, UserPortalService.create_user_portal, user, hashed_password)
+    except PasswordHasherBusy:
+        raise password_pool_busy() from None
     except UserPortalEmailAlreadyExists:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -39,8 +50,11 @@ def create_user_portal(user: UserPortalCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=UserPortalLoginResponse)
-def login(user_login: UserPortalLogin, db: Session = Depends(get_db)):
-    user_portal = UserPortalService.authenticate(db, user_login)
+async def login(user_login: UserPortalLogin, db: Session = Depends(get_db)):
+    try:
+        user_portal = await UserPortalService.authenticate(db, user_login)
+    except PasswordHasherBusy:
+        raise password_pool_busy() from None
     if not user_portal:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,20 +66,37 @@ def login(user_login: UserPortalLogin, db: Session = Depends(get_db)):
             "id": user_portal.id,
             "name": user_portal.name,
             "email": user_portal.email,
-        }
+        },
+        "tokens": TokenService.issue_tokens(user_portal.id, USER_PORTAL_AUDIENCE),
     }
 
 
+@router.post("/refresh", response_model=TokenPair)
+async def refresh_tokens(body: TokenRefresh, db: Session = Depends(get_db)):
+    try:
+        identity = TokenService.decode(body.refreshToken, USER_PORTAL_AUDIENCE, REFRESH)
+    except InvalidTokenError:
+        identity = None
+    # Refresh is the only token path that reads the database, so deleted users lose access
+    if not identity or not await run_db(db, UserPortalService.get_user_portal_by_id, identity.subject_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return TokenService.issue_tokens(identity.subject_id, USER_PORTAL_AUDIENCE)
+
+
 # ------------------------- GET -------------------------------
 
 @router.get("/getAllUserPortals", response_model=list[UserPortal])
-def list_user_portals(db: Session = Depends(get_db)):
-    return UserPortalService.list_user_portals(db)
+async def list_user_portals(db: Session = Depends(get_db)):
+    return await run_db(db, UserPortalService.list_user_portals)
 
 
 @router.get("/getUserPortal/{user_portal_id}", response_model=UserPortal)
-def get_user_portal(user_portal_id: int, db: Session = Depends(get_db)):
-    user_portal = UserPortalService.get_user_portal_by_id(db, user_portal_id)
+async def get_user_portal(user_portal_id: int, db: Session = Depends(get_db)):
+    user_portal = await run_db(db, UserPortalService.get_user_portal_by_id, user_portal_id)
     if not user_portal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,13 +108,24 @@ def get_user_portal(user_portal_id: int, db: Session = Depends(get_db)):
 # ------------------------- PUT -------------------------------
 
 @router.put("/updateUserPortal/{user_portal_id}", response_model=UserPortal)
-def update_user_portal(
+async def update_user_portal(
     user_portal_id: int,
     user_update: UserPortalUpdate,
     db: Session = Depends(get_db)
 ):
     try:
-        user_portal = UserPortalService.update_user_portal(db, user_portal_id, user_update)
+        hashed_password = None
+        if user_update.password is not None:
+            if user_update.email is not None and await run_db(
+                db, UserPortalService.email_in_use, user_update.email, user_portal_id
+            ):
+                raise UserPortalEmailAlreadyExists()
+            hashed_password = await password_hasher.hash(user_update.password)
+        user_portal = await run_db(
+            db, UserPortalService.update_user_portal, user_portal_id, user_update, hashed_password
+        )
+    except PasswordHasherBusy:
+        raise password_pool_busy() from None
     except UserPortalEmailAlreadyExists:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -101,8 +143,8 @@ def update_user_portal(
 # ------------------------- DELETE -------------------------------
 
 @router.delete("/deleteUserPortal/{user_portal_id}")
-def delete_user_portal(user_portal_id: int, db: Session = Depends(get_db)):
-    deleted = UserPortalService.delete_user_portal(db, user_portal_id)
+async def delete_user_portal(user_portal_id: int, db: Session = Depends(get_db)):
+    deleted = await run_db(db, UserPortalService.delete_user_portal, user_portal_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class TokenRefresh(BaseModel):
+    refreshToken: str
+
+
+class TokenPair(BaseModel):
+    accessToken: str
+    refreshToken: str
+    tokenType: str = "bearer"
+    expiresIn: int
@@ -12,6 +12,10 @@ class CampaignResult(BaseModel):
     id: int
     originalImage: str
     resultImage: Optional[str] = None
+    originalThumbnail: Optional[str] = None
+    originalPreview: Optional[str] = None
+    resultThumbnail: Optional[str] = None
+    resultPreview: Optional[str] = None
     type: str
     status: str
     feedback: CampaignResultFeedback
@@ -41,6 +41,11 @@ class ResultCreate(ResultBase):
 
 class Result(ResultBase):
     id: int
+    # Reduced copies for lists and detail screens; None until generated
+    originalThumbnail: Optional[str] = None
+    originalPreview: Optional[str] = None
+    resultThumbnail: Optional[str] = None
+    resultPreview: Optional[str] = None
     campaignId: Optional[int] = None
     created_at: datetime
     processed_at: Optional[datetime] = None
@@ -71,13 +76,95 @@ class ResultImageUpdate(BaseModel):
     object_count: Optional[int] = None
 
 
+class ResultImageBatchItem(BaseModel):
+    id: int
+    success: bool
+    error: Optional[str] = None
+
+
+class ResultImageBatchUpdateResponse(BaseModel):
+    updated_count: int
+    failed_count: int
+    results: list[ResultImageBatchItem]
+
+
 class ImageUploadResponse(BaseModel):
     success: bool
     message: str
     uploaded_image: Optional[str] = None
     result_id: Optional[int] = None
     failed_count: int = 0
+    # True when the image had already been uploaded and the earlier result is returned
+    duplicate: bool = False
+
+
+class BatchImageUploadItem(BaseModel):
+    filename: Optional[str] = None
+    success: bool
+    uploaded_image: Optional[str] = None
+    result_id: Optional[int] = None
+    error: Optional[str] = None
+    duplicate: bool = False
+
+
+class BatchImageUploadResponse(BaseModel):
+    success: bool
+    message: str
+    uploaded_count: int = 0
+    failed_count: int = 0
+    results: list[BatchImageUploadItem] = []
+
+
+class UploadConstraints(BaseModel):
+    # Longest side, in pixels, the server stores; larger images are wasted bytes
+    maxDimension: int
+    format: str
+    quality: int
+    maxFiles: int
+    # True when the server resizes uploads itself, so downscaling first only saves bandwidth
+    serverNormalizes: bool
 
 
 class CityRequest(BaseModel):
-    city: str
\ No newline at end of file
+    city: str
+
+class ResultStatsByStatus(BaseModel):
+    visualized: int = 0
+    processing: int = 0
+    finished: int = 0
+    failed: int = 0
+
+
+class ResultStatsByType(BaseModel):
+    terreno: int = 0
+    propriedade: int = 0
+
+
+class ResultStatsFeedback(BaseModel):
+    likes: int = 0
+    dislikes: int = 0
+    likeRatio: Optional[float] = None
+
+
+class ResultStats(BaseModel):
+    scope: str
+    key: str
+    total: int = 0
+    byStatus: ResultStatsByStatus
+    byType: ResultStatsByType
+    objectCount: int = 0
+    feedback: ResultStatsFeedback
+
+
+class TileCluster(BaseModel):
+    lat: float
+    lng: float
+    count: int
+    objectCount: int
+
+
+class TileClusters(BaseModel):
+    z: int
+    x: int
+    y: int
+    clusters: list[TileCluster]
@@ -1,5 +1,17 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ValidationInfo, field_validator
 from typing import Optional
+from app.schemas.auth import TokenPair
+from app.services.geo_service import GeoService
+
+
+def _check_numeric_coordinate(value: Optional[str], info: ValidationInfo) -> Optional[str]:
+    if value is not None:
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError("must be a numeric string") from None
+        GeoService.check_coordinate(info.field_name, number)
+    return value
 
 
 class AddressCreate(BaseModel):
@@ -12,6 +24,8 @@ class AddressCreate(BaseModel):
     lat: str
     lng: str
 
+    _numeric_coordinates = field_validator("lat", "lng")(_check_numeric_coordinate)
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -37,6 +51,8 @@ class AddressUpdate(BaseModel):
     lat: Optional[str] = None
     lng: Optional[str] = None
 
+    _numeric_coordinates = field_validator("lat", "lng")(_check_numeric_coordinate)
+
 
 class UserCreate(BaseModel):
     name: str
@@ -86,6 +102,12 @@ class Address(BaseModel):
     lat: str
     lng: str
 
+    @field_validator("lat", "lng", mode="before")
+    @classmethod
+    def _coordinate_to_str(cls, value):
+        # Stored as numbers, still exposed as strings to keep the API contract
+        return str(value) if isinstance(value, (int, float)) else value
+
     class Config:
         from_attributes = True
 
@@ -117,4 +139,5 @@ class UserLogin(BaseModel):
 
 class UserLoginResponse(BaseModel):
     message: str
+    tokens: Optional[TokenPair] = None
     profile: UserSummary
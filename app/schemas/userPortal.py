@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from app.schemas.auth import TokenPair
 
 
 class UserPortalCreate(BaseModel):
@@ -42,4 +43,5 @@ class UserPortalSummary(BaseModel):
 
 class UserPortalLoginResponse(BaseModel):
     message: str
+    tokens: Optional[TokenPair] = None
     profile: UserPortalSummary
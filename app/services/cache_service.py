@@ -0,0 +1,141 @@
+"""
+Shared read-through cache for rarely changing lookups.
+
+Backends speak the subset of the Redis client API the cache needs
+(``get``, ``set(key, value, ex=...)``, ``delete(*keys)``, with bytes values),
+so a ``redis.Redis`` client can be plugged in as is. ``InMemoryCacheBackend``
+implements the same calls in-process and is the default; with several API
+instances it only sees its own process's invalidations, so other instances
+may serve stale entries until the TTL.
+
+    CACHE_BACKEND=memory   # default, per process
+    CACHE_BACKEND=redis    # shared, needs the ``redis`` package and CACHE_REDIS_URL
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_requests = metrics.counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+_errors = metrics.counter(
+    "cache_errors_total", "Cache backend calls that failed and fell back to the database", ["cache"]
+)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> Any: ...
+
+    def delete(self, *keys: str) -> int: ...
+
+
+class InMemoryCacheBackend:
+    """LRU with per-entry expiry, thread-safe, with the Redis client's call signatures."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float | None, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> bool:
+        expires_at = time.monotonic() + ex if ex is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._entries.pop(key, None) is not None for key in keys)
+
+
+def create_cache_backend() -> CacheBackend:
+    """
+    Build the backend selected by ``CACHE_BACKEND``.
+
+    Raises:
+        ValueError: If the backend is unknown or its client is not installed
+    """
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return InMemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        if not settings.CACHE_REDIS_URL:
+            raise ValueError("CACHE_BACKEND=redis requires CACHE_REDIS_URL")
+        return redis.Redis.from_url(
+            settings.CACHE_REDIS_URL,
+            socket_timeout=settings.CACHE_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.CACHE_TIMEOUT_SECONDS,
+        )
+    raise ValueError(f"Unknown CACHE_BACKEND: {settings.CACHE_BACKEND}")
+
+
+class JSONCache:
+    """
+    Named view on a backend storing JSON values under ``<name>:<key>``.
+
+    Backend failures are logged and counted, then treated as a miss (reads) or
+    ignored (writes), so an unreachable cache only costs the database query.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int, backend: CacheBackend | None = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        # Built eagerly so a misconfigured backend fails at startup; the Redis
+        # client only connects on first use
+        self.backend = backend if backend is not None else create_cache_backend()
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def get(self, key: str) -> Any | None:
+        try:
+            raw = self.backend.get(self._key(key))
+        except Exception:
+            _errors.inc(cache=self.name)
+            logger.warning("Cache %s read failed", self.name, exc_info=True)
+            raw = None
+        _requests.inc(cache=self.name, result="miss" if raw is None else "hit")
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self.backend.set(self._key(key), json.dumps(value).encode("utf-8"), ex=self.ttl_seconds)
+        except Exception:
+            _errors.inc(cache=self.name)
+            logger.warning("Cache %s write failed", self.name, exc_info=True)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            self.backend.delete(*(self._key(key) for key in keys))
+        except Exception:
+            _errors.inc(cache=self.name)
+            # A missed invalidation is only healed by the TTL, so make it visible
+            logger.error("Cache %s invalidation failed for %s", self.name, keys, exc_info=True)
@@ -1,10 +1,54 @@
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Tuple
-from sqlalchemy.orm import Session, joinedload
+from typing import Dict, List, Tuple
+from sqlalchemy import func, inspect
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app.config import settings
 from app.models.campaign import CampaignModel
+from app.models.result import ResultModel
+from app.models.enums.result import ResultStatus
+from app.models.enums.result_stats import ResultStatsScope
 from app.models.userPortal import UserPortalModel
 from app.models.user import UserModel
 from app.schemas.campaign import CampaignCreate, CampaignUpdate
+from app.services.cache_service import JSONCache
+from app.services.result_stats_service import ResultStatsService
+
+# Campaign rows by id and campaign lists by city; results are never cached.
+# Writes below invalidate the affected keys after commit. A read that started
+# before a write can still store the old value, which then lives until the TTL.
+campaign_cache = JSONCache("campaign", settings.CAMPAIGN_CACHE_TTL_SECONDS)
+
+_CAMPAIGN_FIELDS = [attr.key for attr in inspect(CampaignModel).column_attrs]
+_DATETIME_FIELDS = ("created_at", "finish_at")
+
+
+def _campaign_to_cache(campaign: CampaignModel) -> dict:
+    data = {field: getattr(campaign, field) for field in _CAMPAIGN_FIELDS}
+    for field in _DATETIME_FIELDS:
+        if data[field] is not None:
+            data[field] = data[field].isoformat()
+    return data
+
+
+def _campaign_from_cache(db: Session, data: dict) -> CampaignModel:
+    fields = dict(data)
+    for field in _DATETIME_FIELDS:
+        if fields[field] is not None:
+            fields[field] = datetime.fromisoformat(fields[field])
+    campaign = CampaignModel(**fields)
+    # Attach it as if a query had loaded it, without SQL; results still load lazily
+    make_transient_to_detached(campaign)
+    return db.merge(campaign, load=False)
+
+
+def _id_key(campaign_id: int) -> str:
+    return f"id:{campaign_id}"
+
+
+def _city_key(city: str) -> str:
+    return f"city:{city}"
 
 
 class CampaignService:
@@ -24,15 +68,31 @@ class CampaignService:
         db.add(campaign)
         db.commit()
         db.refresh(campaign)
+        campaign_cache.delete(_city_key(campaign.city))
         return campaign
 
     @staticmethod
     def get_campaign_by_id(db: Session, campaign_id: int) -> CampaignModel | None:
-        return db.query(CampaignModel).filter(CampaignModel.id == campaign_id).first()
+        """Read-through ``campaign_cache``; unknown ids are not cached."""
+        cached = campaign_cache.get(_id_key(campaign_id))
+        if cached is not None:
+            return _campaign_from_cache(db, cached)
+
+        campaign = db.query(CampaignModel).filter(CampaignModel.id == campaign_id).first()
+        if campaign is not None:
+            campaign_cache.set(_id_key(campaign_id), _campaign_to_cache(campaign))
+        return campaign
 
     @staticmethod
     def get_campaigns_by_city(db: Session, city: str) -> List[CampaignModel]:
-        return db.query(CampaignModel).filter(CampaignModel.city == city).all()
+        """Read-through ``campaign_cache``; cities without campaigns are cached too."""
+        cached = campaign_cache.get(_city_key(city))
+        if cached is not None:
+            return [_campaign_from_cache(db, data) for data in cached]
+
+        campaigns = db.query(CampaignModel).filter(CampaignModel.city == city).all()
+        campaign_cache.set(_city_key(city), [_campaign_to_cache(campaign) for campaign in campaigns])
+        return campaigns
 
     @staticmethod
     def get_campaigns_for_user_portal(
@@ -54,6 +114,63 @@ class CampaignService:
     def get_all_campaigns(db: Session) -> List[CampaignModel]:
         return db.query(CampaignModel).all()
 
+    @staticmethod
+    def load_results(
+        db: Session, campaigns: List[CampaignModel], user_id: int | None = None
+    ) -> None:
+        """
+        Populate ``campaign.results`` for all campaigns with a single query.
+
+        Replaces one lazy SELECT per campaign. When ``user_id`` is given only
+        that user's results are loaded, so the collections are meant for
+        read-only use (e.g. building responses), not for cascading changes.
+
+        Args:
+            db: Database session
+            campaigns: Campaigns whose results should be loaded
+            user_id: Optional user to restrict the results to
+        """
+        if not campaigns:
+            return
+
+        query = db.query(ResultModel).filter(
+            ResultModel.campaign_id.in_([campaign.id for campaign in campaigns])
+        )
+        if user_id is not None:
+            query = query.filter(ResultModel.user_id == user_id)
+
+        results_by_campaign = defaultdict(list)
+        for result in query.order_by(ResultModel.id):
+            results_by_campaign[result.campaign_id].append(result)
+
+        for campaign in campaigns:
+            set_committed_value(campaign, "results", results_by_campaign.get(campaign.id, []))
+
+    @staticmethod
+    def count_results_not_displayed(
+        db: Session, campaign_ids: List[int], user_id: int
+    ) -> Dict[int, int]:
+        """
+        Count a user's results not yet visualized, per campaign, in one query.
+
+        Returns:
+            Mapping of campaign id to count; campaigns without such results are absent
+        """
+        if not campaign_ids:
+            return {}
+
+        rows = (
+            db.query(ResultModel.campaign_id, func.count(ResultModel.id))
+            .filter(
+                ResultModel.campaign_id.in_(campaign_ids),
+                ResultModel.user_id == user_id,
+                ResultModel.status != ResultStatus.visualized,
+            )
+            .group_by(ResultModel.campaign_id)
+            .all()
+        )
+        return {campaign_id: count for campaign_id, count in rows}
+
     @staticmethod
     def get_campaigns_for_user(
         db: Session, user_id: int
@@ -81,6 +198,7 @@ class CampaignService:
         campaign = db.query(CampaignModel).filter(CampaignModel.id == campaign_id).first()
         if not campaign:
             return None
+        previous_city = campaign.city
 
         mapping = {
             "title": campaign_update.title,
@@ -98,6 +216,7 @@ class CampaignService:
 
         db.commit()
         db.refresh(campaign)
+        campaign_cache.delete(_id_key(campaign.id), _city_key(previous_city), _city_key(campaign.city))
         return campaign
 
     @staticmethod
@@ -106,6 +225,11 @@ class CampaignService:
         if not campaign:
             return False
 
+        # Results are detached by the database (ON DELETE SET NULL), so only the campaign totals go
+        ResultStatsService.delete_stats(db, ResultStatsScope.campaign, str(campaign.id))
+
+        campaign_key, city_key = _id_key(campaign.id), _city_key(campaign.city)
         db.delete(campaign)
         db.commit()
-        return True
\ No newline at end of file
+        campaign_cache.delete(campaign_key, city_key)
+        return True
@@ -1,12 +1,116 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from app.config import settings
+from app.instrumentation import timed_external_call
+from app.services.resilience import AIMDLimiter, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Shared by every client in the process, so all calls see the same detector health
+detection_breaker = CircuitBreaker(
+    "detection_api",
+    failure_threshold=settings.DETECTION_BREAKER_FAILURES,
+    reset_seconds=settings.DETECTION_BREAKER_RESET_SECONDS,
+)
+detection_limiter = AIMDLimiter(
+    "detection_api",
+    min_limit=1,
+    max_limit=settings.DETECTION_WORKERS,
+    target_latency=settings.DETECTION_LATENCY_TARGET_SECONDS,
+)
 
 
 class DetectionAPIService:
-    """Service for handling Detection API operations."""
+    """
+    Service for handling Detection API operations.
+
+    Requests go through one keep-alive session. ``submit`` queues an image and
+    returns a Future; with DETECTION_BATCH_SIZE above 1, queued images are
+    coalesced into batched ``process-images`` calls of up to that many images,
+    waiting at most DETECTION_BATCH_LINGER_SECONDS for a batch to fill.
+
+    Calls pass through ``detection_breaker``, which raises CircuitOpenError
+    without calling while the detector is failing, and ``detection_limiter``,
+    which narrows concurrency when calls slow down.
+
+    Batch protocol: ``POST {DETECTION_API_URL}/process-images`` with
+    ``{"images": [{"image_url": ..., "resultId": ...}, ...]}``. Any 2xx answer
+    accepts the whole batch except the images listed in an optional
+    ``{"failed": [{"resultId": ..., "error": ...}]}`` body.
+    """
 
     def __init__(self):
         self.base_url = settings.DETECTION_API_URL.rstrip('/')
+        self.batch_size = max(1, settings.DETECTION_BATCH_SIZE)
+        self.linger_seconds = settings.DETECTION_BATCH_LINGER_SECONDS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.DETECTION_WORKERS,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._senders = ThreadPoolExecutor(
+            max_workers=settings.DETECTION_WORKERS, thread_name_prefix="detection-api"
+        )
+        self._queue: queue.Queue = queue.Queue()
+        self._flusher: threading.Thread | None = None
+        self._flusher_lock = threading.Lock()
+
+    def close(self) -> None:
+        """
+        Stop batching and sending and release connections.
+
+        Images still queued are dropped; the dispatcher's leases on their jobs
+        expire and the jobs are claimed again.
+        """
+        if self._flusher is not None:
+            self._queue.put(None)
+            self._flusher.join()
+            self._flusher = None
+        self._senders.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _post(self, payload: dict, operation: str) -> dict:
+        detection_breaker.before_call()
+        detection_limiter.acquire()
+        started = time.monotonic()
+        # Timeouts, connection errors and 5xx count against the detector; 4xx do not
+        healthy = False
+        try:
+            endpoint = f"{self.base_url}/process-images"
+
+            with timed_external_call("detection_api", operation):
+                response = self.session.post(
+                    endpoint,
+                    json=payload,
+                    timeout=settings.DETECTION_TIMEOUT_SECONDS,
+                )
+                healthy = response.status_code < 500
+
+                # Raise an exception for bad status codes
+                response.raise_for_status()
+
+            # Return the JSON response
+            return response.json() if response.content else {}
+
+        except requests.exceptions.Timeout:
+            raise Exception("Detection API request timed out")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to call Detection API: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error processing image with Detection API: {str(e)}")
+        finally:
+            detection_limiter.release(time.monotonic() - started, healthy)
+            if healthy:
+                detection_breaker.record_success()
+            else:
+                detection_breaker.record_failure()
 
     def process_image(self, image_url: str, result_id: int) -> dict:
         """
@@ -20,31 +124,90 @@ class DetectionAPIService:
             The API response as a dictionary
             
         Raises:
+            CircuitOpenError: If the Detection API is failing and was not called
             Exception: If the API call fails
         """
+        return self._post({"image_url": image_url, "resultId": result_id}, "process_images")
+
+    def process_images(self, images: list[tuple[str, int]]) -> dict[int, str | None]:
+        """
+        Send several images to the Detection API in one batched call.
+
+        Args:
+            images: ``(image_url, result_id)`` pairs
+
+        Returns:
+            The error reported for each result id, or None where it was accepted
+
+        Raises:
+            CircuitOpenError: If the Detection API is failing and was not called
+            Exception: If the API call fails as a whole
+        """
+        response = self._post(
+            {"images": [{"image_url": image_url, "resultId": result_id} for image_url, result_id in images]},
+            "process_images_batch",
+        )
+        errors: dict[int, str | None] = {result_id: None for _, result_id in images}
+        for failure in response.get("failed", []) if isinstance(response, dict) else []:
+            errors[int(failure["resultId"])] = failure.get("error") or "Detection API rejected the image"
+        return errors
+
+    def submit(self, image_url: str, result_id: int) -> Future:
+        """
+        Queue an image for detection without blocking.
+
+        The Future resolves when the Detection API accepted the image and fails
+        with the error otherwise.
+        """
+        if self.batch_size == 1:
+            return self._senders.submit(self.process_image, image_url, result_id)
+
+        future: Future = Future()
+        self._ensure_flusher()
+        self._queue.put((image_url, result_id, future))
+        return future
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None:
+            with self._flusher_lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(
+                        target=self._flush_loop, name="detection-batcher", daemon=True
+                    )
+                    self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Wait up to the linger time for the batch to fill, then send what we have
+            batch = [item]
+            deadline = time.monotonic() + self.linger_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    return
+                batch.append(item)
+            self._senders.submit(self._send_batch, batch)
+
+    def _send_batch(self, batch: list[tuple[str, int, Future]]) -> None:
         try:
-            endpoint = f"{self.base_url}/process-images"
-            payload = {
-                "image_url": image_url,
-                "resultId": result_id
-            }
-            
-            response = requests.post(
-                endpoint,
-                json=payload,
-                timeout=30  # 30 second timeout
-            )
-            
-            # Raise an exception for bad status codes
-            response.raise_for_status()
-            
-            # Return the JSON response
-            return response.json()
-            
-        except requests.exceptions.Timeout:
-            raise Exception("Detection API request timed out")
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to call Detection API: {str(e)}")
+            errors = self.process_images([(image_url, result_id) for image_url, result_id, _ in batch])
         except Exception as e:
-            raise Exception(f"Error processing image with Detection API: {str(e)}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
 
+        for _, result_id, future in batch:
+            error = errors.get(result_id)
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(Exception(f"Detection API rejected the image: {error}"))
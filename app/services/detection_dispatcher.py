@@ -0,0 +1,194 @@
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from app.config import settings
+from app.database import SessionLocal
+from app.models.enums.detection_job import DetectionJobStatus
+from app.services.detection_api_service import DetectionAPIService, detection_breaker
+from app.services.resilience import CircuitOpenError, CircuitState
+from app.services.detection_job_service import DetectionJobService
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionDispatcher:
+    """
+    Drains the ``detection_job`` table and sends images to the Detection API.
+
+    Jobs are leased from the database as slots free up and handed to
+    ``DetectionAPIService.submit``, which makes at most ``DETECTION_WORKERS``
+    concurrent detector calls of up to ``DETECTION_BATCH_SIZE`` images each, on
+    its own threads so the blocking HTTP call never touches the event loop. Any number of
+    dispatchers (the API process and ``python -m app.workers.detection_worker``
+    on other nodes) can share one database: a job is leased to a single
+    dispatcher at a time and re-queued if its lease expires, e.g. because the
+    process died mid-call. Failed calls are retried with exponential backoff;
+    after ``DETECTION_MAX_ATTEMPTS`` (failed calls and expired leases both
+    count) the result is marked as failed. While the detector's circuit
+    breaker is open no jobs are claimed, and jobs that hit the open circuit are
+    put back without using up an attempt.
+    """
+
+    def __init__(self, worker_id: str | None = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.workers = settings.DETECTION_WORKERS
+        # Enough leased jobs to fill every concurrent batch
+        self.capacity = settings.DETECTION_WORKERS * max(1, settings.DETECTION_BATCH_SIZE)
+        self.max_attempts = settings.DETECTION_MAX_ATTEMPTS
+        self.backoff_seconds = settings.DETECTION_RETRY_BACKOFF_SECONDS
+        self.lease_seconds = settings.DETECTION_LEASE_SECONDS
+        self.poll_interval = settings.DETECTION_POLL_INTERVAL_SECONDS
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._detection_api: DetectionAPIService | None = None
+
+    def start(self) -> None:
+        """Run the dispatch loop on a background thread."""
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="detection-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """
+        Stop claiming new jobs.
+
+        Calls still in flight are abandoned; their leases expire and another
+        dispatcher picks the jobs up again.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self) -> None:
+        """Wake the dispatch loop, e.g. right after a job was committed."""
+        self._wakeup.set()
+
+    def run(self) -> None:
+        """Claim and dispatch jobs until ``stop`` is called."""
+        self._detection_api = DetectionAPIService()
+        # Records outcomes in the database, off the threads that call the detector
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="detection")
+        logger.info(
+            "Detection dispatcher %s started with %d workers, batches of %d",
+            self.worker_id,
+            self.workers,
+            self._detection_api.batch_size,
+        )
+        try:
+            while not self._stopping.is_set():
+                self._wakeup.clear()
+                try:
+                    claimed = self._claim_and_submit(executor)
+                except Exception:
+                    logger.exception("Failed to claim detection jobs")
+                    claimed = 0
+                if not claimed:
+                    self._wakeup.wait(self.poll_interval)
+        finally:
+            self._detection_api.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _claim_and_submit(self, executor: ThreadPoolExecutor) -> int:
+        circuit = detection_breaker.state
+        if circuit == CircuitState.open:
+            return 0
+
+        with self._lock:
+            free_slots = self.capacity - self._in_flight
+        if free_slots <= 0:
+            return 0
+        if circuit == CircuitState.half_open:
+            # Only one probe call is let through; claim just enough for it
+            free_slots = min(free_slots, max(1, self._detection_api.batch_size))
+
+        db = SessionLocal()
+        try:
+            failed = DetectionJobService.fail_abandoned_jobs(db, self.max_attempts)
+            if failed:
+                logger.warning("Failed %d detection jobs whose lease expired on the last attempt", failed)
+            jobs = [
+                (job.id, job.result_id, job.image_url)
+                for job in DetectionJobService.claim_jobs(
+                    db, self.worker_id, free_slots, self.lease_seconds, self.max_attempts
+                )
+            ]
+        finally:
+            db.close()
+
+        for job_id, result_id, image_url in jobs:
+            with self._lock:
+                self._in_flight += 1
+            detection = self._detection_api.submit(image_url, result_id)
+            detection.add_done_callback(partial(self._settle, executor, job_id, result_id))
+        return len(jobs)
+
+    def _settle(self, executor: ThreadPoolExecutor, job_id: int, result_id: int, detection) -> None:
+        try:
+            executor.submit(self._process, detection, job_id, result_id).add_done_callback(
+                self._release_slot
+            )
+        except RuntimeError:
+            # The dispatcher is stopping; the lease expires and the job is retried
+            self._release_slot(None)
+
+    def _release_slot(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._wakeup.set()
+
+    def _process(self, detection, job_id: int, result_id: int) -> None:
+        if detection.cancelled():
+            return
+        error = detection.exception()
+        if isinstance(error, CircuitOpenError):
+            self._defer(job_id, error)
+            return
+        if error is not None:
+            self._record_failure(job_id, result_id, str(error))
+            return
+
+        db = SessionLocal()
+        try:
+            if not DetectionJobService.complete_job(db, job_id, self.worker_id):
+                logger.warning("Lease on detection job %s was lost before completion", job_id)
+        finally:
+            db.close()
+
+    def _defer(self, job_id: int, error: CircuitOpenError) -> None:
+        db = SessionLocal()
+        try:
+            if not DetectionJobService.defer_job(
+                db, job_id, self.worker_id, error.retry_after, str(error)
+            ):
+                logger.warning("Lease on detection job %s was lost before deferring", job_id)
+        finally:
+            db.close()
+
+    def _record_failure(self, job_id: int, result_id: int, error: str) -> None:
+        db = SessionLocal()
+        try:
+            status = DetectionJobService.fail_job(
+                db, job_id, self.worker_id, error, self.max_attempts, self.backoff_seconds
+            )
+        finally:
+            db.close()
+
+        if status is None:
+            logger.warning("Lease on detection job %s was lost before recording failure", job_id)
+        elif status == DetectionJobStatus.failed:
+            logger.error("Detection failed for result %s, giving up: %s", result_id, error)
+        else:
+            logger.warning("Detection failed for result %s, will retry: %s", result_id, error)
+
+
+detection_dispatcher = DetectionDispatcher()
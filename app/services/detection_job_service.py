@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.models.detection_job import DetectionJobModel
+from app.models.enums.detection_job import DetectionJobStatus
+from app.models.enums.result import ResultStatus
+from app.models.result import ResultModel
+from app.services.result_stats_service import ResultStatsService
+
+
+class DetectionJobService:
+
+    @staticmethod
+    def add_jobs(db: Session, results: list[ResultModel]) -> list[DetectionJobModel]:
+        """
+        Add pending jobs for many flushed results; they are inserted in one batch on flush.
+
+        The caller commits, so the jobs are persisted atomically with the results.
+        """
+        now = datetime.utcnow()
+        jobs = [
+            DetectionJobModel(
+                result_id=result.id,
+                image_url=result.original_image,
+                status=DetectionJobStatus.pending,
+                attempts=0,
+                next_run_at=now,
+            )
+            for result in results
+        ]
+        db.add_all(jobs)
+        return jobs
+
+    @staticmethod
+    def _abandoned(now: datetime):
+        # Running jobs whose worker lost its lease (crashed, killed or stuck)
+        return and_(
+            DetectionJobModel.status == DetectionJobStatus.running,
+            DetectionJobModel.lease_expires_at < now,
+        )
+
+    @staticmethod
+    def _claimable(now: datetime, max_attempts: int):
+        # Pending jobs that are due, plus abandoned jobs with attempts left
+        return or_(
+            and_(
+                DetectionJobModel.status == DetectionJobStatus.pending,
+                DetectionJobModel.next_run_at <= now,
+            ),
+            and_(
+                DetectionJobService._abandoned(now),
+                DetectionJobModel.attempts < max_attempts,
+            ),
+        )
+
+    @staticmethod
+    def _mark_failed(db: Session, job: DetectionJobModel) -> None:
+        job.status = DetectionJobStatus.failed
+        result = db.query(ResultModel).filter(ResultModel.id == job.result_id).first()
+        if result is not None:
+            before = ResultStatsService.snapshot(result)
+            result.status = ResultStatus.failed
+            ResultStatsService.record_change(db, before, ResultStatsService.snapshot(result))
+
+    @staticmethod
+    def fail_abandoned_jobs(db: Session, max_attempts: int) -> int:
+        """
+        Fail jobs whose lease expired on their last allowed attempt.
+
+        Every claim counts an attempt, so a job that keeps crashing its worker
+        (e.g. an image that runs it out of memory) ends here instead of being
+        reclaimed forever.
+
+        Returns:
+            The number of jobs marked failed
+        """
+        now = datetime.utcnow()
+        job_ids = [
+            job_id
+            for (job_id,) in db.query(DetectionJobModel.id).filter(
+                DetectionJobService._abandoned(now),
+                DetectionJobModel.attempts >= max_attempts,
+            )
+        ]
+        failed = 0
+        for job_id in job_ids:
+            # Conditional, so concurrent dispatchers fail each job only once
+            updated = (
+                db.query(DetectionJobModel)
+                .filter(DetectionJobModel.id == job_id, DetectionJobService._abandoned(now))
+                .update(
+                    {
+                        "status": DetectionJobStatus.failed,
+                        "lease_expires_at": None,
+                        "locked_by": None,
+                        "last_error": "Lease expired on the last attempt",
+                        "updated_at": now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            if updated:
+                DetectionJobService._mark_failed(db, db.get(DetectionJobModel, job_id))
+                failed += 1
+        db.commit()
+        return failed
+
+    @staticmethod
+    def claim_jobs(
+        db: Session,
+        worker_id: str,
+        limit: int,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> list[DetectionJobModel]:
+        """
+        Lease up to ``limit`` due jobs to ``worker_id``.
+
+        Jobs whose lease expired are reclaimed only while they have attempts
+        left; ``fail_abandoned_jobs`` fails the rest.
+
+        On PostgreSQL the candidate rows are locked with
+        ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers never claim
+        the same job. Other databases (SQLite) fall back to a conditional
+        ``UPDATE`` per candidate that only succeeds if the row is still
+        claimable, which gives the same guarantee without row locks.
+
+        Args:
+            db: Database session
+            worker_id: Identifier stored on the claimed jobs
+            limit: Maximum number of jobs to claim
+            lease_seconds: How long the worker owns the jobs before they are re-queued
+            max_attempts: Attempts after which an abandoned job is no longer reclaimed
+
+        Returns:
+            The claimed jobs, with attempts already incremented
+        """
+        if limit <= 0:
+            return []
+
+        now = datetime.utcnow()
+        lease_expires_at = now + timedelta(seconds=lease_seconds)
+        claim_values = {
+            "status": DetectionJobStatus.running,
+            "locked_by": worker_id,
+            "lease_expires_at": lease_expires_at,
+            "attempts": DetectionJobModel.attempts + 1,
+            "updated_at": now,
+        }
+
+        candidates = (
+            db.query(DetectionJobModel)
+            .filter(DetectionJobService._claimable(now, max_attempts))
+            .order_by(DetectionJobModel.next_run_at, DetectionJobModel.id)
+            .limit(limit)
+        )
+
+        if db.get_bind().dialect.name == "postgresql":
+            jobs = candidates.with_for_update(skip_locked=True).all()
+            claimed_ids = [job.id for job in jobs]
+            if claimed_ids:
+                db.query(DetectionJobModel).filter(
+                    DetectionJobModel.id.in_(claimed_ids)
+                ).update(claim_values, synchronize_session=False)
+        else:
+            claimed_ids = []
+            for (job_id,) in candidates.with_entities(DetectionJobModel.id).all():
+                updated = (
+                    db.query(DetectionJobModel)
+                    .filter(
+                        DetectionJobModel.id == job_id,
+                        DetectionJobService._claimable(now, max_attempts),
+                    )
+                    .update(claim_values, synchronize_session=False)
+                )
+                if updated:
+                    claimed_ids.append(job_id)
+
+        db.commit()
+        if not claimed_ids:
+            return []
+        return (
+            db.query(DetectionJobModel)
+            .filter(DetectionJobModel.id.in_(claimed_ids))
+            .order_by(DetectionJobModel.next_run_at, DetectionJobModel.id)
+            .all()
+        )
+
+    @staticmethod
+    def _owned_job(db: Session, job_id: int, worker_id: str) -> DetectionJobModel | None:
+        return (
+            db.query(DetectionJobModel)
+            .filter(
+                DetectionJobModel.id == job_id,
+                DetectionJobModel.status == DetectionJobStatus.running,
+                DetectionJobModel.locked_by == worker_id,
+            )
+            .first()
+        )
+
+    @staticmethod
+    def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+        """Mark a job as done. Returns False if the worker no longer holds its lease."""
+        job = DetectionJobService._owned_job(db, job_id, worker_id)
+        if job is None:
+            return False
+
+        job.status = DetectionJobStatus.done
+        job.lease_expires_at = None
+        job.locked_by = None
+        job.last_error = None
+
+        db.commit()
+        return True
+
+    @staticmethod
+    def defer_job(db: Session, job_id: int, worker_id: str, delay_seconds: float, reason: str) -> bool:
+        """
+        Put a claimed job back without counting the attempt, e.g. because the
+        detector was known to be down and was not called.
+
+        Returns False if the worker no longer holds its lease.
+        """
+        job = DetectionJobService._owned_job(db, job_id, worker_id)
+        if job is None:
+            return False
+
+        job.status = DetectionJobStatus.pending
+        job.attempts = max(0, job.attempts - 1)
+        job.next_run_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+        job.lease_expires_at = None
+        job.locked_by = None
+        job.last_error = reason
+
+        db.commit()
+        return True
+
+    @staticmethod
+    def fail_job(
+        db: Session,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        max_attempts: int,
+        backoff_seconds: float,
+    ) -> DetectionJobStatus | None:
+        """
+        Record a failed attempt.
+
+        The job is re-queued with exponential backoff until ``max_attempts``
+        is reached, after which both the job and its result are marked failed.
+
+        Returns:
+            The new job status, or None if the worker no longer holds its lease
+        """
+        job = DetectionJobService._owned_job(db, job_id, worker_id)
+        if job is None:
+            return None
+
+        job.last_error = error
+        job.lease_expires_at = None
+        job.locked_by = None
+
+        if job.attempts >= max_attempts:
+            DetectionJobService._mark_failed(db, job)
+        else:
+            job.status = DetectionJobStatus.pending
+            job.next_run_at = datetime.utcnow() + timedelta(
+                seconds=backoff_seconds * 2 ** (job.attempts - 1)
+            )
+
+        db.commit()
+        return job.status
@@ -1,13 +1,28 @@
-import uuid
+import hashlib
 import os
+from typing import BinaryIO
+from urllib.parse import unquote
+import google.auth
+from google.auth.credentials import with_scopes_if_required
+from google.api_core.exceptions import PreconditionFailed
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
 from google.oauth2 import service_account
 from google.auth import exceptions as auth_exceptions
+from requests.adapters import HTTPAdapter
 from app.config import settings
+from app.instrumentation import timed_external_call
+from app.services.storage_service import fetch_image_url, hash_image_stream, original_blob_name
 
 
 class GCPStorageService:
-    """Service for handling Google Cloud Storage operations."""
+    """
+    Service for handling Google Cloud Storage operations.
+
+    Construction loads credentials, opens a pooled HTTP session and checks the
+    bucket, so a single instance is meant to be shared by the whole process
+    (see ``app.services.storage_service.get_storage_service``).
+    """
 
     def __init__(self):
         try:
@@ -33,12 +48,17 @@ class GCPStorageService:
                 creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
                 if creds_path and not os.path.exists(creds_path):
                     raise Exception(f"GCP credentials file not found at: {creds_path}")
-            
-            # Initialize the storage client
-            if credentials:
-                self.client = storage.Client(credentials=credentials, project=project_id)
-            else:
-                self.client = storage.Client(project=project_id) if project_id else storage.Client()
+                credentials, default_project_id = google.auth.default(scopes=storage.Client.SCOPE)
+                if not project_id:
+                    project_id = default_project_id
+
+            # Initialize the storage client on a keep-alive session sized for concurrent uploads
+            credentials = with_scopes_if_required(credentials, storage.Client.SCOPE)
+            self.client = storage.Client(
+                credentials=credentials,
+                project=project_id,
+                _http=self._build_http_session(credentials),
+            )
                 
         except auth_exceptions.DefaultCredentialsError as e:
             creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'not set')
@@ -53,50 +73,159 @@ class GCPStorageService:
             raise Exception(f"Failed to initialize GCP Storage client: {str(e)}")
         
         self.bucket_name = settings.GCP_STORAGE_BUCKET_NAME
+        self.bucket = self.client.bucket(self.bucket_name)
         self._ensure_bucket_exists()
 
+    @staticmethod
+    def _build_http_session(credentials) -> AuthorizedSession:
+        """Create an authorized HTTP session with a connection pool of GCP_HTTP_POOL_SIZE."""
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(
+            pool_connections=settings.GCP_HTTP_POOL_SIZE,
+            pool_maxsize=settings.GCP_HTTP_POOL_SIZE,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     def _ensure_bucket_exists(self):
         """Ensure the bucket exists, create it if it doesn't."""
         try:
-            bucket = self.client.bucket(self.bucket_name)
-            if not bucket.exists():
-                bucket.create()
+            if not self.bucket.exists():
+                self.bucket.create()
         except Exception as e:
             raise Exception(f"Failed to ensure bucket exists: {str(e)}")
 
-    def upload_image(self, image_data: bytes, file_extension: str = "jpg") -> str:
+    def close(self):
+        """Release the pooled HTTP connections."""
+        self.client._http.close()
+
+    def _public_url(self, blob, blob_name: str) -> str:
+        # Use public_url if available, otherwise construct gs:// URL or https URL
+        if blob.public_url:
+            return blob.public_url
+        # Construct the public URL format: https://storage.googleapis.com/{bucket}/{blob_name}
+        return f"https://storage.googleapis.com/{self.bucket_name}/{blob_name}"
+
+    def upload_image(
+        self,
+        image_data: bytes,
+        file_extension: str = "jpg",
+        content_hash: str | None = None,
+    ) -> str:
         """
         Upload an image to Google Cloud Storage in the 'original' folder.
+
+        The blob is named after the SHA-256 of the data. The write is
+        conditional on the blob not existing (``if_generation_match=0``), so
+        identical content costs one request and is never rewritten.
         
         Args:
             image_data: The image file data as bytes
             file_extension: File extension (default: jpg)
+            content_hash: Name the blob after this SHA-256 instead of the data's, e.g.
+                the hash of the original upload for a normalized copy
             
         Returns:
             The public URL of the uploaded blob
         """
         try:
-            # Generate unique blob name in the 'original' folder
-            blob_name = f"original/{uuid.uuid4()}.{file_extension}"
-            
-            # Get bucket and blob
-            bucket = self.client.bucket(self.bucket_name)
-            blob = bucket.blob(blob_name)
+            if content_hash is None:
+                content_hash = hashlib.sha256(image_data).hexdigest()
+            blob_name = original_blob_name(file_extension, content_hash)
             
+            blob = self.bucket.blob(blob_name)
+
             # Upload the image
-            blob.upload_from_string(image_data, content_type=f"image/{file_extension}")
+            with timed_external_call("gcp_storage", "upload"):
+                try:
+                    blob.upload_from_string(
+                        image_data, content_type=f"image/{file_extension}", if_generation_match=0
+                    )
+                except PreconditionFailed:
+                    # 412: already stored under this content hash
+                    pass
             
             # Make blob publicly accessible (optional, adjust based on your needs)
             # blob.make_public()
             
-            # Return the blob URL
-            # Use public_url if available, otherwise construct gs:// URL or https URL
-            if blob.public_url:
-                return blob.public_url
-            else:
-                # Construct the public URL format: https://storage.googleapis.com/{bucket}/{blob_name}
-                return f"https://storage.googleapis.com/{self.bucket_name}/{blob_name}"
+            return self._public_url(blob, blob_name)
             
         except Exception as e:
             raise Exception(f"Failed to upload image to GCP Storage: {str(e)}")
 
+    def upload_image_stream(
+        self,
+        file_obj: BinaryIO,
+        file_extension: str = "jpg",
+        content_hash: str | None = None,
+    ) -> str:
+        """
+        Stream an image to Google Cloud Storage in the 'original' folder.
+
+        Setting a chunk size on the blob makes the client use a resumable upload
+        that reads and sends ``UPLOAD_CHUNK_SIZE`` bytes at a time, so memory use
+        stays bounded regardless of the image size. The blob is named after the
+        content hash and written only if it does not exist yet
+        (``if_generation_match=0``); an existing blob is returned as is.
+
+        Args:
+            file_obj: Readable, seekable binary file object
+            file_extension: File extension (default: jpg)
+            content_hash: SHA-256 from ``hash_image_stream``, computed here if omitted
+
+        Returns:
+            The public URL of the uploaded blob
+        """
+        try:
+            if content_hash is None:
+                content_hash = hash_image_stream(file_obj)
+            blob_name = original_blob_name(file_extension, content_hash)
+
+            blob = self.bucket.blob(blob_name, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+            with timed_external_call("gcp_storage", "upload"):
+                try:
+                    blob.upload_from_file(
+                        file_obj, content_type=f"image/{file_extension}", if_generation_match=0
+                    )
+                except PreconditionFailed:
+                    # 412: already stored under this content hash
+                    pass
+
+            return self._public_url(blob, blob_name)
+
+        except Exception as e:
+            raise Exception(f"Failed to upload image to GCP Storage: {str(e)}")
+
+    def upload_blob(self, blob_name: str, data: bytes, content_type: str) -> str:
+        """
+        Upload bytes under an explicit blob name, e.g. a thumbnail from
+        ``derivative_blob_name``.
+
+        Returns:
+            The public URL of the uploaded blob
+        """
+        try:
+            blob = self.bucket.blob(blob_name)
+            with timed_external_call("gcp_storage", "upload"):
+                blob.upload_from_string(data, content_type=content_type)
+            return self._public_url(blob, blob_name)
+        except Exception as e:
+            raise Exception(f"Failed to upload {blob_name} to GCP Storage: {str(e)}")
+
+    def download_image(self, image_url: str) -> bytes:
+        """
+        Read an image by its URL, from the bucket when it is stored there.
+
+        Returns:
+            The image bytes
+        """
+        prefix = f"https://storage.googleapis.com/{self.bucket_name}/"
+        if not image_url.startswith(prefix):
+            return fetch_image_url(image_url)
+        try:
+            blob = self.bucket.blob(unquote(image_url[len(prefix):]))
+            with timed_external_call("gcp_storage", "download"):
+                return blob.download_as_bytes()
+        except Exception as e:
+            raise Exception(f"Failed to download image from GCP Storage: {str(e)}")
@@ -0,0 +1,131 @@
+import math
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored precision: 9 characters is a cell of roughly 5 m x 5 m
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_METERS = 6_371_008.8
+# Largest absolute value of each coordinate, in degrees
+COORDINATE_LIMITS = {"lat": 90.0, "lng": 180.0}
+
+
+class GeoService:
+    """Geohash encoding and distance helpers used to index and search result coordinates."""
+
+    @staticmethod
+    def check_coordinate(name: str, value: float) -> float:
+        """
+        Check a latitude (``name`` "lat") or longitude ("lng").
+
+        Raises:
+            ValueError: If the value is NaN, infinite or out of range
+        """
+        limit = COORDINATE_LIMITS[name]
+        if not math.isfinite(value) or abs(value) > limit:
+            raise ValueError(f"must be a finite number between -{limit:g} and {limit:g}")
+        return value
+
+    @staticmethod
+    def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+        lat_range = [-90.0, 90.0]
+        lng_range = [-180.0, 180.0]
+        chars = []
+        bits = 0
+        value = 0
+        use_lng = True
+        while len(chars) < precision:
+            interval, coordinate = (lng_range, lng) if use_lng else (lat_range, lat)
+            middle = (interval[0] + interval[1]) / 2
+            value <<= 1
+            if coordinate >= middle:
+                value |= 1
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            use_lng = not use_lng
+            bits += 1
+            if bits == 5:
+                chars.append(GEOHASH_ALPHABET[value])
+                bits = 0
+                value = 0
+        return "".join(chars)
+
+    @staticmethod
+    def cell_size(precision: int) -> tuple[float, float]:
+        """Height and width, in degrees, of a geohash cell at ``precision``."""
+        total_bits = 5 * precision
+        lng_bits = (total_bits + 1) // 2
+        lat_bits = total_bits // 2
+        return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+    @staticmethod
+    def covering_prefixes(
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        max_cells: int = 16,
+    ) -> list[str]:
+        """
+        Geohash prefixes whose cells together cover the bounding box.
+
+        Picks the longest prefix length that needs at most ``max_cells`` cells,
+        so each prefix maps to one index range scan. Returns an empty list when
+        the box is too large for any prefix to narrow the search.
+        """
+        best: list[str] = []
+        for precision in range(1, GEOHASH_PRECISION + 1):
+            cell_lat, cell_lng = GeoService.cell_size(precision)
+            lat_start = math.floor((min_lat + 90.0) / cell_lat)
+            lat_end = math.floor((max_lat + 90.0) / cell_lat)
+            lng_start = math.floor((min_lng + 180.0) / cell_lng)
+            lng_end = math.floor((max_lng + 180.0) / cell_lng)
+            if (lat_end - lat_start + 1) * (lng_end - lng_start + 1) > max_cells:
+                break
+
+            prefixes = set()
+            for lat_index in range(lat_start, lat_end + 1):
+                for lng_index in range(lng_start, lng_end + 1):
+                    center_lat = min(-90.0 + (lat_index + 0.5) * cell_lat, 90.0)
+                    center_lng = min(-180.0 + (lng_index + 0.5) * cell_lng, 180.0)
+                    prefixes.add(GeoService.encode_geohash(center_lat, center_lng, precision))
+            best = sorted(prefixes)
+        return best
+
+    @staticmethod
+    def prefix_upper_bound(prefix: str) -> str | None:
+        """
+        Smallest geohash greater than every hash starting with ``prefix``.
+
+        ``prefix <= geohash < upper_bound`` selects the prefix as a plain range,
+        which uses the index under any collation (unlike ``LIKE 'prefix%'``).
+        Returns None when there is no upper bound (prefix of all 'z').
+        """
+        chars = list(prefix)
+        while chars:
+            position = GEOHASH_ALPHABET.index(chars[-1])
+            if position + 1 < len(GEOHASH_ALPHABET):
+                chars[-1] = GEOHASH_ALPHABET[position + 1]
+                return "".join(chars)
+            chars.pop()
+        return None
+
+    @staticmethod
+    def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        phi1, phi2 = math.radians(lat1), math.radians(lat2)
+        d_phi = phi2 - phi1
+        d_lambda = math.radians(lng2 - lng1)
+        a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+        return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+    @staticmethod
+    def radius_bounds(lat: float, lng: float, radius_meters: float) -> tuple[float, float, float, float]:
+        """Bounding box ``(min_lat, min_lng, max_lat, max_lng)`` enclosing a circle."""
+        d_lat = math.degrees(radius_meters / EARTH_RADIUS_METERS)
+        cos_lat = max(math.cos(math.radians(lat)), 1e-12)
+        d_lng = min(math.degrees(radius_meters / (EARTH_RADIUS_METERS * cos_lat)), 180.0)
+        return (
+            max(lat - d_lat, -90.0),
+            max(lng - d_lng, -180.0),
+            min(lat + d_lat, 90.0),
+            min(lng + d_lng, 180.0),
+        )
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.idempotency_key import IdempotencyKeyModel
+
+
+class IdempotencyService:
+
+    @staticmethod
+    def _find(db: Session, key: str, caller: str, method: str, path: str) -> IdempotencyKeyModel | None:
+        return (
+            db.query(IdempotencyKeyModel)
+            .filter(
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.caller == caller,
+                IdempotencyKeyModel.method == method,
+                IdempotencyKeyModel.path == path,
+            )
+            .first()
+        )
+
+    @staticmethod
+    def claim(
+        db: Session, key: str, caller: str, method: str, path: str, lock_seconds: int
+    ) -> tuple[bool, IdempotencyKeyModel | None]:
+        """
+        Register the first request made with an Idempotency-Key.
+
+        An expired entry (stored response past its TTL, or a request that never
+        finished within ``lock_seconds``) is replaced.
+
+        Returns:
+            ``(True, None)`` if the caller should run the request, otherwise
+            ``(False, entry)`` with the live entry for the key: a stored response
+            to replay, or a request still running (``response_status`` NULL).
+            The entry is None if a concurrent claim disappeared meanwhile.
+        """
+        now = datetime.utcnow()
+        existing = IdempotencyService._find(db, key, caller, method, path)
+        if existing is not None:
+            if existing.expires_at > now:
+                return False, existing
+            db.delete(existing)
+            db.flush()
+
+        db.add(
+            IdempotencyKeyModel(
+                key=key,
+                caller=caller,
+                method=method,
+                path=path,
+                created_at=now,
+                expires_at=now + timedelta(seconds=lock_seconds),
+            )
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another process claimed the key between the lookup and the insert
+            db.rollback()
+            return False, IdempotencyService._find(db, key, caller, method, path)
+        return True, None
+
+    @staticmethod
+    def complete(
+        db: Session,
+        key: str,
+        caller: str,
+        method: str,
+        path: str,
+        status: int,
+        headers: str,
+        body: bytes,
+        request_hash: str | None,
+        ttl_seconds: int,
+    ) -> None:
+        """Store the response of a claimed request so retries can replay it until the TTL."""
+        db.execute(
+            update(IdempotencyKeyModel)
+            .where(
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.caller == caller,
+                IdempotencyKeyModel.method == method,
+                IdempotencyKeyModel.path == path,
+            )
+            .values(
+                response_status=status,
+                response_headers=headers,
+                response_body=body,
+                request_hash=request_hash,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+            )
+        )
+        db.commit()
+
+    @staticmethod
+    def release(db: Session, key: str, caller: str, method: str, path: str) -> None:
+        """Drop a claim whose request failed, so a retry runs it again."""
+        db.execute(
+            delete(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.caller == caller,
+                IdempotencyKeyModel.method == method,
+                IdempotencyKeyModel.path == path,
+                IdempotencyKeyModel.response_status.is_(None),
+            )
+        )
+        db.commit()
+
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """Delete expired entries. Returns the number of rows removed."""
+        removed = db.execute(
+            delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at < datetime.utcnow())
+        ).rowcount
+        db.commit()
+        return removed
@@ -0,0 +1,246 @@
+"""
+Thumbnails and web previews of result images, made off the request path.
+
+Decoding a camera-size photo and resampling it costs tens to hundreds of
+milliseconds of CPU under the GIL, so ``image_derivatives`` renders on a
+separate process pool, like password hashing. Fetching the source, uploading
+the derived files and saving their URLs run on a small thread pool. Work beyond
+``IMAGE_DERIVATIVE_MAX_PENDING`` is dropped and counted; those results keep
+NULL derivative URLs until ``python -m app.commands.backfill_derivatives``.
+"""
+import io
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from app import metrics
+from app.config import settings
+from app.database import SessionLocal
+from app.services.result_service import ResultService
+from app.services.storage_service import (
+    ImageSourceNotAllowedError,
+    derivative_blob_name,
+    get_storage_service,
+)
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL = "original"
+RESULT = "result"
+THUMBNAIL = "thumbnail"
+PREVIEW = "preview"
+
+_CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_queue_depth = metrics.gauge(
+    "image_derivative_queue_depth", "Images queued or being processed for thumbnails/previews"
+)
+_dropped = metrics.counter(
+    "image_derivative_dropped_total", "Images skipped because the derivative queue was full", ["source"]
+)
+_failures = metrics.counter(
+    "image_derivative_failures_total", "Images whose thumbnails/previews could not be made", ["source"]
+)
+_duration = metrics.histogram(
+    "image_derivative_seconds", "Time to fetch, render, store and record an image's derivatives", ["source"]
+)
+
+
+def _encode(image, image_format: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if image_format == "webp":
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _render_derivatives(
+    data: bytes,
+    thumbnail_size: int,
+    preview_max_size: int,
+    image_format: str,
+    quality: int,
+) -> dict[str, bytes] | None:
+    # Imported here so the API process never pays for Pillow; only pool workers load it
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            # Lets the JPEG decoder scale down by up to 1/8 while decoding
+            source.draft("RGB", (preview_max_size, preview_max_size))
+            image = ImageOps.exif_transpose(source)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError):
+        # Not a decodable image; there is nothing to derive
+        return None
+
+    preview = image.copy()
+    preview.thumbnail((preview_max_size, preview_max_size), Image.Resampling.LANCZOS)
+    # Square, center-cropped, so list grids get uniform tiles
+    thumbnail = ImageOps.fit(preview, (thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+    # EXIF (including GPS) is not copied to the derived files
+    return {
+        THUMBNAIL: _encode(thumbnail, image_format, quality),
+        PREVIEW: _encode(preview, image_format, quality),
+    }
+
+
+class ImageDerivativeService:
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        thumbnail_size: int,
+        preview_max_size: int,
+        image_format: str,
+        quality: int,
+    ):
+        image_format = image_format.lower()
+        if image_format not in _CONTENT_TYPES:
+            raise ValueError(f"Unknown DERIVATIVE_FORMAT: {image_format}")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.thumbnail_size = thumbnail_size
+        self.preview_max_size = preview_max_size
+        self.image_format = image_format
+        self.quality = quality
+        self._processes: ProcessPoolExecutor | None = None
+        self._threads: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        _queue_depth.set_function(lambda: self._pending)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._processes is None:
+                # spawn for the same reason as the password pool: never fork a
+                # process that is running the event loop and DB/HTTP pools
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                # Twice the processes, so uploads overlap with rendering
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.workers * 2, thread_name_prefix="image-derivatives"
+                )
+                logger.info("Image derivative pool started with %d processes", self.workers)
+
+    def shutdown(self) -> None:
+        """Stop the pools; queued images are dropped and left for backfill."""
+        with self._lock:
+            processes, self._processes = self._processes, None
+            threads, self._threads = self._threads, None
+        if threads is not None:
+            threads.shutdown(wait=True, cancel_futures=True)
+        if processes is not None:
+            processes.shutdown(wait=True, cancel_futures=True)
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(
+        self,
+        result_id: int,
+        source: str,
+        image_url: str,
+        data: bytes | None = None,
+    ) -> Future | None:
+        """
+        Queue the thumbnail and preview of one image of a result.
+
+        Args:
+            result_id: ID of the result
+            source: ORIGINAL or RESULT
+            image_url: URL of the image
+            data: The image bytes when already in memory (normalized uploads); otherwise
+                the image is read back from storage
+
+        Returns:
+            A future for ``generate``'s outcome, or None when the queue is full
+        """
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                _dropped.inc(source=source)
+                return None
+            self._pending += 1
+            try:
+                future = self._threads.submit(self.generate, result_id, source, image_url, data)
+            except Exception:
+                self._pending -= 1
+                raise
+        future.add_done_callback(self._release)
+        return future
+
+    def generate(
+        self,
+        result_id: int,
+        source: str,
+        image_url: str,
+        data: bytes | None = None,
+    ) -> bool:
+        """
+        Render, store and record the derivatives of one image, blocking until done.
+
+        Returns:
+            True if the URLs were saved; False if the image could not be
+            processed or the result no longer points at ``image_url``
+        """
+        self.start()
+        started = time.perf_counter()
+        try:
+            storage = get_storage_service()
+            if data is None:
+                data = storage.download_image(image_url)
+            rendered = self._processes.submit(
+                _render_derivatives,
+                data,
+                self.thumbnail_size,
+                self.preview_max_size,
+                self.image_format,
+                self.quality,
+            ).result()
+            if rendered is None:
+                _failures.inc(source=source)
+                logger.warning("The %s image of result %s is not a decodable image", source, result_id)
+                return False
+            urls = {
+                kind: storage.upload_blob(
+                    derivative_blob_name(kind, source, image_url, self.image_format),
+                    body,
+                    _CONTENT_TYPES[self.image_format],
+                )
+                for kind, body in rendered.items()
+            }
+
+            db = SessionLocal()
+            try:
+                return ResultService.set_image_derivatives(
+                    db, result_id, source, image_url, urls[THUMBNAIL], urls[PREVIEW]
+                )
+            finally:
+                db.close()
+        except ImageSourceNotAllowedError as e:
+            _failures.inc(source=source)
+            logger.warning("Skipping derivatives of the %s image of result %s: %s", source, result_id, e)
+            return False
+        except Exception:
+            _failures.inc(source=source)
+            logger.exception("Could not make derivatives of the %s image of result %s", source, result_id)
+            return False
+        finally:
+            _duration.observe(time.perf_counter() - started, source=source)
+
+
+image_derivatives = ImageDerivativeService(
+    workers=settings.IMAGE_DERIVATIVE_WORKERS,
+    max_pending=settings.IMAGE_DERIVATIVE_MAX_PENDING,
+    thumbnail_size=settings.THUMBNAIL_SIZE,
+    preview_max_size=settings.PREVIEW_MAX_SIZE,
+    image_format=settings.DERIVATIVE_FORMAT,
+    quality=settings.DERIVATIVE_QUALITY,
+)
@@ -0,0 +1,154 @@
+"""
+Optional normalization of uploads before they are stored and detected.
+
+Phones send photos far larger than the detector's input size. With
+``UPLOAD_NORMALIZE_ENABLED`` each upload is decoded, rotated upright from its
+EXIF orientation, resized to ``UPLOAD_MAX_DIMENSION`` and re-encoded as JPEG
+before it reaches storage, so storage, egress and the detector all handle
+the smaller file. The work runs on a separate process pool like password
+hashing; when ``UPLOAD_NORMALIZE_MAX_PENDING`` images are already queued, the
+upload is stored as sent instead of waiting.
+"""
+import asyncio
+import io
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FILE_EXTENSION = "jpg"
+CONTENT_TYPE = "image/jpeg"
+
+_outcomes = metrics.counter(
+    "upload_normalize_total",
+    "Uploads by normalization outcome (resized, kept as sent, skipped when busy, invalid)",
+    ["outcome"],
+)
+_bytes_saved = metrics.counter(
+    "upload_normalize_bytes_saved_total", "Bytes removed from uploads by normalization"
+)
+_duration = metrics.histogram(
+    "upload_normalize_seconds", "Time from submitting an upload for normalization to its result"
+)
+
+
+class InvalidImageError(Exception):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+def _normalize_image(data: bytes, max_dimension: int, quality: int) -> bytes | None:
+    # Imported here so the API process never pays for Pillow; only pool workers load it
+    from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            orientation = source.getexif().get(ExifTags.Base.Orientation, 1)
+            if source.format == "JPEG" and max(source.size) <= max_dimension and orientation == 1:
+                # Already small and upright; re-encoding would only lose quality
+                return None
+            # Lets the JPEG decoder scale down by up to 1/8 while decoding
+            scale = min(1.0, max_dimension / max(source.size))
+            source.draft("RGB", (math.ceil(source.width * scale), math.ceil(source.height * scale)))
+            image = ImageOps.exif_transpose(source)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImageError(str(e))
+
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    # EXIF (including GPS) is dropped; coordinates come from the upload form
+    image.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+class ImageNormalizer:
+    def __init__(self, workers: int, max_pending: int, max_dimension: int, quality: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # spawn for the same reason as the password pool: never fork a
+                # process that is running the event loop and DB/HTTP pools
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Upload normalizer started with %d processes", self.workers)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, data: bytes) -> Future | None:
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+            try:
+                future = self._executor.submit(_normalize_image, data, self.max_dimension, self.quality)
+            except Exception:
+                self._pending -= 1
+                raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def normalize(self, data: bytes) -> bytes | None:
+        """
+        Normalize one uploaded image.
+
+        Returns:
+            The re-encoded JPEG, or None when the upload should be stored as
+            sent (it already fits, or the pool is full)
+
+        Raises:
+            InvalidImageError: If the upload is not a decodable image
+        """
+        future = self._submit(data)
+        if future is None:
+            _outcomes.inc(outcome="skipped")
+            return None
+
+        started = time.perf_counter()
+        try:
+            normalized = await asyncio.wrap_future(future)
+        except InvalidImageError:
+            _outcomes.inc(outcome="invalid")
+            raise
+        finally:
+            _duration.observe(time.perf_counter() - started)
+
+        if normalized is None:
+            _outcomes.inc(outcome="kept")
+            return None
+        _outcomes.inc(outcome="resized")
+        _bytes_saved.inc(max(0, len(data) - len(normalized)))
+        return normalized
+
+
+image_normalizer = ImageNormalizer(
+    workers=settings.UPLOAD_NORMALIZE_WORKERS,
+    max_pending=settings.UPLOAD_NORMALIZE_MAX_PENDING,
+    max_dimension=settings.UPLOAD_MAX_DIMENSION,
+    quality=settings.UPLOAD_JPEG_QUALITY,
+)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import unquote
+from app.config import settings
+from app.services.storage_service import fetch_image_url, hash_image_stream, original_blob_name
+
+
+class LocalStorageService:
+    """Filesystem stand-in for GCPStorageService, used in development and tests."""
+
+    def __init__(self):
+        self.base_path = Path(settings.LOCAL_STORAGE_PATH)
+        try:
+            (self.base_path / "original").mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise Exception(f"Failed to initialize local storage at {self.base_path}: {str(e)}")
+
+    def close(self):
+        """Nothing to release; kept for parity with GCPStorageService."""
+
+    @staticmethod
+    def _partial_path(target: Path) -> Path:
+        # Unique per write: concurrent uploads of identical content share the target name
+        return target.with_name(f".{target.name}.{uuid.uuid4().hex}.partial")
+
+    def _public_url(self, blob_name: str) -> str:
+        if settings.LOCAL_STORAGE_BASE_URL:
+            return f"{settings.LOCAL_STORAGE_BASE_URL.rstrip('/')}/{blob_name}"
+        return (self.base_path / blob_name).resolve().as_uri()
+
+    def upload_image(
+        self,
+        image_data: bytes,
+        file_extension: str = "jpg",
+        content_hash: str | None = None,
+    ) -> str:
+        """
+        Write an image to the local 'original' folder, named after its SHA-256.
+
+        Args:
+            image_data: The image file data as bytes
+            file_extension: File extension (default: jpg)
+            content_hash: Name the blob after this SHA-256 instead of the data's, e.g.
+                the hash of the original upload for a normalized copy
+
+        Returns:
+            The URL of the stored file
+        """
+        try:
+            if content_hash is None:
+                content_hash = hashlib.sha256(image_data).hexdigest()
+            blob_name = original_blob_name(file_extension, content_hash)
+            target = self.base_path / blob_name
+            if not target.exists():
+                target.write_bytes(image_data)
+            return self._public_url(blob_name)
+        except OSError as e:
+            raise Exception(f"Failed to upload image to local storage: {str(e)}")
+
+    def upload_image_stream(
+        self,
+        file_obj: BinaryIO,
+        file_extension: str = "jpg",
+        content_hash: str | None = None,
+    ) -> str:
+        """
+        Copy an image to the local 'original' folder in ``UPLOAD_CHUNK_SIZE`` chunks.
+
+        The file is named after its content hash and skipped if already present.
+        It is written under a temporary name and renamed once complete, so
+        readers never observe a partially written image.
+
+        Args:
+            file_obj: Readable, seekable binary file object
+            file_extension: File extension (default: jpg)
+            content_hash: SHA-256 from ``hash_image_stream``, computed here if omitted
+
+        Returns:
+            The URL of the stored file
+        """
+        if content_hash is None:
+            content_hash = hash_image_stream(file_obj)
+        blob_name = original_blob_name(file_extension, content_hash)
+        target = self.base_path / blob_name
+        if target.exists():
+            return self._public_url(blob_name)
+        partial = self._partial_path(target)
+        try:
+            with open(partial, "wb") as out:
+                shutil.copyfileobj(file_obj, out, settings.UPLOAD_CHUNK_SIZE)
+            os.replace(partial, target)
+            return self._public_url(blob_name)
+        except OSError as e:
+            partial.unlink(missing_ok=True)
+            raise Exception(f"Failed to upload image to local storage: {str(e)}")
+
+    def upload_blob(self, blob_name: str, data: bytes, content_type: str) -> str:
+        """
+        Write bytes under an explicit blob name, e.g. a thumbnail from
+        ``derivative_blob_name``.
+
+        Returns:
+            The URL of the stored file
+        """
+        target = self.base_path / blob_name
+        partial = self._partial_path(target)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            partial.write_bytes(data)
+            os.replace(partial, target)
+            return self._public_url(blob_name)
+        except OSError as e:
+            partial.unlink(missing_ok=True)
+            raise Exception(f"Failed to upload {blob_name} to local storage: {str(e)}")
+
+    def _local_path(self, image_url: str) -> Path | None:
+        # Only URLs made by _public_url map to files, and never outside base_path
+        base_url = f"{self._public_url('').rstrip('/')}/"
+        if not image_url.startswith(base_url):
+            return None
+        path = (self.base_path / unquote(image_url[len(base_url):])).resolve()
+        if not path.is_relative_to(self.base_path.resolve()):
+            return None
+        return path
+
+    def download_image(self, image_url: str) -> bytes:
+        """
+        Read an image by its URL, from the local folder when it is stored there.
+
+        Returns:
+            The image bytes
+        """
+        path = self._local_path(image_url)
+        if path is None:
+            return fetch_image_url(image_url)
+        try:
+            return path.read_bytes()
+        except OSError as e:
+            raise Exception(f"Failed to read image from local storage: {str(e)}")
@@ -0,0 +1,150 @@
+"""
+Password hashing on a dedicated, bounded process pool.
+
+bcrypt is deliberately CPU-heavy (~250 ms per call at cost 12) and holds the GIL,
+so running it on the request threadpool lets a burst of logins starve every other
+endpoint. ``password_hasher`` runs it in separate processes instead, rejecting
+work with ``PasswordHasherBusy`` once ``PASSWORD_HASH_MAX_PENDING`` calls are
+queued so callers can answer 503 rather than pile up.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+import bcrypt
+from fastapi import HTTPException, status
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_queue_depth = metrics.gauge(
+    "password_hash_queue_depth", "Password hash/verify calls queued or running"
+)
+_rejected = metrics.counter(
+    "password_hash_rejected_total", "Password hash/verify calls rejected because the pool was full"
+)
+_duration = metrics.histogram(
+    "password_hash_seconds", "Time from submitting a password operation to its result", ["operation"]
+)
+_rehashed = metrics.counter(
+    "password_rehash_total", "Stored password hashes upgraded to the configured cost on login"
+)
+
+
+def _hash_password(plain_password: str, rounds: int) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(plain_password.encode("utf-8"), salt).decode("utf-8")
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode("utf-8"),
+            hashed_password.encode("utf-8"),
+        )
+    except ValueError:
+        return False
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password pool already has the maximum number of pending calls."""
+
+
+def password_pool_busy() -> HTTPException:
+    """The 503 answered for PasswordHasherBusy, asking the client to retry shortly."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        _queue_depth.set_function(lambda: self._pending)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs the event loop and
+                # DB/HTTP pools would copy their threads' locks mid-use
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Password hasher started with %d processes", self.workers)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args) -> Future:
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                _rejected.inc()
+                raise PasswordHasherBusy()
+            self._pending += 1
+            try:
+                future = self._executor.submit(fn, *args)
+            except Exception:
+                self._pending -= 1
+                raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def _run(self, operation: str, fn, *args):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(self._submit(fn, *args))
+        finally:
+            _duration.observe(time.perf_counter() - started, operation=operation)
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._run("hash", _hash_password, plain_password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", _verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when a stored hash was made with a cost other than BCRYPT_ROUNDS."""
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    async def upgrade_if_needed(self, plain_password: str, hashed_password: str) -> str | None:
+        """
+        Return a fresh hash at the configured cost after a successful login, or
+        None when the stored hash is current. Failing to rehash never fails the login.
+        """
+        if not self.needs_rehash(hashed_password):
+            return None
+        try:
+            new_hash = await self.hash(plain_password)
+        except PasswordHasherBusy:
+            return None
+        _rehashed.inc()
+        return new_hash
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
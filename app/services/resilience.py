@@ -0,0 +1,164 @@
+"""
+Circuit breaker and adaptive concurrency limiter for calls to a remote service.
+
+Both are thread-safe and export their state through ``app.metrics`` under the
+``name`` they are created with.
+"""
+import enum
+import threading
+import time
+from app import metrics
+
+_breaker_state = metrics.gauge(
+    "circuit_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ["name"]
+)
+_breaker_transitions = metrics.counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes", ["name", "state"]
+)
+_breaker_rejected = metrics.counter(
+    "circuit_breaker_rejected_total", "Calls failed fast because the circuit was open", ["name"]
+)
+_limiter_limit = metrics.gauge(
+    "adaptive_concurrency_limit", "Current AIMD concurrency window", ["name"]
+)
+_limiter_in_flight = metrics.gauge(
+    "adaptive_concurrency_in_flight", "Calls currently holding a limiter slot", ["name"]
+)
+
+
+class CircuitState(enum.IntEnum):
+    closed = 0
+    half_open = 1
+    open = 2
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and fails calls fast
+    for ``reset_seconds``. It then lets a single probe call through (half-open):
+    success closes the circuit, failure opens it for another period.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = CircuitState.closed
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        _breaker_state.set_function(lambda: self.state, name=name)
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.open and self._retry_after() <= 0:
+                return CircuitState.half_open
+            return self._state
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self.reset_seconds - time.monotonic()
+
+    def retry_after(self) -> float:
+        """Seconds until a probe call is allowed; 0 when calls go through."""
+        with self._lock:
+            if self._state != CircuitState.open:
+                return 0.0
+            return max(0.0, self._retry_after())
+
+    def _transition(self, state: CircuitState) -> None:
+        if self._state != state:
+            self._state = state
+            _breaker_transitions.inc(name=self.name, state=state.name)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may proceed now."""
+        with self._lock:
+            if self._state == CircuitState.closed:
+                return
+            if self._state == CircuitState.open:
+                retry_after = self._retry_after()
+                if retry_after > 0:
+                    _breaker_rejected.inc(name=self.name)
+                    raise CircuitOpenError(self.name, retry_after)
+                self._transition(CircuitState.half_open)
+            if self._probing:
+                _breaker_rejected.inc(name=self.name)
+                raise CircuitOpenError(self.name, self.reset_seconds)
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._transition(CircuitState.closed)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == CircuitState.half_open or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(CircuitState.open)
+
+
+class AIMDLimiter:
+    """
+    Additive-increase/multiplicative-decrease concurrency window.
+
+    Each call that succeeds within ``target_latency`` grows the window by
+    ``1 / window`` (about one slot per window's worth of calls); a failure or
+    a slow call halves it, at most once per ``target_latency`` so a burst of
+    failures from the same window counts once. The window stays between
+    ``min_limit`` and ``max_limit``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        backoff_ratio: float = 0.5,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(max_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        _limiter_limit.set_function(lambda: int(self._limit), name=name)
+        _limiter_in_flight.set_function(lambda: self._in_flight, name=name)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        """Block until the call fits in the current window."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, ok: bool) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if ok and latency <= self.target_latency:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            elif time.monotonic() - self._last_decrease >= self.target_latency:
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                self._last_decrease = time.monotonic()
+            self._condition.notify_all()
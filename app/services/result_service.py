@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import heapq
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import Iterator, Optional
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import and_, desc, func, or_, tuple_, update
 from app.models.result import ResultModel
 from app.models.campaign import CampaignModel
 from app.models.user import UserModel, AddressModel
 from app.models.enums.result import ResultStatus, ResultType
+from app.services.detection_job_service import DetectionJobService
+from app.services.geo_service import GeoService
+from app.services.result_stats_service import ResultStatsService
 
 
 class CampaignNotFoundError(Exception):
@@ -18,8 +23,35 @@ class UserNotFoundError(Exception):
     """Raised when the user does not exist."""
 
 
+@dataclass(frozen=True)
+class UploadTarget:
+    """A checked user/campaign pair and the defaults every uploaded result inherits."""
+
+    user_id: int
+    campaign_id: Optional[int]
+    city: Optional[str]
+    address_lat: Optional[float]
+    address_lng: Optional[float]
+
+
 class ResultService:
 
+    @staticmethod
+    def _invalidate_map_tiles(
+        lat: Optional[float],
+        lng: Optional[float],
+        before: Optional[dict],
+        after: Optional[dict],
+    ) -> None:
+        """Drop cached map tiles for a result that entered, left or changed while finished."""
+        if any(
+            snapshot is not None and snapshot["status"] == ResultStatus.finished
+            for snapshot in (before, after)
+        ):
+            # Imported here: the tile service itself queries through ResultService
+            from app.services.tile_service import tile_service
+            tile_service.invalidate_point(lat, lng)
+
     @staticmethod
     def get_result_by_id(db: Session, result_id: int) -> ResultModel | None:
         return db.query(ResultModel).filter(ResultModel.id == result_id).first()
@@ -39,10 +71,14 @@ class ResultService:
         except ValueError:
             return None, "INVALID_STATUS"
 
+        before = ResultStatsService.snapshot(result)
         result.status = new_status
+        after = ResultStatsService.snapshot(result)
+        ResultStatsService.record_change(db, before, after)
 
         db.commit()
         db.refresh(result)
+        ResultService._invalidate_map_tiles(result.lat, result.lng, before, after)
         return result, None
 
     @staticmethod
@@ -57,6 +93,31 @@ class ResultService:
         if result is None:
             return None, "RESULT_NOT_FOUND"
 
+        new_status, error = ResultService._check_image_update(status, object_count)
+        if error:
+            return None, error
+
+        before = ResultStatsService.snapshot(result)
+        if result.result_image != result_image:
+            result.result_thumbnail = None
+            result.result_preview = None
+        result.result_image = result_image
+        result.status = new_status
+        result.object_count = object_count
+        
+        # Set processed_at timestamp when status is finished
+        if new_status == ResultStatus.finished:
+            result.processed_at = datetime.utcnow()
+
+        after = ResultStatsService.snapshot(result)
+        ResultStatsService.record_change(db, before, after)
+        db.commit()
+        db.refresh(result)
+        ResultService._invalidate_map_tiles(result.lat, result.lng, before, after)
+        return result, None
+
+    @staticmethod
+    def _check_image_update(status, object_count: Optional[int]) -> tuple[ResultStatus | None, str | None]:
         try:
             new_status = status if isinstance(status, ResultStatus) else ResultStatus(status)
         except ValueError:
@@ -70,17 +131,148 @@ class ResultService:
         if new_status == ResultStatus.finished and object_count is None:
             return None, "OBJECT_COUNT_REQUIRED_FOR_FINISHED"
 
-        result.result_image = result_image
-        result.status = new_status
-        result.object_count = object_count
-        
-        # Set processed_at timestamp when status is finished
-        if new_status == ResultStatus.finished:
-            result.processed_at = datetime.utcnow()
+        return new_status, None
+
+    @staticmethod
+    def update_result_images(
+        db: Session,
+        updates: list[tuple[int, str, object, Optional[int]]],
+    ) -> list[str | None]:
+        """
+        Apply many detector callbacks in one transaction.
+
+        The results are read with one SELECT and written with one executemany
+        UPDATE per status, and the aggregates are updated once for the batch.
 
+        Args:
+            db: Database session
+            updates: ``(result_id, result_image, status, object_count)`` per callback
+
+        Returns:
+            One error code per update, in order, or None where it was applied.
+            Codes match update_result_image_and_status, plus DUPLICATE_RESULT_ID
+            for a result that already appeared earlier in the batch.
+        """
+        errors: list[str | None] = [None] * len(updates)
+        checked: dict[int, tuple[int, str, ResultStatus, Optional[int]]] = {}
+        for index, (result_id, result_image, status, object_count) in enumerate(updates):
+            if result_id in checked:
+                errors[index] = "DUPLICATE_RESULT_ID"
+                continue
+            new_status, error = ResultService._check_image_update(status, object_count)
+            if error:
+                errors[index] = error
+                continue
+            checked[result_id] = (index, result_image, new_status, object_count)
+
+        results = {}
+        if checked:
+            results = {
+                result.id: result
+                for result in db.query(ResultModel).filter(ResultModel.id.in_(list(checked)))
+            }
+
+        now = datetime.utcnow()
+        # processed_at is only written for finished results, so the two statuses
+        # need different UPDATE statements
+        rows_by_status: dict[ResultStatus, list[dict]] = {}
+        changes = []
+        tiles = []
+        for result_id, (index, result_image, new_status, object_count) in checked.items():
+            result = results.get(result_id)
+            if result is None:
+                errors[index] = "RESULT_NOT_FOUND"
+                continue
+
+            before = ResultStatsService.snapshot(result)
+            after = {**before, "status": new_status, "object_count": object_count}
+            changes.append((before, after))
+            tiles.append((result.lat, result.lng, before, after))
+
+            row = {
+                "id": result_id,
+                "result_image": result_image,
+                "status": new_status,
+                "object_count": object_count,
+            }
+            if result.result_image != result_image:
+                # Derivatives of a previous result image no longer apply
+                row["result_thumbnail"] = None
+                row["result_preview"] = None
+            if new_status == ResultStatus.finished:
+                row["processed_at"] = now
+            rows_by_status.setdefault(new_status, []).append(row)
+
+        for rows in rows_by_status.values():
+            db.execute(update(ResultModel), rows)
+        ResultStatsService.record_changes(db, changes)
         db.commit()
-        db.refresh(result)
-        return result, None
+
+        for lat, lng, before, after in tiles:
+            ResultService._invalidate_map_tiles(lat, lng, before, after)
+        return errors
+
+    @staticmethod
+    def set_image_derivatives(
+        db: Session,
+        result_id: int,
+        source: str,
+        image_url: str,
+        thumbnail_url: str,
+        preview_url: str,
+    ) -> bool:
+        """
+        Save the thumbnail and preview URLs of a result's original or detection image.
+
+        The row is only updated while it still points at ``image_url``, so
+        derivatives of a result image that was replaced meanwhile are discarded.
+
+        Args:
+            db: Database session
+            result_id: ID of the result
+            source: "original" or "result"
+            image_url: The image the derivatives were made from
+            thumbnail_url: URL of the thumbnail
+            preview_url: URL of the preview
+
+        Returns:
+            True if the result was updated
+        """
+        image_column = {
+            "original": ResultModel.original_image,
+            "result": ResultModel.result_image,
+        }[source]
+        updated = db.execute(
+            update(ResultModel)
+            .where(ResultModel.id == result_id, image_column == image_url)
+            .values({f"{source}_thumbnail": thumbnail_url, f"{source}_preview": preview_url})
+        ).rowcount
+        db.commit()
+        return updated > 0
+
+    @staticmethod
+    def get_results_missing_derivatives(db: Session, after_id: int, limit: int) -> list[ResultModel]:
+        """
+        Get results, in id order after ``after_id``, whose original image or
+        finished detection image has no thumbnail yet.
+        """
+        return (
+            db.query(ResultModel)
+            .filter(
+                ResultModel.id > after_id,
+                or_(
+                    ResultModel.original_thumbnail.is_(None),
+                    and_(
+                        ResultModel.status == ResultStatus.finished,
+                        ResultModel.result_image.isnot(None),
+                        ResultModel.result_thumbnail.is_(None),
+                    ),
+                ),
+            )
+            .order_by(ResultModel.id)
+            .limit(limit)
+            .all()
+        )
 
     @staticmethod
     def update_result_feedback(
@@ -93,8 +285,10 @@ class ResultService:
         if result is None:
             return None, "RESULT_NOT_FOUND"
 
+        before = ResultStatsService.snapshot(result)
         result.feedback_like = like
         result.feedback_comment = comment
+        ResultStatsService.record_change(db, before, ResultStatsService.snapshot(result))
 
         db.commit()
         db.refresh(result)
@@ -116,13 +310,78 @@ class ResultService:
         if result is None:
             return False, "RESULT_NOT_FOUND"
         
+        before = ResultStatsService.snapshot(result)
+        lat, lng = result.lat, result.lng
+        ResultStatsService.record_change(db, before, None)
         db.delete(result)
         db.commit()
+        ResultService._invalidate_map_tiles(lat, lng, before, None)
         return True, None
 
     @staticmethod
-    def get_all_results(db: Session) -> list[ResultModel]:
-        return db.query(ResultModel).order_by(desc(ResultModel.created_at)).all()
+    def _filtered_results_query(
+        db: Session,
+        status: Optional[ResultStatus] = None,
+        result_type: Optional[ResultType] = None,
+        campaign_id: Optional[int] = None,
+    ) -> Query:
+        query = db.query(ResultModel)
+        if status is not None:
+            query = query.filter(ResultModel.status == status)
+        if result_type is not None:
+            query = query.filter(ResultModel.type == result_type)
+        if campaign_id is not None:
+            query = query.filter(ResultModel.campaign_id == campaign_id)
+        return query.order_by(desc(ResultModel.created_at), desc(ResultModel.id))
+
+    @staticmethod
+    def get_all_results(
+        db: Session,
+        status: Optional[ResultStatus] = None,
+        result_type: Optional[ResultType] = None,
+        campaign_id: Optional[int] = None,
+    ) -> list[ResultModel]:
+        return ResultService._filtered_results_query(db, status, result_type, campaign_id).all()
+
+    @staticmethod
+    def get_results_page(
+        db: Session,
+        limit: int,
+        after: Optional[tuple[datetime, int]] = None,
+        status: Optional[ResultStatus] = None,
+        result_type: Optional[ResultType] = None,
+        campaign_id: Optional[int] = None,
+    ) -> list[ResultModel]:
+        """
+        Get one page of results, newest first, using keyset pagination.
+
+        Args:
+            db: Database session
+            limit: Maximum number of results to return
+            after: ``(created_at, id)`` of the last result of the previous page
+            status: Optional status filter
+            result_type: Optional type filter
+            campaign_id: Optional campaign filter
+
+        Returns:
+            Up to ``limit`` results strictly after ``after`` in ``(created_at, id)`` order
+        """
+        query = ResultService._filtered_results_query(db, status, result_type, campaign_id)
+        if after is not None:
+            query = query.filter(tuple_(ResultModel.created_at, ResultModel.id) < tuple_(*after))
+        return query.limit(limit).all()
+
+    @staticmethod
+    def iter_results(
+        db: Session,
+        batch_size: int,
+        status: Optional[ResultStatus] = None,
+        result_type: Optional[ResultType] = None,
+        campaign_id: Optional[int] = None,
+    ) -> Iterator[ResultModel]:
+        """Iterate over all matching results, fetching ``batch_size`` rows at a time."""
+        query = ResultService._filtered_results_query(db, status, result_type, campaign_id)
+        yield from query.yield_per(batch_size)
 
     @staticmethod
     def get_results_by_user(db: Session, user_id: int) -> list[ResultModel]:
@@ -134,61 +393,195 @@ class ResultService:
         )
 
     @staticmethod
-    def get_results_by_city(db: Session, city: str) -> list[ResultModel]:
+    def get_results_by_city(
+        db: Session,
+        city: str,
+        limit: Optional[int] = None,
+        after: Optional[tuple[datetime, int]] = None,
+    ) -> list[ResultModel]:
         """
-        Get all results associated with users located in the specified city.
+        Get the results uploaded in the specified city, newest first.
         
         Args:
             db: Database session
             city: Name of the city to filter by
+            limit: Optional page size
+            after: ``(created_at, id)`` of the last result of the previous page
             
         Returns:
-            List of ResultModel instances for users in the specified city
+            List of ResultModel instances for the specified city
         """
-        return (
+        query = (
             db.query(ResultModel)
-            .join(UserModel, ResultModel.user_id == UserModel.id)
-            .join(AddressModel, UserModel.id == AddressModel.user_id)
-            .filter(AddressModel.city == city)
-            .order_by(desc(ResultModel.created_at))
-            .all()
+            .filter(ResultModel.city == city)
+            .order_by(desc(ResultModel.created_at), desc(ResultModel.id))
         )
+        if after is not None:
+            query = query.filter(tuple_(ResultModel.created_at, ResultModel.id) < tuple_(*after))
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
 
     @staticmethod
-    def create_result_from_upload(
+    def _in_bounds_criteria(
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+    ) -> list:
+        """
+        Filter criteria for results inside a bounding box.
+
+        The box is first narrowed to a few geohash prefix ranges on the indexed
+        ``geohash`` column, then filtered exactly on ``lat``/``lng``.
+        """
+        criteria = [
+            ResultModel.lat.between(min_lat, max_lat),
+            ResultModel.lng.between(min_lng, max_lng),
+        ]
+
+        prefix_ranges = []
+        for prefix in GeoService.covering_prefixes(min_lat, min_lng, max_lat, max_lng):
+            upper_bound = GeoService.prefix_upper_bound(prefix)
+            if upper_bound is None:
+                prefix_ranges.append(ResultModel.geohash >= prefix)
+            else:
+                prefix_ranges.append(
+                    and_(ResultModel.geohash >= prefix, ResultModel.geohash < upper_bound)
+                )
+        if prefix_ranges:
+            criteria.append(or_(*prefix_ranges))
+        return criteria
+
+    @staticmethod
+    def get_results_in_bounds(
         db: Session,
-        image_url: str,
-        user_id: int,
-        campaign_id: Optional[int] = None,
-        result_type: Optional[ResultType] = None,
-        lat: Optional[str] = None,
-        lng: Optional[str] = None,
-    ) -> ResultModel:
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        limit: Optional[int] = None,
+        status: Optional[ResultStatus] = None,
+    ) -> list[ResultModel]:
+        """Get the results whose coordinates fall inside a bounding box, newest first."""
+        query = db.query(ResultModel).filter(
+            *ResultService._in_bounds_criteria(min_lat, min_lng, max_lat, max_lng)
+        )
+        if status is not None:
+            query = query.filter(ResultModel.status == status)
+
+        query = query.order_by(desc(ResultModel.created_at), desc(ResultModel.id))
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def get_points_in_bounds(
+        db: Session,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        status: Optional[ResultStatus] = None,
+    ) -> list[tuple[float, float, Optional[int]]]:
+        """Get ``(lat, lng, object_count)`` rows inside a bounding box, without loading models."""
+        query = db.query(ResultModel.lat, ResultModel.lng, ResultModel.object_count).filter(
+            *ResultService._in_bounds_criteria(min_lat, min_lng, max_lat, max_lng)
+        )
+        if status is not None:
+            query = query.filter(ResultModel.status == status)
+        return query.all()
+
+    @staticmethod
+    def get_geohash_cells_in_bounds(
+        db: Session,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        precision: int,
+        status: Optional[ResultStatus] = None,
+    ) -> list[tuple[int, float, float, int]]:
         """
-        Create a result from an uploaded image.
-        
-        Args:
-            db: Database session
-            image_url: The GCP Storage URL of the uploaded image
-            user_id: The ID of the user uploading the image
-            campaign_id: Optional campaign ID
-            result_type: Optional result type, defaults to ResultType.terreno
-            lat: Optional latitude coordinate
-            lng: Optional longitude coordinate
-            
+        Totals of the results inside a bounding box per geohash cell of ``precision``.
+
+        The grouping runs in the database, so the rows returned are bounded by
+        the number of cells rather than the number of results.
+
         Returns:
-            The created ResultModel
-            
+            ``(count, lat_sum, lng_sum, object_count_sum)`` per non-empty cell
+        """
+        query = db.query(
+            func.count(ResultModel.id),
+            func.sum(ResultModel.lat),
+            func.sum(ResultModel.lng),
+            func.coalesce(func.sum(ResultModel.object_count), 0),
+        ).filter(*ResultService._in_bounds_criteria(min_lat, min_lng, max_lat, max_lng))
+        if status is not None:
+            query = query.filter(ResultModel.status == status)
+        return query.group_by(func.substr(ResultModel.geohash, 1, precision)).all()
+
+    @staticmethod
+    def get_results_near(
+        db: Session,
+        lat: float,
+        lng: float,
+        radius_meters: float,
+        limit: Optional[int] = None,
+        status: Optional[ResultStatus] = None,
+    ) -> list[tuple[ResultModel, float]]:
+        """
+        Get the results within ``radius_meters`` of a point, nearest first.
+
+        Returns:
+            ``(result, distance_in_meters)`` pairs
+        """
+        min_lat, min_lng, max_lat, max_lng = GeoService.radius_bounds(lat, lng, radius_meters)
+        # Only (id, lat, lng) of the candidates are read; full rows are loaded
+        # for the ``limit`` nearest alone
+        query = db.query(ResultModel.id, ResultModel.lat, ResultModel.lng).filter(
+            *ResultService._in_bounds_criteria(min_lat, min_lng, max_lat, max_lng)
+        )
+        if status is not None:
+            query = query.filter(ResultModel.status == status)
+
+        within = []
+        for result_id, result_lat, result_lng in query:
+            distance = GeoService.haversine_meters(lat, lng, result_lat, result_lng)
+            if distance <= radius_meters:
+                within.append((distance, result_id))
+        nearest = heapq.nsmallest(limit, within) if limit is not None else sorted(within)
+        if not nearest:
+            return []
+
+        results = {
+            result.id: result
+            for result in db.query(ResultModel).filter(
+                ResultModel.id.in_([result_id for _, result_id in nearest])
+            )
+        }
+        return [
+            (results[result_id], distance)
+            for distance, result_id in nearest
+            if result_id in results
+        ]
+
+    @staticmethod
+    def get_upload_target(
+        db: Session, user_id: int, campaign_id: Optional[int] = None
+    ) -> UploadTarget:
+        """
+        Check that the uploader and campaign exist.
+
         Raises:
             UserNotFoundError: If the user doesn't exist
             CampaignNotFoundError: If the campaign doesn't exist
         """
-        # Verify user exists
         user = db.query(UserModel).filter(UserModel.id == user_id).first()
         if not user:
             raise UserNotFoundError()
 
-        # Verify campaign exists if provided
+        campaign = None
         if campaign_id is not None:
             campaign = (
                 db.query(CampaignModel)
@@ -198,34 +591,112 @@ class ResultService:
             if not campaign:
                 raise CampaignNotFoundError()
 
-        # Set defaults
-        if result_type is None:
-            result_type = ResultType.terreno
+        address = db.query(AddressModel).filter(AddressModel.user_id == user_id).first()
+        if address:
+            city = address.city
+        else:
+            city = campaign.city if campaign is not None else None
 
-        # If coordinates are not provided, use user's address coordinates
+        return UploadTarget(
+            user_id=user_id,
+            campaign_id=campaign_id,
+            city=city,
+            address_lat=address.lat if address else None,
+            address_lng=address.lng if address else None,
+        )
+
+    @staticmethod
+    def find_uploaded_images(
+        db: Session, target: UploadTarget, content_hashes: list[str]
+    ) -> dict[str, ResultModel]:
+        """
+        Find earlier uploads of the same images by the same user to the same campaign.
+
+        Args:
+            db: Database session
+            target: Checked user/campaign from ``get_upload_target``
+            content_hashes: SHA-256 of each image about to be uploaded
+
+        Returns:
+            The latest matching result per content hash; hashes never uploaded are absent
+        """
+        if not content_hashes:
+            return {}
+        query = db.query(ResultModel).filter(
+            ResultModel.content_hash.in_(set(content_hashes)),
+            ResultModel.user_id == target.user_id,
+        )
+        if target.campaign_id is None:
+            query = query.filter(ResultModel.campaign_id.is_(None))
+        else:
+            query = query.filter(ResultModel.campaign_id == target.campaign_id)
+        # Ascending, so the latest result per hash wins in the dict
+        return {result.content_hash: result for result in query.order_by(ResultModel.id)}
+
+    @staticmethod
+    def _new_result(
+        target: UploadTarget,
+        image_url: str,
+        result_type: Optional[ResultType],
+        lat: Optional[float],
+        lng: Optional[float],
+        content_hash: Optional[str] = None,
+    ) -> ResultModel:
+        # Images without coordinates are placed at the user's address
         if lat is None or lng is None:
-            address = db.query(AddressModel).filter(AddressModel.user_id == user_id).first()
-            if address:
-                lat = address.lat if lat is None else lat
-                lng = address.lng if lng is None else lng
+            lat = target.address_lat if lat is None else lat
+            lng = target.address_lng if lng is None else lng
 
-        result = ResultModel(
-            campaign_id=campaign_id,
-            user_id=user_id,
+        return ResultModel(
+            campaign_id=target.campaign_id,
+            user_id=target.user_id,
             original_image=image_url,
+            content_hash=content_hash,
             result_image=None,
-            type=result_type,
+            type=result_type or ResultType.terreno,
             status=ResultStatus.processing,
             created_at=datetime.utcnow(),
             feedback_like=None,
             feedback_comment=None,
             lat=lat,
             lng=lng,
+            geohash=GeoService.encode_geohash(lat, lng) if lat is not None and lng is not None else None,
+            city=target.city,
         )
 
-        result.user = user
+    @staticmethod
+    def create_results_from_uploads(
+        db: Session,
+        target: UploadTarget,
+        uploads: list[tuple[str, Optional[float], Optional[float], Optional[str]]],
+        result_type: Optional[ResultType] = None,
+    ) -> list[int]:
+        """
+        Create the results of a batch upload in one transaction.
+
+        The results and their detection jobs are each written with a single
+        multi-row INSERT, and the aggregates are updated once for the batch.
+
+        Args:
+            db: Database session
+            target: Checked user/campaign from ``get_upload_target``
+            uploads: ``(image_url, lat, lng, content_hash)`` per uploaded image
+            result_type: Optional result type, defaults to ResultType.terreno
 
-        db.add(result)
+        Returns:
+            The ids of the created results, in the order of ``uploads``
+        """
+        results = [
+            ResultService._new_result(target, image_url, result_type, lat, lng, content_hash)
+            for image_url, lat, lng, content_hash in uploads
+        ]
+        db.add_all(results)
+        db.flush()
+        DetectionJobService.add_jobs(db, results)
+        ResultStatsService.record_changes(
+            db, [(None, ResultStatsService.snapshot(result)) for result in results]
+        )
+        # Read before commit expires the instances, which would reload each one
+        result_ids = [result.id for result in results]
         db.commit()
-        db.refresh(result)
-        return result
\ No newline at end of file
+        return result_ids
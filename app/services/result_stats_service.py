@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.models.result import ResultModel
+from app.models.result_stats import ResultStatsModel
+from app.models.enums.result import ResultStatus, ResultType
+from app.models.enums.result_stats import ResultStatsScope
+
+
+STATUS_COLUMNS = {
+    ResultStatus.visualized: "status_visualized",
+    ResultStatus.processing: "status_processing",
+    ResultStatus.finished: "status_finished",
+    ResultStatus.failed: "status_failed",
+}
+TYPE_COLUMNS = {
+    ResultType.terreno: "type_terreno",
+    ResultType.propriedade: "type_propriedade",
+}
+COUNTER_COLUMNS = (
+    "total",
+    *STATUS_COLUMNS.values(),
+    *TYPE_COLUMNS.values(),
+    "object_count_sum",
+    "feedback_likes",
+    "feedback_dislikes",
+)
+
+
+class ResultStatsService:
+    """
+    Maintains ``result_stats``: per-campaign and per-city result totals.
+
+    ResultService takes a ``snapshot`` of a result before and after every
+    change and passes both to ``record_change``, which applies the difference
+    as atomic ``col = col + delta`` updates in the caller's transaction.
+    ``rebuild`` recomputes everything from the ``result`` table.
+    """
+
+    @staticmethod
+    def snapshot(result: ResultModel) -> dict:
+        """Capture the fields of a result that feed the statistics."""
+        return {
+            "campaign_id": result.campaign_id,
+            "city": result.city,
+            "status": result.status,
+            "type": result.type,
+            "object_count": result.object_count,
+            "feedback_like": result.feedback_like,
+        }
+
+    @staticmethod
+    def _scope_keys(snapshot: dict) -> list[tuple[ResultStatsScope, str]]:
+        keys = []
+        if snapshot["campaign_id"] is not None:
+            keys.append((ResultStatsScope.campaign, str(snapshot["campaign_id"])))
+        if snapshot["city"]:
+            keys.append((ResultStatsScope.city, snapshot["city"]))
+        return keys
+
+    @staticmethod
+    def _counters(snapshot: dict) -> Counter:
+        counters = Counter(total=1)
+        counters[STATUS_COLUMNS[snapshot["status"]]] += 1
+        counters[TYPE_COLUMNS[snapshot["type"]]] += 1
+        counters["object_count_sum"] += snapshot["object_count"] or 0
+        if snapshot["feedback_like"] is True:
+            counters["feedback_likes"] += 1
+        elif snapshot["feedback_like"] is False:
+            counters["feedback_dislikes"] += 1
+        return counters
+
+    @staticmethod
+    def record_change(db: Session, before: Optional[dict], after: Optional[dict]) -> None:
+        """
+        Apply the difference between two snapshots of a result to the aggregates.
+
+        Args:
+            db: Database session; the caller commits
+            before: Snapshot before the change, or None for a new result
+            after: Snapshot after the change, or None for a deleted result
+        """
+        ResultStatsService.record_changes(db, [(before, after)])
+
+    @staticmethod
+    def record_changes(
+        db: Session, changes: list[tuple[Optional[dict], Optional[dict]]]
+    ) -> None:
+        """
+        Apply many ``(before, after)`` snapshot pairs at once.
+
+        Deltas are summed first, so each affected aggregate row is updated once
+        however many results changed.
+        """
+        deltas: dict[tuple[ResultStatsScope, str], Counter] = defaultdict(Counter)
+        for before, after in changes:
+            if before is not None:
+                for key in ResultStatsService._scope_keys(before):
+                    deltas[key].subtract(ResultStatsService._counters(before))
+            if after is not None:
+                for key in ResultStatsService._scope_keys(after):
+                    deltas[key].update(ResultStatsService._counters(after))
+
+        for (scope, scope_key), delta in deltas.items():
+            changed = {column: amount for column, amount in delta.items() if amount}
+            if changed:
+                ResultStatsService._increment(db, scope, scope_key, changed)
+
+    @staticmethod
+    def _ensure_row(db: Session, scope: ResultStatsScope, scope_key: str) -> None:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            db.execute(
+                insert(ResultStatsModel)
+                .values(scope=scope, scope_key=scope_key)
+                .on_conflict_do_nothing(index_elements=["scope", "scope_key"])
+            )
+            return
+
+        exists = (
+            db.query(ResultStatsModel.id)
+            .filter(ResultStatsModel.scope == scope, ResultStatsModel.scope_key == scope_key)
+            .first()
+        )
+        if exists is None:
+            db.add(ResultStatsModel(scope=scope, scope_key=scope_key))
+            db.flush()
+
+    @staticmethod
+    def _increment(db: Session, scope: ResultStatsScope, scope_key: str, delta: dict) -> None:
+        ResultStatsService._ensure_row(db, scope, scope_key)
+        db.query(ResultStatsModel).filter(
+            ResultStatsModel.scope == scope,
+            ResultStatsModel.scope_key == scope_key,
+        ).update(
+            {
+                getattr(ResultStatsModel, column): getattr(ResultStatsModel, column) + amount
+                for column, amount in delta.items()
+            },
+            synchronize_session=False,
+        )
+
+    @staticmethod
+    def get_stats(db: Session, scope: ResultStatsScope, scope_key: str) -> ResultStatsModel | None:
+        return (
+            db.query(ResultStatsModel)
+            .filter(ResultStatsModel.scope == scope, ResultStatsModel.scope_key == scope_key)
+            .first()
+        )
+
+    @staticmethod
+    def delete_stats(db: Session, scope: ResultStatsScope, scope_key: str) -> None:
+        db.query(ResultStatsModel).filter(
+            ResultStatsModel.scope == scope,
+            ResultStatsModel.scope_key == scope_key,
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def _aggregate_columns():
+        columns = [func.count(ResultModel.id).label("total")]
+        for status, column in STATUS_COLUMNS.items():
+            columns.append(func.sum(case((ResultModel.status == status, 1), else_=0)).label(column))
+        for result_type, column in TYPE_COLUMNS.items():
+            columns.append(func.sum(case((ResultModel.type == result_type, 1), else_=0)).label(column))
+        columns.append(func.coalesce(func.sum(ResultModel.object_count), 0).label("object_count_sum"))
+        columns.append(func.sum(case((ResultModel.feedback_like.is_(True), 1), else_=0)).label("feedback_likes"))
+        columns.append(func.sum(case((ResultModel.feedback_like.is_(False), 1), else_=0)).label("feedback_dislikes"))
+        return columns
+
+    @staticmethod
+    def compute_stats(db: Session) -> dict[tuple[ResultStatsScope, str], dict[str, int]]:
+        """Compute the aggregates from scratch with one GROUP BY query per scope."""
+        columns = ResultStatsService._aggregate_columns()
+        stats = {}
+
+        campaign_rows = (
+            db.query(ResultModel.campaign_id, *columns)
+            .filter(ResultModel.campaign_id.isnot(None))
+            .group_by(ResultModel.campaign_id)
+        )
+        for row in campaign_rows:
+            stats[(ResultStatsScope.campaign, str(row[0]))] = {
+                column: int(getattr(row, column) or 0) for column in COUNTER_COLUMNS
+            }
+
+        city_rows = (
+            db.query(ResultModel.city, *columns)
+            .filter(ResultModel.city.isnot(None))
+            .group_by(ResultModel.city)
+        )
+        for row in city_rows:
+            stats[(ResultStatsScope.city, row[0])] = {
+                column: int(getattr(row, column) or 0) for column in COUNTER_COLUMNS
+            }
+
+        return stats
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Replace all aggregates with values recomputed from the ``result`` table.
+
+        Returns:
+            The number of aggregate rows written
+        """
+        stats = ResultStatsService.compute_stats(db)
+        db.query(ResultStatsModel).delete(synchronize_session=False)
+        db.add_all(
+            ResultStatsModel(scope=scope, scope_key=scope_key, **counters)
+            for (scope, scope_key), counters in stats.items()
+        )
+        db.commit()
+        return len(stats)
+
+    @staticmethod
+    def find_mismatches(db: Session) -> list[tuple[ResultStatsScope, str, str, int, int]]:
+        """
+        Compare stored aggregates with freshly computed ones.
+
+        Returns:
+            ``(scope, scope_key, column, stored, expected)`` for every differing counter
+        """
+        expected = ResultStatsService.compute_stats(db)
+        stored = {
+            (row.scope, row.scope_key): {column: getattr(row, column) for column in COUNTER_COLUMNS}
+            for row in db.query(ResultStatsModel)
+        }
+        zeros = dict.fromkeys(COUNTER_COLUMNS, 0)
+
+        mismatches = []
+        for key in sorted(expected.keys() | stored.keys(), key=lambda k: (k[0].value, k[1])):
+            stored_counters = stored.get(key, zeros)
+            expected_counters = expected.get(key, zeros)
+            for column in COUNTER_COLUMNS:
+                if stored_counters[column] != expected_counters[column]:
+                    mismatches.append(
+                        (key[0], key[1], column, stored_counters[column], expected_counters[column])
+                    )
+        return mismatches
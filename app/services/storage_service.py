@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import threading
+from typing import BinaryIO
+from urllib.parse import SplitResult, urlsplit
+import requests
+from app.config import settings
+from app.instrumentation import timed_external_call
+
+logger = logging.getLogger(__name__)
+
+_storage_service = None
+_storage_lock = threading.Lock()
+
+
+def hash_image_stream(file_obj: BinaryIO) -> str:
+    """
+    SHA-256 hex digest of an upload, read in ``UPLOAD_CHUNK_SIZE`` chunks.
+
+    The file object is rewound afterwards so it can be streamed to storage.
+    """
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(settings.UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def original_blob_name(file_extension: str, content_hash: str) -> str:
+    """Content-addressed name of an uploaded image: identical bytes share one blob."""
+    return f"original/{content_hash}.{file_extension}"
+
+
+def derivative_blob_name(prefix: str, source: str, image_url: str, file_extension: str) -> str:
+    """
+    Name of a derived image stored next to ``original/``.
+
+    Named ``<prefix>/<source>/<sha256 of the full URL>.<ext>``, e.g.
+    ``thumbnail/original/<hash>.webp``, so every derivative of an image can be
+    found from its URL, and detector URLs that share a file name (such as
+    ``.../<id>/result.jpg`` or ``...?id=<id>``) never overwrite each other.
+    """
+    url_hash = hashlib.sha256(image_url.encode("utf-8")).hexdigest()
+    return f"{prefix}/{source}/{url_hash}.{file_extension}"
+
+
+class ImageSourceNotAllowedError(Exception):
+    """Raised for an image URL that is neither in storage nor on DERIVATIVE_SOURCE_HOSTS."""
+
+
+def _allowed_source(parsed: SplitResult) -> bool:
+    hosts = settings.DERIVATIVE_SOURCE_HOSTS or urlsplit(settings.DETECTION_API_URL).netloc
+    allowed = {host.strip().lower() for host in hosts.split(",") if host.strip()}
+    try:
+        hostname, port = (parsed.hostname or "").lower(), parsed.port
+    except ValueError:
+        return False
+    return hostname in allowed or f"{hostname}:{port}" in allowed
+
+
+def fetch_image_url(image_url: str) -> bytes:
+    """
+    Download an image that is not held by the configured storage (e.g. hosted by the detector).
+
+    Result image URLs arrive on unauthenticated callbacks, so only http(s) URLs
+    on DERIVATIVE_SOURCE_HOSTS are fetched and redirects are not followed; the
+    server never requests internal or metadata addresses on a caller's behalf.
+
+    Raises:
+        ImageSourceNotAllowedError: If the URL is not on an allowed host
+    """
+    parsed = urlsplit(image_url)
+    if parsed.scheme not in ("http", "https") or not _allowed_source(parsed):
+        raise ImageSourceNotAllowedError(f"Not an allowed image source: {image_url}")
+    with timed_external_call("image_source", "download"):
+        response = requests.get(
+            image_url, timeout=settings.DETECTION_TIMEOUT_SECONDS, allow_redirects=False
+        )
+    if response.is_redirect:
+        raise ImageSourceNotAllowedError(f"Image source redirected: {image_url}")
+    response.raise_for_status()
+    return response.content
+
+
+def create_storage_service():
+    """
+    Build the storage service selected by ``STORAGE_BACKEND``.
+
+    Returns:
+        A GCPStorageService or LocalStorageService instance
+
+    Raises:
+        ValueError: If the configured backend is unknown
+    """
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "gcp":
+        from app.services.gcp_storage_service import GCPStorageService
+        return GCPStorageService()
+    if backend == "local":
+        from app.services.local_storage_service import LocalStorageService
+        return LocalStorageService()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+def get_storage_service():
+    """Return the process-wide storage service, creating it on first use."""
+    global _storage_service
+    if _storage_service is None:
+        with _storage_lock:
+            if _storage_service is None:
+                _storage_service = create_storage_service()
+    return _storage_service
+
+
+def init_storage_service() -> None:
+    """
+    Create the shared storage service at startup.
+
+    A failure is logged rather than raised so the API still serves the routes
+    that do not need storage; ``get_storage_service`` retries on first use.
+    """
+    try:
+        get_storage_service()
+    except Exception:
+        logger.exception("Storage service initialization failed; will retry on first upload")
+
+
+def close_storage_service() -> None:
+    """Close the shared storage service, if one was created."""
+    global _storage_service
+    with _storage_lock:
+        if _storage_service is not None:
+            _storage_service.close()
+            _storage_service = None
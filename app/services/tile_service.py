@@ -0,0 +1,155 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.enums.result import ResultStatus
+from app.services.geo_service import GEOHASH_PRECISION, GeoService
+from app.services.result_service import ResultService
+
+MAX_ZOOM = 22
+
+
+class TileService:
+    """
+    Pre-aggregated clusters of finished results per Web Mercator (XYZ) tile.
+
+    Each tile is split into a ``TILE_GRID_SIZE`` x ``TILE_GRID_SIZE`` grid. The
+    database totals the results per geohash cell, using the shortest geohash
+    whose cells fit at least twice along a grid cell, so a tile costs one
+    grouped query however many points it holds. NumPy then bins those totals
+    into the grid in one vectorized pass, each at its centroid; a point near a
+    grid line can land in the neighbouring cluster. Past the stored geohash
+    precision (the highest zooms, where a tile holds few points) the points
+    themselves are binned. Tiles are cached in-process (LRU,
+    ``TILE_CACHE_MAX_ENTRIES``) for up to ``TILE_CACHE_TTL_SECONDS``;
+    ResultService drops the tiles covering a result whenever it enters or
+    leaves the finished state. The TTL bounds staleness across processes,
+    which do not share invalidations.
+    """
+
+    def __init__(self):
+        self.grid_size = settings.TILE_GRID_SIZE
+        self.ttl_seconds = settings.TILE_CACHE_TTL_SECONDS
+        self.max_entries = settings.TILE_CACHE_MAX_ENTRIES
+        self._cache: OrderedDict[tuple[int, int, int], tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+        """``(min_lat, min_lng, max_lat, max_lng)`` of an XYZ tile."""
+        n = 2 ** z
+        min_lng = x / n * 360.0 - 180.0
+        max_lng = (x + 1) / n * 360.0 - 180.0
+        max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+        min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+        return min_lat, min_lng, max_lat, max_lng
+
+    @staticmethod
+    def tile_for_point(lat: float, lng: float, z: int) -> tuple[int, int]:
+        n = 2 ** z
+        lat = max(min(lat, 85.05112878), -85.05112878)
+        x = int((lng + 180.0) / 360.0 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+    def get_clusters(self, db: Session, z: int, x: int, y: int) -> list[dict]:
+        key = (z, x, y)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                self._cache.move_to_end(key)
+                return cached[1]
+
+        min_lat, min_lng, max_lat, max_lng = self.tile_bounds(z, x, y)
+        precision = self._cell_precision(min_lat, min_lng, max_lat, max_lng)
+        if precision is not None:
+            totals = ResultService.get_geohash_cells_in_bounds(
+                db, min_lat, min_lng, max_lat, max_lng, precision, status=ResultStatus.finished
+            )
+        else:
+            totals = [
+                (1, lat, lng, object_count or 0)
+                for lat, lng, object_count in ResultService.get_points_in_bounds(
+                    db, min_lat, min_lng, max_lat, max_lng, status=ResultStatus.finished
+                )
+            ]
+        clusters = self._bin(totals, z, x, y)
+
+        with self._lock:
+            self._cache[key] = (now + self.ttl_seconds, clusters)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return clusters
+
+    def _cell_precision(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
+    ) -> int | None:
+        """Shortest geohash precision whose cells fit twice along each side of a grid cell."""
+        max_cell_lat = (max_lat - min_lat) / self.grid_size / 2
+        max_cell_lng = (max_lng - min_lng) / self.grid_size / 2
+        for precision in range(1, GEOHASH_PRECISION + 1):
+            cell_lat, cell_lng = GeoService.cell_size(precision)
+            if cell_lat <= max_cell_lat and cell_lng <= max_cell_lng:
+                return precision
+        return None
+
+    def _bin(self, totals: list, z: int, x: int, y: int) -> list[dict]:
+        """Bin ``(count, lat_sum, lng_sum, object_count_sum)`` rows into the tile's grid."""
+        if not totals:
+            return []
+
+        # Imported here so only processes that serve tiles pay for loading NumPy
+        import numpy as np
+
+        data = np.asarray(totals, dtype=np.float64)
+        count, lat_sum, lng_sum, object_sum = data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+        # Each row is placed by its centroid
+        lat, lng = lat_sum / count, lng_sum / count
+
+        # Position inside the tile in [0, 1), in Mercator space so cells are square on screen
+        n = 2 ** z
+        clipped_lat = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+        tile_x = (lng + 180.0) / 360.0 * n - x
+        tile_y = (1 - np.arcsinh(np.tan(clipped_lat)) / np.pi) / 2 * n - y
+
+        grid = self.grid_size
+        cell_x = np.clip((tile_x * grid).astype(np.int64), 0, grid - 1)
+        cell_y = np.clip((tile_y * grid).astype(np.int64), 0, grid - 1)
+        cell = cell_y * grid + cell_x
+
+        cells = grid * grid
+        counts = np.bincount(cell, weights=count, minlength=cells)
+        object_sums = np.bincount(cell, weights=object_sum, minlength=cells)
+        lat_sums = np.bincount(cell, weights=lat_sum, minlength=cells)
+        lng_sums = np.bincount(cell, weights=lng_sum, minlength=cells)
+
+        clusters = []
+        for index in np.flatnonzero(counts):
+            cell_count = int(counts[index])
+            clusters.append(
+                {
+                    "lat": float(lat_sums[index] / cell_count),
+                    "lng": float(lng_sums[index] / cell_count),
+                    "count": cell_count,
+                    "objectCount": int(object_sums[index]),
+                }
+            )
+        return clusters
+
+    def invalidate_point(self, lat: float | None, lng: float | None) -> None:
+        """Drop every cached tile containing the point, at all zoom levels."""
+        if lat is None or lng is None:
+            return
+        with self._lock:
+            if not self._cache:
+                return
+            for z in range(MAX_ZOOM + 1):
+                x, y = self.tile_for_point(lat, lng, z)
+                self._cache.pop((z, x, y), None)
+
+
+tile_service = TileService()
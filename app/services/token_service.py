@@ -0,0 +1,198 @@
+"""
+Stateless signed session tokens.
+
+Tokens use the JWT compact format with HS256 so clients can read the claims
+with any JWT library. The header carries a ``kid`` naming the signing key:
+tokens are signed with AUTH_SECRET_KEY and still accepted when signed with one
+of AUTH_PREVIOUS_SECRET_KEYS, which allows rotating the secret without logging
+everybody out. Verification only needs the cached keys, never the database.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token is malformed, has a bad signature, or has expired."""
+
+
+class TokenConfigurationError(RuntimeError):
+    """Raised when no signing secret is configured and a random one is not allowed."""
+
+
+@dataclass(frozen=True)
+class TokenIdentity:
+    subject_id: int
+    audience: str
+    token_type: str
+    expires_at: int
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _key_id(secret: bytes) -> str:
+    return hashlib.sha256(secret).hexdigest()[:8]
+
+
+def _configured_workers() -> int:
+    # uvicorn and gunicorn both take their default worker count from WEB_CONCURRENCY
+    try:
+        return int(os.environ.get("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        return 1
+
+
+class _KeyCache:
+    """HMAC states keyed by ``kid``, built once per process and copied per use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signing_kid: str | None = None
+        self._macs: dict[str, hmac.HMAC] = {}
+
+    def _load(self) -> None:
+        secret = settings.AUTH_SECRET_KEY
+        if not secret:
+            if not settings.AUTH_ALLOW_EPHEMERAL_SECRET:
+                raise TokenConfigurationError(
+                    "AUTH_SECRET_KEY is not set; set it, or set AUTH_ALLOW_EPHEMERAL_SECRET "
+                    "for a single-process development server"
+                )
+            # A random key only validates tokens issued by this same process
+            if _configured_workers() > 1:
+                raise TokenConfigurationError(
+                    "AUTH_SECRET_KEY is required when running more than one worker"
+                )
+            logger.warning(
+                "AUTH_SECRET_KEY is not set; using a random key, tokens will not "
+                "survive a restart or validate on other processes"
+            )
+            secret = secrets.token_urlsafe(32)
+        previous = [key for key in settings.AUTH_PREVIOUS_SECRET_KEYS.split(",") if key.strip()]
+        macs = {}
+        for key in [secret, *previous]:
+            key_bytes = key.strip().encode("utf-8")
+            macs[_key_id(key_bytes)] = hmac.new(key_bytes, digestmod=hashlib.sha256)
+        self._macs = macs
+        self._signing_kid = _key_id(secret.encode("utf-8"))
+
+    def _ensure_loaded(self) -> None:
+        if self._signing_kid is None:
+            with self._lock:
+                if self._signing_kid is None:
+                    self._load()
+
+    def signing_kid(self) -> str:
+        self._ensure_loaded()
+        return self._signing_kid
+
+    def sign(self, kid: str, message: bytes) -> bytes | None:
+        self._ensure_loaded()
+        mac = self._macs.get(kid)
+        if mac is None:
+            return None
+        mac = mac.copy()
+        mac.update(message)
+        return mac.digest()
+
+
+_keys = _KeyCache()
+
+
+class TokenService:
+    @staticmethod
+    def check_configuration() -> None:
+        """
+        Load the signing keys now, so a missing secret stops startup.
+
+        Raises:
+            TokenConfigurationError: If AUTH_SECRET_KEY is unset and a random key is not allowed
+        """
+        _keys.signing_kid()
+
+    @staticmethod
+    def _encode(subject_id: int, audience: str, token_type: str, ttl_seconds: int) -> str:
+        now = int(time.time())
+        kid = _keys.signing_kid()
+        header = {"alg": "HS256", "typ": "JWT", "kid": kid}
+        payload = {
+            "sub": str(subject_id),
+            "aud": audience,
+            "typ": token_type,
+            "iat": now,
+            "exp": now + ttl_seconds,
+        }
+        signing_input = (
+            _b64encode(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+            + "."
+            + _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        )
+        signature = _keys.sign(kid, signing_input.encode("ascii"))
+        return signing_input + "." + _b64encode(signature)
+
+    @staticmethod
+    def issue_tokens(subject_id: int, audience: str) -> dict:
+        """Return an access/refresh pair shaped like ``app.schemas.auth.TokenPair``."""
+        return {
+            "accessToken": TokenService._encode(
+                subject_id, audience, ACCESS, settings.ACCESS_TOKEN_TTL_SECONDS
+            ),
+            "refreshToken": TokenService._encode(
+                subject_id, audience, REFRESH, settings.REFRESH_TOKEN_TTL_SECONDS
+            ),
+            "tokenType": "bearer",
+            "expiresIn": settings.ACCESS_TOKEN_TTL_SECONDS,
+        }
+
+    @staticmethod
+    def decode(token: str, audience: str, token_type: str = ACCESS) -> TokenIdentity:
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            header = json.loads(_b64decode(header_b64))
+            if not isinstance(header, dict):
+                raise InvalidTokenError()
+            expected = _keys.sign(
+                header.get("kid", ""), f"{header_b64}.{payload_b64}".encode("ascii")
+            )
+            if header.get("alg") != "HS256" or expected is None:
+                raise InvalidTokenError()
+            if not hmac.compare_digest(expected, _b64decode(signature_b64)):
+                raise InvalidTokenError()
+            payload = json.loads(_b64decode(payload_b64))
+            if not isinstance(payload, dict):
+                raise InvalidTokenError()
+            identity = TokenIdentity(
+                subject_id=int(payload["sub"]),
+                audience=payload["aud"],
+                token_type=payload["typ"],
+                expires_at=int(payload["exp"]),
+            )
+        except InvalidTokenError:
+            raise
+        except (ValueError, KeyError, TypeError, UnicodeError):
+            raise InvalidTokenError() from None
+
+        if identity.audience != audience or identity.token_type != token_type:
+            raise InvalidTokenError()
+        if identity.expires_at <= time.time():
+            raise InvalidTokenError()
+        return identity
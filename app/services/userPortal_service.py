@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
-import bcrypt
+from app.database import run_db
 from app.models.userPortal import UserPortalModel
 from app.schemas.userPortal import UserPortalCreate, UserPortalUpdate, UserPortalLogin
+from app.services.password_service import password_hasher
 
 
 class UserPortalEmailAlreadyExists(Exception):
@@ -10,23 +11,10 @@ class UserPortalEmailAlreadyExists(Exception):
 
 class UserPortalService:
     @staticmethod
-    def _hash_password(plain_password: str) -> str:
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(plain_password.encode("utf-8"), salt)
-        return hashed.decode("utf-8")
-
-    @staticmethod
-    def _verify_password(plain_password: str, hashed_password: str) -> bool:
-        try:
-            return bcrypt.checkpw(
-                plain_password.encode("utf-8"),
-                hashed_password.encode("utf-8"),
-            )
-        except ValueError:
-            return False
-
-    @staticmethod
-    def create_user_portal(db: Session, user: UserPortalCreate) -> UserPortalModel:
+    def create_user_portal(
+        db: Session, user: UserPortalCreate, hashed_password: str
+    ) -> UserPortalModel:
+        """``hashed_password`` comes from ``password_hasher.hash(user.password)``."""
         existing = (
             db.query(UserPortalModel)
             .filter(UserPortalModel.email == user.email)
@@ -35,8 +23,6 @@ class UserPortalService:
         if existing:
             raise UserPortalEmailAlreadyExists()
 
-        hashed_password = UserPortalService._hash_password(user.password)
-
         user_portal = UserPortalModel(
             name=user.name,
             email=user.email,
@@ -61,7 +47,30 @@ class UserPortalService:
         )
 
     @staticmethod
-    def update_user_portal(db: Session, user_portal_id: int, user_update: UserPortalUpdate):
+    def email_in_use(db: Session, email: str, user_portal_id: int | None = None) -> bool:
+        """True when a portal user other than ``user_portal_id`` is registered with ``email``."""
+        query = db.query(UserPortalModel.id).filter(UserPortalModel.email == email)
+        if user_portal_id is not None:
+            query = query.filter(UserPortalModel.id != user_portal_id)
+        return query.first() is not None
+
+    @staticmethod
+    def get_user_portal_by_email(db: Session, email: str):
+        return db.query(UserPortalModel).filter(UserPortalModel.email == email).first()
+
+    @staticmethod
+    def set_password_hash(db: Session, user_portal: UserPortalModel, hashed_password: str) -> None:
+        user_portal.password = hashed_password
+        db.commit()
+
+    @staticmethod
+    def update_user_portal(
+        db: Session,
+        user_portal_id: int,
+        user_update: UserPortalUpdate,
+        hashed_password: str | None = None,
+    ):
+        """``hashed_password`` must be given when ``user_update.password`` is set."""
         user_portal = (
             db.query(UserPortalModel).filter(UserPortalModel.id == user_portal_id).first()
         )
@@ -78,7 +87,7 @@ class UserPortalService:
                 raise UserPortalEmailAlreadyExists()
 
         if user_update.password is not None:
-            user_portal.password = UserPortalService._hash_password(user_update.password)
+            user_portal.password = hashed_password
 
         for attr in ("name", "email", "city"):
             value = getattr(user_update, attr)
@@ -102,12 +111,17 @@ class UserPortalService:
         return True
 
     @staticmethod
-    def authenticate(db: Session, login: UserPortalLogin):
-        user_portal = (
-            db.query(UserPortalModel).filter(UserPortalModel.email == login.email).first()
-        )
+    async def authenticate(db: Session, login: UserPortalLogin):
+        """
+        Check the credentials on the password pool, upgrading the stored hash
+        when it was made with a different cost. Raises PasswordHasherBusy.
+        """
+        user_portal = await run_db(db, UserPortalService.get_user_portal_by_email, login.email)
         if not user_portal:
             return None
-        if not UserPortalService._verify_password(login.password, user_portal.password):
+        if not await password_hasher.verify(login.password, user_portal.password):
             return None
-        return user_portal
\ No newline at end of file
+        new_hash = await password_hasher.upgrade_if_needed(login.password, user_portal.password)
+        if new_hash:
+            await run_db(db, UserPortalService.set_password_hash, user_portal, new_hash)
+        return user_portal
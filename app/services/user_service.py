@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
-import bcrypt
+from sqlalchemy.orm import Session, selectinload
+from app.database import run_db
 from app.models.user import UserModel, AddressModel
 from app.schemas.user import UserCreate, AddressCreate, UserLogin, UserUpdate
+from app.services.password_service import password_hasher
 
 
 class UserEmailAlreadyExists(Exception):
@@ -14,29 +15,14 @@ class UserInvalidCredentials(Exception):
 
 class UserService:
     @staticmethod
-    def _hash_password(plain_password: str) -> str:
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(plain_password.encode("utf-8"), salt)
-        return hashed.decode("utf-8")
-
-    @staticmethod
-    def _verify_password(plain_password: str, hashed_password: str) -> bool:
-        try:
-            return bcrypt.checkpw(
-                plain_password.encode("utf-8"),
-                hashed_password.encode("utf-8"),
-            )
-        except ValueError:
-            return False
-
-    @staticmethod
-    def create_user(db: Session, user: UserCreate, address: AddressCreate) -> UserModel:
+    def create_user(
+        db: Session, user: UserCreate, address: AddressCreate, hashed_password: str
+    ) -> UserModel:
+        """``hashed_password`` comes from ``password_hasher.hash(user.password)``."""
         existing = db.query(UserModel).filter(UserModel.email == user.email).first()
         if existing:
             raise UserEmailAlreadyExists()
 
-        hashed_password = UserService._hash_password(user.password)
-
         db_user = UserModel(
             name=user.name,
             email=user.email,
@@ -55,27 +41,55 @@ class UserService:
             neighborhood=address.neighborhood,
             complement=address.complement,
             city=address.city,
-            lat=address.lat,
-            lng=address.lng
+            lat=float(address.lat),
+            lng=float(address.lng)
         )
         db.add(db_address)
         db.commit()
-        db.refresh(db_address)
-        db.refresh(db_user)
 
-        return db_user
+        return UserService.get_user_by_id(db, db_user.id)
+
+    @staticmethod
+    def _with_address(db: Session):
+        # For users returned by the API: the User schema includes the address,
+        # and an async session cannot lazy load it while the response is built
+        return db.query(UserModel).options(selectinload(UserModel.address))
 
     @staticmethod
     def list_users(db: Session):
-        return db.query(UserModel).all()
+        return UserService._with_address(db).all()
 
     @staticmethod
     def get_user_by_id(db: Session, user_id: int):
-        return db.query(UserModel).filter(UserModel.id == user_id).first()
+        return UserService._with_address(db).filter(UserModel.id == user_id).first()
 
     @staticmethod
-    def update_user(db: Session, user_id: int, user_update: UserUpdate):
-        user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    def user_exists(db: Session, user_id: int) -> bool:
+        return db.query(UserModel.id).filter(UserModel.id == user_id).first() is not None
+
+    @staticmethod
+    def email_in_use(db: Session, email: str, user_id: int | None = None) -> bool:
+        """True when a user other than ``user_id`` is registered with ``email``."""
+        query = db.query(UserModel.id).filter(UserModel.email == email)
+        if user_id is not None:
+            query = query.filter(UserModel.id != user_id)
+        return query.first() is not None
+
+    @staticmethod
+    def get_user_by_email(db: Session, email: str):
+        return db.query(UserModel).filter(UserModel.email == email).first()
+
+    @staticmethod
+    def set_password_hash(db: Session, user: UserModel, hashed_password: str) -> None:
+        user.password = hashed_password
+        db.commit()
+
+    @staticmethod
+    def update_user(
+        db: Session, user_id: int, user_update: UserUpdate, hashed_password: str | None = None
+    ):
+        """``hashed_password`` must be given when ``user_update.password`` is set."""
+        user = UserService._with_address(db).filter(UserModel.id == user_id).first()
         if not user:
             return None
 
@@ -90,7 +104,7 @@ class UserService:
                 setattr(user, attr, value)
 
         if user_update.password is not None:
-            user.password = UserService._hash_password(user_update.password)
+            user.password = hashed_password
 
         if user_update.address is not None and user.address is not None:
             address_data = user_update.address
@@ -98,11 +112,12 @@ class UserService:
             for attr in ("cep", "street", "number", "neighborhood", "complement", "city", "lat", "lng"):
                 value = getattr(address_data, attr)
                 if value is not None:
+                    if attr in ("lat", "lng"):
+                        value = float(value)
                     setattr(address, attr, value)
 
         db.commit()
-        db.refresh(user)
-        return user
+        return UserService.get_user_by_id(db, user_id)
 
     @staticmethod
     def delete_user(db: Session, user_id: int) -> bool:
@@ -117,10 +132,17 @@ class UserService:
         return True
 
     @staticmethod
-    def authenticate(db: Session, login: UserLogin):
-        user = db.query(UserModel).filter(UserModel.email == login.email).first()
+    async def authenticate(db: Session, login: UserLogin):
+        """
+        Check the credentials on the password pool, upgrading the stored hash
+        when it was made with a different cost. Raises PasswordHasherBusy.
+        """
+        user = await run_db(db, UserService.get_user_by_email, login.email)
         if not user:
             return None
-        if not UserService._verify_password(login.password, user.password):
+        if not await password_hasher.verify(login.password, user.password):
             return None
-        return user
\ No newline at end of file
+        new_hash = await password_hasher.upgrade_if_needed(login.password, user.password)
+        if new_hash:
+            await run_db(db, UserService.set_password_hash, user, new_hash)
+        return user
@@ -0,0 +1,31 @@
+"""
+Standalone detection worker.
+
+Runs the same dispatch loop as the API process, without serving HTTP, so
+detection throughput can be scaled independently:
+
+    python -m app.workers.detection_worker
+"""
+import logging
+import signal
+from app.services.detection_dispatcher import DetectionDispatcher
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    dispatcher = DetectionDispatcher()
+
+    def _shutdown(signum, frame):
+        logging.getLogger(__name__).info("Received signal %s, stopping", signum)
+        dispatcher.stop(timeout=None)
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    dispatcher.run()
+
+
+if __name__ == "__main__":
+    main()
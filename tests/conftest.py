@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the test environment is set before any app import
+_tmp = tempfile.mkdtemp(prefix="deteccao-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("DETECTION_API_URL", "http://detector.invalid")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORAGE_PATH", os.path.join(_tmp, "storage"))
+os.environ.setdefault("DETECTION_DISPATCH_IN_PROCESS", "false")
+os.environ.setdefault("IMAGE_DERIVATIVES_ENABLED", "false")
+os.environ.setdefault("AUTH_SECRET_KEY", "test-secret")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Create every table in the test database once per run."""
+    import app.main  # noqa: F401 (registers every model with the mapper)
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    return engine
@@ -0,0 +1,127 @@
+import itertools
+import pytest
+from app.database import SessionLocal
+from app.schemas.campaign import CampaignCreate, CampaignUpdate
+from app.services import cache_service, campaign_service
+from app.services.cache_service import InMemoryCacheBackend, JSONCache
+from app.services.campaign_service import CampaignService
+
+_cities = itertools.count()
+
+
+class _CountingBackend(InMemoryCacheBackend):
+    def __init__(self):
+        super().__init__(max_entries=100)
+        self.hits = 0
+
+    def get(self, key):
+        value = super().get(key)
+        self.hits += value is not None
+        return value
+
+
+class _BrokenBackend:
+    def get(self, key):
+        raise ConnectionError("cache down")
+
+    def set(self, key, value, ex=None):
+        raise ConnectionError("cache down")
+
+    def delete(self, *keys):
+        raise ConnectionError("cache down")
+
+
+@pytest.fixture
+def cache(database, monkeypatch):
+    backend = _CountingBackend()
+    monkeypatch.setattr(campaign_service.campaign_cache, "backend", backend)
+    return backend
+
+
+@pytest.fixture
+def db(database):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _city() -> str:
+    return f"Cache {next(_cities)}"
+
+
+def _titles(campaigns) -> list[str]:
+    return sorted(campaign.title for campaign in campaigns)
+
+
+def test_campaign_by_id_is_served_from_the_cache(cache, db):
+    campaign = CampaignService.create_campaign(db, CampaignCreate(title="A", description="-", city=_city()))
+
+    assert CampaignService.get_campaign_by_id(db, campaign.id).title == "A"
+    assert cache.hits == 0
+    cached = CampaignService.get_campaign_by_id(db, campaign.id)
+    assert cache.hits == 1
+    assert (cached.id, cached.title, cached.city) == (campaign.id, "A", campaign.city)
+
+
+def test_creating_a_campaign_invalidates_its_city(cache, db):
+    city = _city()
+    CampaignService.create_campaign(db, CampaignCreate(title="A", description="-", city=city))
+    assert _titles(CampaignService.get_campaigns_by_city(db, city)) == ["A"]
+
+    CampaignService.create_campaign(db, CampaignCreate(title="B", description="-", city=city))
+    assert _titles(CampaignService.get_campaigns_by_city(db, city)) == ["A", "B"]
+
+
+def test_moving_a_campaign_invalidates_its_id_and_both_cities(cache, db):
+    old_city, new_city = _city(), _city()
+    campaign = CampaignService.create_campaign(db, CampaignCreate(title="A", description="-", city=old_city))
+    # Warm every key the update touches
+    CampaignService.get_campaign_by_id(db, campaign.id)
+    assert _titles(CampaignService.get_campaigns_by_city(db, old_city)) == ["A"]
+    assert CampaignService.get_campaigns_by_city(db, new_city) == []
+
+    CampaignService.update_campaign(db, campaign.id, CampaignUpdate(title="A2", city=new_city))
+
+    assert CampaignService.get_campaign_by_id(db, campaign.id).title == "A2"
+    assert CampaignService.get_campaigns_by_city(db, old_city) == []
+    assert _titles(CampaignService.get_campaigns_by_city(db, new_city)) == ["A2"]
+
+
+def test_deleting_a_campaign_invalidates_its_id_and_city(cache, db):
+    city = _city()
+    campaign = CampaignService.create_campaign(db, CampaignCreate(title="A", description="-", city=city))
+    CampaignService.get_campaign_by_id(db, campaign.id)
+    CampaignService.get_campaigns_by_city(db, city)
+
+    assert CampaignService.delete_campaign(db, campaign.id)
+
+    assert CampaignService.get_campaign_by_id(db, campaign.id) is None
+    assert CampaignService.get_campaigns_by_city(db, city) == []
+
+
+def test_an_unreachable_cache_falls_back_to_the_database(database, db, monkeypatch):
+    monkeypatch.setattr(campaign_service.campaign_cache, "backend", _BrokenBackend())
+    city = _city()
+    campaign = CampaignService.create_campaign(db, CampaignCreate(title="A", description="-", city=city))
+
+    assert CampaignService.get_campaign_by_id(db, campaign.id).title == "A"
+    assert _titles(CampaignService.get_campaigns_by_city(db, city)) == ["A"]
+
+
+def test_memory_backend_expires_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    cache = JSONCache("test", ttl_seconds=10, backend=InMemoryCacheBackend(max_entries=2))
+
+    cache.set("a", {"value": 1})
+    cache.set("b", 2)
+    assert cache.get("a") == {"value": 1}
+    # "b" is now the least recently used entry
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ({"value": 1}, 3)
+
+    now[0] += 10
+    assert cache.get("a") is None
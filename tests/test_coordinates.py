@@ -0,0 +1,30 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from app.routers.result import _parse_coordinate_pair
+from app.schemas.user import AddressUpdate
+
+
+def test_valid_coordinates_are_parsed():
+    assert _parse_coordinate_pair({"lat": "-19.92", "lng": "-43.94"}) == (-19.92, -43.94)
+
+
+@pytest.mark.parametrize(
+    "coordinates",
+    [
+        {"lat": "NaN", "lng": "0"},
+        {"lat": "0", "lng": "inf"},
+        {"lat": "90.5", "lng": "0"},
+        {"lat": "0", "lng": "-180.5"},
+    ],
+)
+def test_non_finite_or_out_of_range_coordinates_are_rejected(coordinates):
+    with pytest.raises(HTTPException) as raised:
+        _parse_coordinate_pair(coordinates)
+    assert raised.value.status_code == 422
+
+
+@pytest.mark.parametrize("lat", ["nan", "-inf", "91"])
+def test_address_rejects_invalid_latitude(lat):
+    with pytest.raises(ValidationError):
+        AddressUpdate(lat=lat)
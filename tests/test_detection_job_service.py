@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from app.database import SessionLocal
+from app.models.detection_job import DetectionJobModel
+from app.models.enums.detection_job import DetectionJobStatus
+from app.models.enums.result import ResultStatus, ResultType
+from app.models.result import ResultModel
+from app.services.detection_job_service import DetectionJobService
+
+MAX_ATTEMPTS = 3
+
+
+def _expire_lease(db, job_id: int) -> None:
+    db.query(DetectionJobModel).filter(DetectionJobModel.id == job_id).update(
+        {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def test_job_whose_lease_keeps_expiring_ends_failed(database):
+    db = SessionLocal()
+    try:
+        # Only this test's job is due, so other tests' rows are never claimed
+        db.query(DetectionJobModel).delete()
+        result = ResultModel(
+            original_image="https://example.com/poison.jpg",
+            type=ResultType.terreno,
+            status=ResultStatus.processing,
+        )
+        db.add(result)
+        db.flush()
+        [job] = DetectionJobService.add_jobs(db, [result])
+        db.commit()
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            assert DetectionJobService.fail_abandoned_jobs(db, MAX_ATTEMPTS) == 0
+            claimed = DetectionJobService.claim_jobs(db, "worker", 10, 60, MAX_ATTEMPTS)
+            assert [(claimed_job.id, claimed_job.attempts) for claimed_job in claimed] == [(job.id, attempt)]
+            # The worker dies without reporting back
+            _expire_lease(db, job.id)
+
+        assert DetectionJobService.claim_jobs(db, "worker", 10, 60, MAX_ATTEMPTS) == []
+        assert DetectionJobService.fail_abandoned_jobs(db, MAX_ATTEMPTS) == 1
+
+        db.expire_all()
+        assert job.status == DetectionJobStatus.failed
+        assert result.status == ResultStatus.failed
+    finally:
+        db.close()
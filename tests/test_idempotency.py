@@ -0,0 +1,74 @@
+import itertools
+import json
+import pytest
+from fastapi import FastAPI, Request
+from app.idempotency import IdempotencyMiddleware, RequestBodyHasher
+from app.services.token_service import TokenService
+from tests.asgi import call
+
+_keys = itertools.count()
+
+
+@pytest.fixture(scope="module")
+def client(database):
+    calls = itertools.count(1)
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"call": next(calls), "body": (await request.body()).decode()}
+
+    middleware = IdempotencyMiddleware(app)
+
+    def post(path: str, content: bytes, headers: dict) -> tuple[int, dict, dict]:
+        status, response_headers, body = call(middleware, "POST", path, content, headers)
+        return status, response_headers, json.loads(body)
+
+    return post
+
+
+@pytest.fixture
+def key():
+    return f"key-{next(_keys)}"
+
+
+def _bearer(user_id: int) -> dict:
+    token = TokenService.issue_tokens(user_id, "user")["accessToken"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_retry_replays_first_response(client, key):
+    _, _, first = client("/echo", b"a", {"Idempotency-Key": key})
+    _, headers, retry = client("/echo", b"a", {"Idempotency-Key": key})
+    assert retry == first
+    assert headers["idempotent-replayed"] == "true"
+
+
+def test_same_key_with_different_body_is_rejected(client, key):
+    client("/echo", b"a", {"Idempotency-Key": key})
+    status, _, _ = client("/echo", b"b", {"Idempotency-Key": key})
+    assert status == 422
+
+
+def test_same_key_from_another_user_is_not_replayed(client, key):
+    _, _, first = client("/echo", b"a", {"Idempotency-Key": key, **_bearer(1)})
+    _, headers, other = client("/echo", b"a", {"Idempotency-Key": key, **_bearer(2)})
+    assert "idempotent-replayed" not in headers
+    assert other["call"] != first["call"]
+
+    # A new token for the same user still replays
+    _, _, again = client("/echo", b"a", {"Idempotency-Key": key, **_bearer(1)})
+    assert again == first
+
+
+def test_multipart_boundary_is_not_part_of_the_hash():
+    def digest(boundary: bytes, chunk_size: int) -> str:
+        body = b"--%s\r\ncontent\r\n--%s--\r\n" % (boundary, boundary)
+        hasher = RequestBodyHasher(boundary)
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start:start + chunk_size]
+            hasher.update({"type": "http.request", "body": chunk, "more_body": True})
+        hasher.update({"type": "http.request", "body": b"", "more_body": False})
+        return hasher.hexdigest()
+
+    assert digest(b"first-boundary", 3) == digest(b"another-one", 5)
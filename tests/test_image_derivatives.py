@@ -0,0 +1,46 @@
+import io
+import pytest
+from PIL import ExifTags, Image
+from app.services.image_derivative_service import PREVIEW, THUMBNAIL, _render_derivatives
+
+
+def _jpeg(width: int, height: int, orientation: int = 1) -> bytes:
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = orientation
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "green").save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def _open(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+@pytest.mark.parametrize("image_format, pillow_format", [("webp", "WEBP"), ("jpeg", "JPEG")])
+def test_renders_a_square_thumbnail_and_a_bounded_preview(image_format, pillow_format):
+    rendered = _render_derivatives(_jpeg(1600, 900), 64, 400, image_format, 80)
+
+    thumbnail, preview = _open(rendered[THUMBNAIL]), _open(rendered[PREVIEW])
+    assert (thumbnail.format, preview.format) == (pillow_format, pillow_format)
+    assert thumbnail.size == (64, 64)
+    assert preview.size == (400, 225)
+
+
+def test_small_images_are_not_upscaled():
+    rendered = _render_derivatives(_jpeg(120, 80), 64, 400, "jpeg", 80)
+    assert _open(rendered[PREVIEW]).size == (120, 80)
+
+
+def test_derivatives_are_upright_and_drop_exif():
+    # Orientation 6: the camera stored the photo rotated; viewers turn it 90 degrees
+    rendered = _render_derivatives(_jpeg(800, 400, orientation=6), 64, 400, "jpeg", 80)
+
+    preview = _open(rendered[PREVIEW])
+    assert preview.size == (200, 400)
+    assert ExifTags.Base.Orientation not in preview.getexif()
+
+
+def test_undecodable_data_has_no_derivatives():
+    assert _render_derivatives(b"not an image", 64, 400, "webp", 80) is None
@@ -0,0 +1,53 @@
+import asyncio
+import io
+import pytest
+from PIL import ExifTags, Image
+from app.services.image_normalize_service import ImageNormalizer, InvalidImageError, _normalize_image
+
+
+def _image(width: int, height: int, image_format: str = "JPEG", orientation: int = 1) -> bytes:
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = orientation
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "green").save(buffer, image_format, exif=exif)
+    return buffer.getvalue()
+
+
+def _open(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_small_upright_jpeg_is_kept_as_sent():
+    assert _normalize_image(_image(400, 300), 400, 80) is None
+
+
+def test_large_jpeg_is_resized_to_the_max_dimension():
+    data = _image(2000, 1000)
+    normalized = _open(_normalize_image(data, 400, 80))
+    assert (normalized.format, normalized.size) == ("JPEG", (400, 200))
+
+
+def test_rotated_jpeg_is_turned_upright_and_loses_its_exif():
+    # Small enough to keep, but only once the orientation is applied
+    normalized = _open(_normalize_image(_image(400, 200, orientation=6), 400, 80))
+    assert normalized.size == (200, 400)
+    assert ExifTags.Base.Orientation not in normalized.getexif()
+
+
+def test_other_formats_are_re_encoded_as_jpeg():
+    normalized = _open(_normalize_image(_image(100, 100, "PNG"), 400, 80))
+    assert (normalized.format, normalized.mode, normalized.size) == ("JPEG", "RGB", (100, 100))
+
+
+def test_undecodable_upload_is_invalid():
+    with pytest.raises(InvalidImageError):
+        _normalize_image(b"not an image", 400, 80)
+
+
+def test_upload_is_kept_when_the_pool_is_full(monkeypatch):
+    normalizer = ImageNormalizer(workers=1, max_pending=0, max_dimension=400, quality=80)
+    # A full queue never reaches the pool
+    monkeypatch.setattr(normalizer, "start", lambda: None)
+    assert asyncio.run(normalizer.normalize(_image(2000, 1000))) is None
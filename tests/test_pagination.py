@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app.database import SessionLocal
+from app.models.campaign import CampaignModel
+from app.models.enums.result import ResultStatus, ResultType
+from app.models.result import ResultModel
+from app.routers.result import NEXT_CURSOR_HEADER, _decode_cursor, _encode_cursor
+from tests.asgi import call
+
+CITY = "Paginacao"
+
+
+@pytest.fixture(scope="module")
+def results(database):
+    """Seven results of one campaign and city, five of them created at the same instant."""
+    base = datetime(2025, 3, 1, 12, 0, 0, 123456)
+    created = [base + timedelta(minutes=1), base, base, base, base, base, base - timedelta(minutes=1)]
+    db = SessionLocal()
+    try:
+        campaign = CampaignModel(title="Paginacao", description="-", city=CITY)
+        db.add(campaign)
+        db.flush()
+        models = [
+            ResultModel(
+                campaign_id=campaign.id,
+                original_image=f"https://example.com/page-{index}.jpg",
+                type=ResultType.terreno,
+                status=ResultStatus.finished,
+                city=CITY,
+                created_at=created_at,
+            )
+            for index, created_at in enumerate(created)
+        ]
+        db.add_all(models)
+        db.commit()
+        ordered = sorted(models, key=lambda model: (model.created_at, model.id), reverse=True)
+        return campaign.id, [model.id for model in ordered]
+    finally:
+        db.close()
+
+
+def _pages(method: str, path: str, body: bytes = b"") -> list[list[int]]:
+    import app.main
+
+    pages, cursor = [], None
+    while True:
+        page_path = f"{path}&cursor={cursor}" if cursor else path
+        status, headers, response = call(
+            app.main.app, method, page_path, body, {"Content-Type": "application/json"}
+        )
+        assert status == 200, response
+        pages.append([result["id"] for result in json.loads(response)])
+        cursor = headers.get(NEXT_CURSOR_HEADER.lower())
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip_keeps_microseconds_and_id():
+    model = ResultModel(id=42, created_at=datetime(2025, 3, 1, 12, 0, 0, 123456))
+    assert _decode_cursor(_encode_cursor(model)) == (model.created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm8tc2VwYXJhdG9y", "MjAyNS0wMy0wMXx4"])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as raised:
+        _decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def test_pages_cover_every_result_once_across_equal_timestamps(results):
+    campaign_id, expected = results
+    pages = _pages("GET", f"/results/getAllResults?campaignId={campaign_id}&limit=2")
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert [result_id for page in pages for result_id in page] == expected
+
+
+def test_city_pages_use_the_same_keyset_order(results):
+    _, expected = results
+    pages = _pages("POST", "/results/getResultByCity?limit=3", json.dumps({"city": CITY}).encode())
+    assert [result_id for page in pages for result_id in page] == expected
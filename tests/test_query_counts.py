@@ -0,0 +1,105 @@
+"""
+Pin the number of SQL statements per request, so N+1 patterns are caught.
+
+Counts come from ``app.instrumentation``, the same per-request counter behind
+``http_request_db_queries``. Each endpoint is called with 1 and with 5
+campaigns/results and must issue the same, fixed number of statements.
+"""
+import itertools
+import pytest
+from app.database import SessionLocal
+from app.instrumentation import RequestMetricsMiddleware
+from app.models.campaign import CampaignModel
+from app.models.enums.result import ResultStatus, ResultType
+from app.models.result import ResultModel
+from app.models.user import AddressModel, UserModel
+from tests.asgi import call
+
+_cities = itertools.count()
+
+
+@pytest.fixture
+def query_count(database, monkeypatch):
+    """Run a GET through the whole app and return its SQL statement count."""
+    import app.main
+
+    counts = []
+    record = RequestMetricsMiddleware._record
+
+    def capture(scope, status_code, elapsed, stats):
+        counts.append(stats.query_count)
+        record(scope, status_code, elapsed, stats)
+
+    monkeypatch.setattr(RequestMetricsMiddleware, "_record", staticmethod(capture))
+
+    def run(path: str) -> int:
+        status, _, _ = call(app.main.app, "GET", path)
+        assert status == 200, path
+        return counts.pop()
+
+    return run
+
+
+def _seed(campaign_count: int) -> dict:
+    """A user in a fresh city with ``campaign_count`` campaigns there, each with two results."""
+    number = next(_cities)
+    city = f"Cidade {number}"
+    db = SessionLocal()
+    try:
+        user = UserModel(name="Teste", email=f"usuario{number}@example.com", password="x", phone="31999999999")
+        user.address = AddressModel(
+            cep="30000000", street="Rua", number=1, neighborhood="Centro", city=city, lat=-19.9, lng=-43.9
+        )
+        db.add(user)
+        campaigns = [
+            CampaignModel(title=f"Campanha {index}", description="-", city=city)
+            for index in range(campaign_count)
+        ]
+        db.add_all(campaigns)
+        db.flush()
+        results = [
+            ResultModel(
+                campaign_id=campaign.id,
+                user_id=user.id,
+                original_image="https://example.com/image.jpg",
+                type=ResultType.terreno,
+                status=ResultStatus.finished,
+                city=city,
+            )
+            for campaign in campaigns
+            for _ in range(2)
+        ]
+        db.add_all(results)
+        db.commit()
+        return {"user": user.id, "campaign": campaigns[0].id, "result": results[0].id}
+    finally:
+        db.close()
+
+
+ENDPOINTS = {
+    "/campaigns/getAllCampaigns": lambda ids: "/campaigns/getAllCampaigns",
+    "/campaigns/getCampaign/{id}": lambda ids: f"/campaigns/getCampaign/{ids['campaign']}",
+    "/campaigns/getCampaignByUser/{userId}": lambda ids: f"/campaigns/getCampaignByUser/{ids['user']}",
+    "/campaigns/getCampaignHome/{userId}": lambda ids: f"/campaigns/getCampaignHome/{ids['user']}",
+    "/results/getAllResults": lambda ids: f"/results/getAllResults?campaignId={ids['campaign']}",
+    "/results/getResult/{id}": lambda ids: f"/results/getResult/{ids['result']}",
+    "/user/getAllUsers": lambda ids: "/user/getAllUsers",
+    "/user/getUser/{user_id}": lambda ids: f"/user/getUser/{ids['user']}",
+}
+
+EXPECTED_QUERIES = {
+    "/campaigns/getAllCampaigns": 2,
+    "/campaigns/getCampaign/{id}": 2,
+    "/campaigns/getCampaignByUser/{userId}": 3,
+    "/campaigns/getCampaignHome/{userId}": 3,
+    "/results/getAllResults": 1,
+    "/results/getResult/{id}": 1,
+    "/user/getAllUsers": 2,
+    "/user/getUser/{user_id}": 2,
+}
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_query_count_does_not_grow_with_rows(query_count, endpoint):
+    counts = [query_count(ENDPOINTS[endpoint](_seed(size))) for size in (1, 5)]
+    assert counts == [EXPECTED_QUERIES[endpoint]] * 2
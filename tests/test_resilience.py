@@ -0,0 +1,131 @@
+import threading
+import pytest
+from app.services import resilience
+from app.services.resilience import AIMDLimiter, CircuitBreaker, CircuitOpenError, CircuitState
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test-open", failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.closed
+
+    # A success resets the count of consecutive failures
+    breaker.record_success()
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.open
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == pytest.approx(30)
+    clock[0] += 10
+    assert breaker.retry_after() == pytest.approx(20)
+
+
+def test_half_open_breaker_lets_one_probe_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker("test-close", failure_threshold=1, reset_seconds=30)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock[0] += 30
+    assert breaker.state == CircuitState.half_open
+    assert breaker.retry_after() == 0
+    breaker.before_call()
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.closed
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_breaker_for_another_period(clock):
+    breaker = CircuitBreaker("test-reopen", failure_threshold=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+
+    # A single failure in half-open reopens, whatever the threshold
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+    clock[0] += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock[0] += 1
+    breaker.before_call()
+
+
+def test_limiter_grows_additively_and_halves_on_failure(clock):
+    limiter = AIMDLimiter("test-aimd", min_limit=1, max_limit=8, target_latency=5)
+    assert limiter.limit == 8
+
+    limiter.acquire()
+    limiter.release(latency=1, ok=False)
+    assert limiter.limit == 4
+
+    # Another failure within target_latency of the last decrease counts once
+    limiter.acquire()
+    limiter.release(latency=1, ok=False)
+    assert limiter.limit == 4
+
+    # A slow success counts as a failure
+    clock[0] += 5
+    limiter.acquire()
+    limiter.release(latency=6, ok=True)
+    assert limiter.limit == 2
+
+    # About one slot per window's worth of fast successes
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release(latency=1, ok=True)
+    assert limiter.limit == 2
+    limiter.acquire()
+    limiter.release(latency=1, ok=True)
+    assert limiter.limit == 3
+
+
+def test_limiter_stays_within_its_bounds(clock):
+    limiter = AIMDLimiter("test-bounds", min_limit=2, max_limit=4, target_latency=1)
+    for _ in range(5):
+        clock[0] += 1
+        limiter.acquire()
+        limiter.release(latency=0, ok=False)
+    assert limiter.limit == 2
+
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(latency=0, ok=True)
+    assert limiter.limit == 4
+
+
+def test_limiter_blocks_calls_beyond_the_window():
+    limiter = AIMDLimiter("test-block", min_limit=1, max_limit=2, target_latency=5)
+    limiter.acquire()
+    limiter.acquire()
+
+    acquired = threading.Event()
+
+    def third_call():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=third_call)
+    thread.start()
+    assert not acquired.wait(0.1)
+
+    limiter.release(latency=0, ok=True)
+    assert acquired.wait(1)
+    thread.join()
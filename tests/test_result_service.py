@@ -0,0 +1,72 @@
+from app.database import SessionLocal
+from app.models.enums.result import ResultStatus, ResultType
+from app.models.result import ResultModel
+from app.services.geo_service import GeoService
+from app.services.result_service import ResultService
+
+
+def _result(db, result_image: str) -> ResultModel:
+    result = ResultModel(
+        original_image="https://example.com/original.jpg",
+        result_image=result_image,
+        result_thumbnail="https://example.com/thumbnail.webp",
+        result_preview="https://example.com/preview.webp",
+        type=ResultType.terreno,
+        status=ResultStatus.processing,
+    )
+    db.add(result)
+    db.commit()
+    return result
+
+
+def test_bulk_image_update_keeps_derivatives_of_an_unchanged_image(database):
+    db = SessionLocal()
+    try:
+        unchanged = _result(db, "https://example.com/same.jpg")
+        replaced = _result(db, "https://example.com/old.jpg")
+        errors = ResultService.update_result_images(
+            db,
+            [
+                (unchanged.id, "https://example.com/same.jpg", ResultStatus.finished, 3),
+                (replaced.id, "https://example.com/new.jpg", ResultStatus.finished, 1),
+            ],
+        )
+        assert errors == [None, None]
+
+        db.expire_all()
+        assert unchanged.result_thumbnail is not None
+        assert unchanged.result_preview is not None
+        assert unchanged.object_count == 3
+        assert replaced.result_thumbnail is None
+        assert replaced.result_preview is None
+        assert replaced.result_image == "https://example.com/new.jpg"
+    finally:
+        db.close()
+
+
+def test_results_near_are_the_nearest_within_the_radius(database):
+    db = SessionLocal()
+    try:
+        ids = {}
+        for name, lat in (("far", 10.01), ("second", 10.002), ("nearest", 10.0), ("third", 10.003)):
+            result = ResultModel(
+                original_image=f"https://example.com/{name}.jpg",
+                type=ResultType.terreno,
+                status=ResultStatus.finished,
+                lat=lat,
+                lng=20.0,
+                geohash=GeoService.encode_geohash(lat, 20.0),
+            )
+            db.add(result)
+            db.commit()
+            ids[name] = result.id
+
+        nearby = ResultService.get_results_near(db, 10.0, 20.0, 500, limit=2)
+        assert [result.id for result, _ in nearby] == [ids["nearest"], ids["second"]]
+        assert nearby[0][1] == 0
+        assert 200 < nearby[1][1] < 250
+
+        nearby = ResultService.get_results_near(db, 10.0, 20.0, 500)
+        assert [result.id for result, _ in nearby] == [ids["nearest"], ids["second"], ids["third"]]
+    finally:
+        db.close()
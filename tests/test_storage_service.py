@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from fastapi import UploadFile
+from app.routers import result as result_router
+from app.services import storage_service
+from app.services.local_storage_service import LocalStorageService
+from app.services.storage_service import ImageSourceNotAllowedError, fetch_image_url
+
+
+class _Response:
+    is_redirect = False
+    content = b"image"
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    urls = []
+
+    def get(url, **kwargs):
+        urls.append(url)
+        return _Response()
+
+    monkeypatch.setattr(storage_service.requests, "get", get)
+    return urls
+
+
+@pytest.mark.parametrize(
+    "image_url",
+    [
+        "http://169.254.169.254/computeMetadata/v1/",
+        "http://localhost:8080/admin",
+        "http://detector.invalid@169.254.169.254/",
+        "file:///etc/passwd",
+        "ftp://detector.invalid/result.jpg",
+    ],
+)
+def test_fetch_refuses_urls_off_the_allowed_hosts(fetched, image_url):
+    with pytest.raises(ImageSourceNotAllowedError):
+        fetch_image_url(image_url)
+    assert fetched == []
+
+
+def test_fetch_downloads_from_the_detector_host(fetched):
+    assert fetch_image_url("http://detector.invalid/results/7/result.jpg") == b"image"
+    assert fetched == ["http://detector.invalid/results/7/result.jpg"]
+
+
+def test_fetch_uses_the_configured_source_hosts(fetched, monkeypatch):
+    monkeypatch.setattr(storage_service.settings, "DERIVATIVE_SOURCE_HOSTS", "images.example.com, cdn.example.com:8443")
+    assert fetch_image_url("https://cdn.example.com:8443/a.jpg") == b"image"
+    for image_url in ("http://detector.invalid/a.jpg", "https://cdn.example.com/a.jpg"):
+        with pytest.raises(ImageSourceNotAllowedError):
+            fetch_image_url(image_url)
+
+
+def test_local_storage_reads_only_its_own_files(fetched):
+    storage = LocalStorageService()
+    image_url = storage.upload_image(b"stored image")
+    assert storage.download_image(image_url) == b"stored image"
+
+    outside = f"{image_url.rsplit('/', 2)[0]}/../../../etc/passwd"
+    for image_url in ("file:///etc/passwd", outside):
+        with pytest.raises(ImageSourceNotAllowedError):
+            storage.download_image(image_url)
+    assert fetched == []
+
+
+def test_derivative_names_differ_for_urls_sharing_a_file_name():
+    names = {
+        storage_service.derivative_blob_name("thumbnail", "result", image_url, "webp")
+        for image_url in (
+            "http://detector.invalid/1/result.jpg",
+            "http://detector.invalid/2/result.jpg",
+            "http://detector.invalid/result?id=1",
+            "http://detector.invalid/result?id=2",
+        )
+    }
+    assert len(names) == 4
+    assert all(name.startswith("thumbnail/result/") and name.endswith(".webp") for name in names)
+
+
+def test_normalized_upload_is_stored_under_the_upload_hash(monkeypatch):
+    class Normalizer:
+        async def normalize(self, data):
+            return b"normalized " + data
+
+    monkeypatch.setattr(result_router.settings, "UPLOAD_NORMALIZE_ENABLED", True)
+    monkeypatch.setattr(result_router, "image_normalizer", Normalizer())
+    storage = LocalStorageService()
+    content_hash = hashlib.sha256(b"raw photo").hexdigest()
+
+    image_url, stored = asyncio.run(
+        result_router._store_upload(
+            storage, UploadFile(io.BytesIO(b"raw photo"), filename="photo.png"), content_hash
+        )
+    )
+    assert image_url.endswith(f"/original/{content_hash}.jpg")
+    assert stored == b"normalized raw photo"
+    assert storage.download_image(image_url) == stored
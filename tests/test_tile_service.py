@@ -0,0 +1,98 @@
+import random
+import pytest
+from app.database import SessionLocal
+from app.models.enums.result import ResultStatus, ResultType
+from app.models.result import ResultModel
+from app.services.geo_service import GeoService
+from app.services.tile_service import TileService
+
+CENTER = (-33.86, 151.21)
+
+
+@pytest.fixture(scope="module")
+def points(database):
+    """Finished results scattered around CENTER, plus one unfinished result."""
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        points = []
+        for index in range(300):
+            lat = CENTER[0] + rng.uniform(-0.5, 0.5)
+            lng = CENTER[1] + rng.uniform(-0.5, 0.5)
+            object_count = index % 4 or None
+            points.append((lat, lng, object_count))
+            db.add(
+                ResultModel(
+                    original_image=f"https://example.com/tile-{index}.jpg",
+                    type=ResultType.terreno,
+                    status=ResultStatus.finished,
+                    lat=lat,
+                    lng=lng,
+                    geohash=GeoService.encode_geohash(lat, lng),
+                    object_count=object_count,
+                )
+            )
+        db.add(
+            ResultModel(
+                original_image="https://example.com/tile-processing.jpg",
+                type=ResultType.terreno,
+                status=ResultStatus.processing,
+                lat=CENTER[0],
+                lng=CENTER[1],
+                geohash=GeoService.encode_geohash(*CENTER),
+            )
+        )
+        db.commit()
+        return points
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("z", [4, 8, 10])
+def test_clusters_bin_the_geohash_cell_totals(points, z):
+    tiles = TileService()
+    x, y = tiles.tile_for_point(*CENTER, z)
+    min_lat, min_lng, max_lat, max_lng = tiles.tile_bounds(z, x, y)
+
+    precision = tiles._cell_precision(min_lat, min_lng, max_lat, max_lng)
+    assert precision is not None
+
+    # The same totals computed here from the points, per geohash cell
+    totals = {}
+    for lat, lng, object_count in points:
+        if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+            cell = GeoService.encode_geohash(lat, lng)[:precision]
+            count, lat_sum, lng_sum, object_sum = totals.get(cell, (0, 0.0, 0.0, 0))
+            totals[cell] = (count + 1, lat_sum + lat, lng_sum + lng, object_sum + (object_count or 0))
+    db = SessionLocal()
+    try:
+        clusters = tiles.get_clusters(db, z, x, y)
+    finally:
+        db.close()
+
+    expected = tiles._bin(list(totals.values()), z, x, y)
+    assert sum(cluster["count"] for cluster in clusters) == sum(total[0] for total in totals.values())
+
+    def key(cluster):
+        return cluster["count"], cluster["objectCount"]
+
+    assert sorted(map(key, clusters)) == sorted(map(key, expected))
+    for cluster, wanted in zip(sorted(clusters, key=key), sorted(expected, key=key)):
+        assert cluster["lat"] == pytest.approx(wanted["lat"])
+        assert cluster["lng"] == pytest.approx(wanted["lng"])
+        assert min_lat <= cluster["lat"] <= max_lat and min_lng <= cluster["lng"] <= max_lng
+
+
+def test_highest_zooms_bin_the_points(points):
+    tiles = TileService()
+    lat, lng, _ = points[0]
+    x, y = tiles.tile_for_point(lat, lng, 21)
+    assert tiles._cell_precision(*tiles.tile_bounds(21, x, y)) is None
+
+    db = SessionLocal()
+    try:
+        clusters = tiles.get_clusters(db, 21, x, y)
+    finally:
+        db.close()
+    assert [cluster["count"] for cluster in clusters] == [1]
+    assert clusters[0]["lat"] == pytest.approx(lat)
@@ -0,0 +1,64 @@
+import base64
+import json
+import pytest
+from app.config import settings
+from app.services import token_service
+from app.services.token_service import (
+    InvalidTokenError,
+    TokenConfigurationError,
+    TokenService,
+    REFRESH,
+)
+
+
+def _b64(value) -> str:
+    raw = json.dumps(value).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+@pytest.fixture
+def fresh_keys(monkeypatch):
+    """Reload the signing keys from the (patched) settings for one test."""
+    monkeypatch.setattr(token_service, "_keys", token_service._KeyCache())
+    return monkeypatch
+
+
+def test_round_trip():
+    tokens = TokenService.issue_tokens(42, "user")
+    identity = TokenService.decode(tokens["refreshToken"], "user", REFRESH)
+    assert identity.subject_id == 42
+
+
+@pytest.mark.parametrize("header", [[], "HS256", 1, None])
+def test_non_object_header_is_invalid(header):
+    token = TokenService.issue_tokens(1, "user")["refreshToken"]
+    _, payload, signature = token.split(".")
+    with pytest.raises(InvalidTokenError):
+        TokenService.decode(f"{_b64(header)}.{payload}.{signature}", "user", REFRESH)
+
+
+def test_non_object_payload_is_invalid(fresh_keys):
+    kid = token_service._keys.signing_kid()
+    signing_input = f"{_b64({'alg': 'HS256', 'kid': kid})}.{_b64([1, 2])}"
+    signature = token_service._keys.sign(kid, signing_input.encode("ascii"))
+    token = signing_input + "." + base64.urlsafe_b64encode(signature).rstrip(b"=").decode("ascii")
+    with pytest.raises(InvalidTokenError):
+        TokenService.decode(token, "user")
+
+
+def test_missing_secret_refuses_to_start(fresh_keys):
+    fresh_keys.setattr(settings, "AUTH_SECRET_KEY", None)
+    fresh_keys.setattr(settings, "AUTH_ALLOW_EPHEMERAL_SECRET", False)
+    with pytest.raises(TokenConfigurationError):
+        TokenService.check_configuration()
+
+
+def test_ephemeral_secret_needs_a_single_worker(fresh_keys):
+    fresh_keys.setattr(settings, "AUTH_SECRET_KEY", None)
+    fresh_keys.setattr(settings, "AUTH_ALLOW_EPHEMERAL_SECRET", True)
+    fresh_keys.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(TokenConfigurationError):
+        TokenService.check_configuration()
+
+    fresh_keys.setenv("WEB_CONCURRENCY", "1")
+    TokenService.check_configuration()
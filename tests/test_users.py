@@ -0,0 +1,61 @@
+import json
+import pytest
+from app.services.password_service import password_hasher
+from tests.asgi import call
+
+ADDRESS = {
+    "cep": "30000000",
+    "street": "Rua da Bahia",
+    "number": 1,
+    "neighborhood": "Centro",
+    "city": "Belo Horizonte",
+    "lat": "-19.92",
+    "lng": "-43.94",
+}
+
+
+@pytest.fixture
+def hashed(database, monkeypatch):
+    """Stand in for the bcrypt pool and record the passwords it was asked to hash."""
+    passwords = []
+
+    async def hash(plain_password):
+        passwords.append(plain_password)
+        return f"hashed:{plain_password}"
+
+    monkeypatch.setattr(password_hasher, "hash", hash)
+    return passwords
+
+
+def _post(path: str, payload: dict) -> int:
+    import app.main
+
+    status, _, _ = call(
+        app.main.app, "POST", path, json.dumps(payload).encode(), {"Content-Type": "application/json"}
+    )
+    return status
+
+
+def test_signup_with_a_taken_email_is_rejected_before_hashing(hashed):
+    user = {
+        "name": "Teste",
+        "email": "taken@example.com",
+        "password": "first-password",
+        "phone": "31999999999",
+        "address": ADDRESS,
+    }
+    assert _post("/user/createUser", user) == 200
+    assert _post("/user/createUser", {**user, "password": "second-password"}) == 409
+    assert hashed == ["first-password"]
+
+
+def test_portal_signup_with_a_taken_email_is_rejected_before_hashing(hashed):
+    portal_user = {
+        "name": "Teste",
+        "email": "taken-portal@example.com",
+        "password": "first-password",
+        "city": "Belo Horizonte",
+    }
+    assert _post("/userPortal/createUserPortal", portal_user) == 200
+    assert _post("/userPortal/createUserPortal", {**portal_user, "password": "second-password"}) == 409
+    assert hashed == ["first-password"]